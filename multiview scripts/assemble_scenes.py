@@ -0,0 +1,244 @@
+import bpy
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import time
+
+from mathutils import Vector
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import render_common
+import render_plan
+import view_cache
+
+# Headless assembly of ready-to-render .blend scenes from TRELLIS .glb outputs.
+#
+#   blender --background --python assemble_scenes.py -- --artifacts "../trellis artifacts" --out /data/blend
+#
+# Every <artifacts>/<instance>/*.glb (e.g. bus_4/bus_4.glb) is imported into a
+# studio scene: the built-in one (Cycles, transparent film, a sun and a grey
+# world), or a --template .blend with a camera. The vehicle is parented to an
+# empty named after the instance, scaled so its longest side on the ground is a
+# typical length for its class and moved so it stands centred on the origin. It
+# goes into a 'car' collection, the camera gets a Track To constraint on it, and
+# the result is saved as <out>/<class>/<instance>_xy.blend for batch_render.py.
+#
+# Assembled scenes are cached under --cache by the GLB's content hash (plus the
+# template, length and ASSEMBLY_VERSION) and materialised with hardlinks, so
+# re-runs only hash files whose size or mtime changed and finish in seconds.
+
+# Bump when the assembled scene changes, so cached scenes are rebuilt
+ASSEMBLY_VERSION = 1
+
+INSTANCE_RE = re.compile(r"^([a-z]+)_\d+$")
+
+# Typical overall lengths in metres, for scaling TRELLIS's unit-sized meshes
+CLASS_LENGTHS = {"bus": 12.0, "sedan": 4.8, "sport": 4.5, "suv": 4.9, "truck": 7.5, "van": 5.2}
+DEFAULT_LENGTH = 5.0
+
+argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+parser = argparse.ArgumentParser(prog="assemble_scenes.py")
+parser.add_argument("--artifacts", required=True, help="Folder of <instance>/ folders holding TRELLIS .glb files")
+parser.add_argument("--out", required=True, help="Root to write <class>/<instance>_xy.blend scenes under")
+parser.add_argument("--cache", default=None, help="Assembled scene cache (default: <out>/.scene_cache)")
+parser.add_argument("--template", default=None,
+                    help="Studio .blend with a camera to assemble into (default: a built-in studio scene)")
+parser.add_argument("--length", action="append", default=[], metavar="CLASS=METRES",
+                    help="Override the vehicle length used for a class")
+parser.add_argument("--shard", default=None, help="Assemble only shard i/N of the assets")
+parser.add_argument("--force", action="store_true", help="Rebuild every scene, ignoring the cache")
+args = parser.parse_args(argv)
+
+lengths = dict(CLASS_LENGTHS)
+for override in args.length:
+    vehicle, _, metres = override.partition("=")
+    lengths[vehicle] = float(metres)
+cache_dir = args.cache or os.path.join(args.out, ".scene_cache")
+os.makedirs(cache_dir, exist_ok=True)
+
+
+def find_assets(artifacts):
+    # (class, instance, .glb path) for every instance folder named <class>_<n>
+    assets = []
+    for instance in sorted(os.listdir(artifacts)):
+        folder = os.path.join(artifacts, instance)
+        match = INSTANCE_RE.match(instance)
+        if not os.path.isdir(folder) or not match:
+            continue
+        glbs = sorted(name for name in os.listdir(folder) if name.lower().endswith(".glb"))
+        if not glbs:
+            print(f"No .glb in {folder}, skipping")
+            continue
+        assets.append((match.group(1), instance, os.path.abspath(os.path.join(folder, glbs[0]))))
+    return assets
+
+
+class HashIndex:
+    # Content hashes of the GLBs, recomputed only when a file's size or mtime changes
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.hashed = 0
+        if os.path.exists(path):
+            with open(path) as f:
+                self.entries = json.load(f)
+
+    def hash(self, path):
+        stat = os.stat(path)
+        entry = self.entries.get(path)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry["hash"]
+        digest = view_cache.file_hash(path)
+        self.entries[path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest}
+        self.hashed += 1
+        return digest
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def build_studio(length):
+    # Empty session -> Cycles scene with transparent film, a sun, a grey world and a camera
+    render_common.reset_session()
+    scene = bpy.context.scene
+    scene.render.engine = 'CYCLES'
+    scene.cycles.samples = 128
+    scene.render.film_transparent = True
+    scene.render.resolution_x = 1024
+    scene.render.resolution_y = 1024
+    scene.render.resolution_percentage = 100
+
+    world = bpy.data.worlds.new("Studio")
+    world.use_nodes = True
+    background = world.node_tree.nodes.get("Background")
+    background.inputs["Color"].default_value = (0.5, 0.5, 0.5, 1.0)
+    background.inputs["Strength"].default_value = 1.0
+    scene.world = world
+
+    sun = bpy.data.objects.new("Sun", bpy.data.lights.new("Sun", 'SUN'))
+    sun.data.energy = 3.0
+    sun.rotation_euler = (math.radians(40), 0.0, math.radians(30))
+    scene.collection.objects.link(sun)
+
+    camera = bpy.data.objects.new("Camera", bpy.data.cameras.new("Camera"))
+    camera.location = (0.0, -2.5 * length, 2.0 * length)
+    camera.data.clip_end = max(100.0, 20 * length)
+    scene.collection.objects.link(camera)
+    scene.camera = camera
+    return scene
+
+
+def normalise(objects, name, length):
+    # Parent the imported objects to an empty, scaled to length and standing centred on the origin
+    root = bpy.data.objects.new(name, None)
+    bpy.context.scene.collection.objects.link(root)
+    for obj in objects:
+        if obj.parent is None:
+            obj.parent = root
+    bpy.context.view_layer.update()
+    corners = [obj.matrix_world @ Vector(corner) for obj in objects if obj.type == 'MESH' for corner in obj.bound_box]
+    if not corners:
+        raise ValueError(f"{name}: the .glb holds no meshes")
+    low = Vector((min(c.x for c in corners), min(c.y for c in corners), min(c.z for c in corners)))
+    high = Vector((max(c.x for c in corners), max(c.y for c in corners), max(c.z for c in corners)))
+    scale = length / max(high.x - low.x, high.y - low.y, 1e-9)
+    root.scale = (scale, scale, scale)
+    root.location = (-scale * (low.x + high.x) / 2, -scale * (low.y + high.y) / 2, -scale * low.z)
+    bpy.context.view_layer.update()
+    return root
+
+
+def assemble(glb_path, name, length, cached_path):
+    if args.template:
+        bpy.ops.wm.open_mainfile(filepath=args.template)
+        scene = bpy.context.scene
+    else:
+        scene = build_studio(length)
+    camera = scene.camera or bpy.data.objects.get('Camera')
+    if camera is None:
+        raise ValueError(f"No camera in {args.template}")
+
+    # A fresh 'car' collection holds the vehicle (a template's placeholder car is dropped)
+    collection = bpy.data.collections.get("car")
+    if collection is None:
+        collection = bpy.data.collections.new("car")
+        scene.collection.children.link(collection)
+    for obj in list(collection.objects):
+        bpy.data.objects.remove(obj, do_unlink=True)
+
+    before = set(bpy.data.objects)
+    bpy.ops.import_scene.gltf(filepath=glb_path)
+    imported = [obj for obj in bpy.data.objects if obj not in before]
+    root = normalise(imported, name, length)
+    for obj in imported + [root]:
+        for owner in list(obj.users_collection):
+            owner.objects.unlink(obj)
+        collection.objects.link(obj)
+
+    track = next((constraint for constraint in camera.constraints if constraint.type == 'TRACK_TO'), None)
+    if track is None:
+        track = camera.constraints.new(type='TRACK_TO')
+        track.track_axis = 'TRACK_NEGATIVE_Z'
+        track.up_axis = 'UP_Y'
+    track.target = root
+
+    # Embedded GLB textures go inside the .blend so the scene does not depend on the import
+    bpy.ops.file.pack_all()
+    tmp_path = cached_path[:-len(".blend")] + ".tmp.blend"
+    bpy.ops.wm.save_as_mainfile(filepath=tmp_path, compress=True)
+    os.replace(tmp_path, cached_path)
+
+
+start_time = time.time()
+assets = find_assets(args.artifacts)
+if args.shard:
+    index, count = render_plan.parse_shard(args.shard)
+    assets = assets[index::count]
+print(f"Assembling {len(assets)} TRELLIS assets into {args.out}")
+
+template_hash = view_cache.file_hash(args.template) if args.template else "studio"
+hashes = HashIndex(os.path.join(cache_dir, "glb_hashes.json"))
+counts = {"assembled": 0, "cached": 0, "up to date": 0, "failed": 0}
+assembly_seconds = []
+for vehicle, instance, glb_path in assets:
+    length = lengths.get(vehicle, DEFAULT_LENGTH)
+    key = hashlib.sha256(json.dumps({"glb": hashes.hash(glb_path), "template": template_hash, "length": length,
+                                     "version": ASSEMBLY_VERSION}, sort_keys=True).encode()).hexdigest()
+    cached_path = os.path.join(cache_dir, key[:2], key + ".blend")
+    out_path = os.path.join(args.out, vehicle, f"{instance}_xy.blend")
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+
+    if args.force or not os.path.exists(cached_path):
+        os.makedirs(os.path.dirname(cached_path), exist_ok=True)
+        asset_start = time.time()
+        try:
+            assemble(glb_path, instance, length, cached_path)
+        except Exception as e:
+            counts["failed"] += 1
+            print(f"Failed to assemble {glb_path}: {e}")
+            continue
+        assembly_seconds.append(time.time() - asset_start)
+        counts["assembled"] += 1
+        print(f"Assembled {instance} ({length:g} m) in {assembly_seconds[-1]:.1f}s")
+    elif os.path.exists(out_path) and os.path.samefile(out_path, cached_path):
+        counts["up to date"] += 1
+        continue
+    else:
+        counts["cached"] += 1
+    view_cache.materialise(cached_path, out_path)
+    print(f"Saved scene: {out_path}")
+hashes.save()
+
+seconds = time.time() - start_time
+mean = sum(assembly_seconds) / len(assembly_seconds) if assembly_seconds else 0.0
+print(f"Scenes: {', '.join(f'{count} {state}' for state, count in counts.items())} in {seconds:.1f}s "
+      f"({hashes.hashed} GLBs hashed, mean assembly {mean:.1f}s)")
+if counts["cached"] + counts["up to date"] and mean:
+    print(f"Cache saved ~{(counts['cached'] + counts['up to date']) * mean:.0f}s of assembly")
@@ -1,10 +1,17 @@
+import argparse
+import json
+import logging
 import os
+import shutil
 import subprocess
-import logging
 import sys
+import threading
+import time
 
-# Setup logging to capture errors
-logging.basicConfig(filename='render_errors.log', level=logging.ERROR)
+from render_history import RenderHistory
+from render_manifest import RenderManifest
+import metrics
+import render_plan
 
 # Define the list of vehicle types and their corresponding render scripts
 vehicle_scripts = {
@@ -19,46 +26,639 @@ vehicle_scripts = {
 # Blender executable command
 blender_executable = "blender"  # Adjust this if your Blender executable has a different name or path
 
-# Function to clear Blender's cache/memory after each render
-def clear_blender_cache():
-    # Clear Blender cache/memory (if necessary)
-    clear_script = """
-import bpy
-bpy.ops.wm.read_factory_settings(use_empty=True)
-bpy.ops.outliner.orphans_purge()
+# Render scripts and the worker live next to this file
+scripts_dir = os.path.dirname(os.path.abspath(__file__))
+worker_script = os.path.join(scripts_dir, "render_worker.py")
+
+# Prefix render_worker.py puts in front of its own stdout messages
+WORKER_MSG = "@@street2air-worker "
+
+# Default memory budget: this share of the node's available memory when the batch starts
+MEMORY_BUDGET_FRACTION = 0.9
+
+# Seconds between samples of the workers' resident memory
+MEMORY_POLL_SECONDS = 1.0
+
+
+class WorkerDied(RuntimeError):
+    pass
+
+
+def process_rss_mb(pid):
+    # Resident memory of another process, or None once it is gone
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return None
+
+
+def available_memory_mb():
+    # MemAvailable of this node, or None where /proc/meminfo does not exist
+    try:
+        with open("/proc/meminfo") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return None
+
+
+def format_mb(mb):
+    return f"{mb / 1024:.1f} GB" if mb >= 1024 else f"{mb:.0f} MB"
+
+
+class BlenderWorker:
+    """One headless Blender process that renders jobs sent over its stdin."""
+
+    def __init__(self, worker_id, max_jobs=50, max_rss_mb=None):
+        self.worker_id = worker_id
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self.process = None
+        self.jobs_done = 0
+        self.rss_mb = 0.0
+        self.spawns = 0
+        self.startup_seconds = []
+        # Sampled by run_pool's memory monitor while a job runs
+        self.pid = None
+        self.job = None
+        self.memory_mb = 0.0
+        self.job_peak_mb = 0.0
+
+    def start(self):
+        start_time = time.time()
+        command = [
+            blender_executable,
+            "--background",
+            "--python", worker_script,
+            "--", str(self.worker_id)
+        ]
+        self.process = subprocess.Popen(
+            command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT, text=True, bufsize=1
+        )
+        ready = self._read_message()
+        self.startup_seconds.append(time.time() - start_time)
+        self.spawns += 1
+        self.jobs_done = 0
+        self.rss_mb = ready.get("rss_mb", 0.0)
+        # The worker's own pid: `blender` may be a launcher script around the real process
+        self.pid = ready.get("pid") or self.process.pid
+        print(f"[worker {self.worker_id}] started (pid {ready.get('pid')}) in {self.startup_seconds[-1]:.1f}s")
+
+    def _read_message(self):
+        # Echo Blender's own output and return the first worker message
+        for line in self.process.stdout:
+            if line.startswith(WORKER_MSG):
+                return json.loads(line[len(WORKER_MSG):])
+            print(f"[worker {self.worker_id}] {line}", end="")
+        self.process.wait()
+        raise WorkerDied(f"worker {self.worker_id} exited with code {self.process.returncode}")
+
+    def run(self, job):
+        self.job = job
+        self.job_peak_mb = 0.0
+        try:
+            if self.process is None or self.process.poll() is not None:
+                self.start()
+            try:
+                self.process.stdin.write(json.dumps(job) + "\n")
+                self.process.stdin.flush()
+            except OSError as e:
+                raise WorkerDied(f"worker {self.worker_id} is not accepting jobs: {e}")
+            result = self._read_message()
+        finally:
+            self.job = None
+        self.jobs_done += 1
+        self.rss_mb = result.get("rss_mb", self.rss_mb)
+        # The worker's own peak (when the kernel let it reset) and ours, sampled from outside
+        result["peak_rss_mb"] = max(result.get("peak_rss_mb", 0.0), self.job_peak_mb)
+        if self.needs_recycle():
+            print(f"[worker {self.worker_id}] recycling after {self.jobs_done} jobs ({self.rss_mb:.0f} MB resident)")
+            self.stop()
+        return result
+
+    def sample_memory(self):
+        # Resident memory of the Blender process right now, tracking the peak of the current job
+        mb = process_rss_mb(self.pid) if self.process is not None and self.pid else None
+        self.memory_mb = mb or 0.0
+        if self.job is not None:
+            self.job_peak_mb = max(self.job_peak_mb, self.memory_mb)
+        return self.memory_mb
+
+    def needs_recycle(self):
+        if self.max_jobs and self.jobs_done >= self.max_jobs:
+            return True
+        return bool(self.max_rss_mb) and self.rss_mb > self.max_rss_mb
+
+    def stop(self):
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.write(json.dumps({"command": "stop"}) + "\n")
+                self.process.stdin.flush()
+                self.process.wait(timeout=60)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+        self.process.stdin.close()
+        self.process.stdout.close()
+        self.process = None
+
+
+def render_args(params):
+    # Turn {"num_renders": 30, "seed": None, ...} into the class scripts' command line options
+    args = []
+    for name, value in sorted(params.items()):
+        if value is True:
+            args.append("--" + name.replace("_", "-"))  # Switches such as --symmetric take no value
+        elif value is not None:
+            args += ["--" + name.replace("_", "-"), str(value)]
+    if params.get("tune_noise") is not None:
+        args.append("--tune-samples")
+    return args
+
+
+def find_jobs(root, params, extra_args=()):
+    # Find all .blend files with _xy in the name, one job per file
+    jobs = []
+    for vehicle, render_script in vehicle_scripts.items():
+        vehicle_dir = os.path.join(root, vehicle)
+        if not os.path.isdir(vehicle_dir):
+            print(f"Directory {vehicle_dir} does not exist.")
+            continue
+        for file_name in sorted(os.listdir(vehicle_dir)):
+            # Skip the temp_ copies the render scripts make next to the original
+            if file_name.endswith("_xy.blend") and not file_name.startswith("temp_"):
+                blend_name = os.path.splitext(file_name)[0]
+                jobs.append({
+                    "id": len(jobs),
+                    "vehicle": vehicle,
+                    "blend": os.path.abspath(os.path.join(vehicle_dir, file_name)),
+                    "script": os.path.join(scripts_dir, render_script),
+                    "output_dir": os.path.abspath(os.path.join(vehicle_dir, f"{blend_name}_renders")),
+                    "params": dict(params),
+                    "args": render_args(params) + list(extra_args)
+                })
+    return jobs
+
+
+def format_duration(seconds):
+    seconds = int(max(seconds, 0))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+
+class JobScheduler:
+    """Hands out jobs longest-first within a memory budget and keeps a running ETA for the batch.
+
+    With a budget, a job starts only when its memory estimate fits next to the reservations of the
+    running jobs. When the next job in line does not fit, smaller jobs are backfilled around it: those
+    that fit now and either should finish before enough memory frees up for it, or still leave it room.
     """
-    subprocess.run([blender_executable, '--background', '--python-expr', clear_script], check=True)
-    print("Cache and memory cleared.")
-
-# Loop through each vehicle type and corresponding script
-for vehicle, render_script in vehicle_scripts.items():
-    vehicle_dir = os.path.join(vehicle)
-    if os.path.isdir(vehicle_dir):
-        # Find all .blend files with _xy in the name
-        for file_name in os.listdir(vehicle_dir):
-            if file_name.endswith("_xy.blend"):
-                blend_file_path = os.path.join(vehicle_dir, file_name)
-                try:
-                    # Construct the command to run Blender with the specified Python script and Blender file
-                    command = [
-                        blender_executable,
-                        "--background",
-                        "--python", render_script,
-                        "--", blend_file_path
-                    ]
-                    print(f"Rendering {blend_file_path} with {render_script}...")
-                    
-                    # Run the Blender rendering process
-                    subprocess.run(command, check=True)
-                    
-                    # Clear Blender cache/memory after each render
-                    clear_blender_cache()
-
-                except subprocess.CalledProcessError as e:
-                    # Log any errors that occur
-                    logging.error(f"Error rendering {blend_file_path} with {render_script}: {e}")
-                    print(f"Error rendering {blend_file_path} with {render_script}, logged to render_errors.log")
-    else:
-        print(f"Directory {vehicle_dir} does not exist.")
-
-print("Rendering process completed.")
\ No newline at end of file
+
+    def __init__(self, jobs, estimates, slots, memory=None, budget_mb=None):
+        self.estimates = estimates
+        self.slots = slots
+        self.memory = memory or {}
+        self.budget_mb = budget_mb
+        # Longest processing time first: the heaviest files start early instead of forming the tail
+        self.pending = sorted(jobs, key=lambda job: estimates[job["id"]], reverse=True)
+        self.running = {}
+        self.reserved = {}
+        self.total = len(jobs)
+        self.finished = 0
+        self.condition = threading.Condition()
+
+    def next_job(self):
+        # Blocks while no pending job fits the memory budget; None once every job has been handed out
+        waiting = False
+        with self.condition:
+            while self.pending:
+                job = self._admit(time.time())
+                if job is not None:
+                    self.pending.remove(job)
+                    self.running[job["id"]] = time.time()
+                    self.reserved[job["id"]] = self.memory.get(job["id"], 0.0)
+                    return job
+                if not waiting:
+                    head = self.pending[0]
+                    print(f"Waiting for memory: next job needs {format_mb(self.memory[head['id']])}, "
+                          f"{format_mb(self.budget_mb - self.in_use())} of {format_mb(self.budget_mb)} free")
+                    waiting = True
+                self.condition.wait(timeout=5.0)
+            return None
+
+    def _admit(self, now):
+        if not self.budget_mb:
+            return self.pending[0]
+        free = self.budget_mb - self.in_use()
+        head = self.pending[0]
+        need = self.memory[head["id"]]
+        if need <= free:
+            return head
+        if not self.running:
+            print(f"{head['blend']} needs ~{format_mb(need)}, over the {format_mb(self.budget_mb)} budget; "
+                  f"running it alone")
+            return head
+        # When will enough running jobs have finished for the head job to fit, and what will it leave over?
+        shadow, spare = float("inf"), 0.0
+        available = free
+        for remaining, mb in sorted((max(self.estimates[job_id] - (now - started), 0.0), self.reserved[job_id])
+                                    for job_id, started in self.running.items()):
+            available += mb
+            if available >= need:
+                shadow, spare = remaining, available - need
+                break
+        for job in self.pending[1:]:
+            mb = self.memory[job["id"]]
+            if mb <= free and (self.estimates[job["id"]] <= shadow or mb <= spare):
+                return job
+        return None
+
+    def observe(self, job_id, mb):
+        # A running job using more than its estimate keeps what it uses reserved
+        with self.condition:
+            if job_id in self.reserved:
+                self.reserved[job_id] = max(self.reserved[job_id], mb)
+
+    def in_use(self):
+        return sum(self.reserved.values())
+
+    def finish(self, job):
+        with self.condition:
+            self.running.pop(job["id"], None)
+            self.reserved.pop(job["id"], None)
+            self.finished += 1
+            self.condition.notify_all()
+            return self.finished, self.eta()
+
+    def eta(self):
+        # Replay the remaining schedule: running jobs keep their slot, pending jobs go to the earliest free one
+        now = time.time()
+        free_at = sorted(max(self.estimates[job_id] - (now - started), 0.0)
+                         for job_id, started in self.running.items())
+        free_at += [0.0] * (self.slots - len(free_at))
+        for job in self.pending:
+            free_at.sort()
+            free_at[0] += self.estimates[job["id"]]
+        return max(free_at) if free_at else 0.0
+
+
+def run_pool(jobs, num_workers, max_jobs, max_rss_mb, history=None, manifest=None, budget_mb=None):
+    estimates = {job["id"]: history.estimate(job) if history else 0.0 for job in jobs}
+    memory = {}
+    if budget_mb:
+        # Peak memory learnt per file; files never seen take the largest known estimate, else an even share
+        known = {job["id"]: history.memory_estimate(job) if history else None for job in jobs}
+        fallback = max((mb for mb in known.values() if mb), default=budget_mb / num_workers)
+        memory = {job_id: mb or fallback for job_id, mb in known.items()}
+        unknown = sum(1 for mb in known.values() if not mb)
+        print(f"Memory budget {format_mb(budget_mb)}: {len(jobs) - unknown} of {len(jobs)} jobs have a learnt "
+              f"estimate" + (f", {unknown} assume {format_mb(fallback)}" if unknown else ""))
+    scheduler = JobScheduler(jobs, estimates, num_workers, memory, budget_mb)
+    print(f"Scheduled {len(jobs)} jobs on {num_workers} workers, estimated makespan {format_duration(scheduler.eta())}")
+    workers = [BlenderWorker(i, max_jobs=max_jobs, max_rss_mb=max_rss_mb) for i in range(num_workers)]
+    results = []
+    lock = threading.Lock()
+    usage = {"current": 0.0, "peak": 0.0}
+    done = threading.Event()
+
+    def watch_memory():
+        # Sample the workers' resident memory for the progress lines, the job peaks and the reservations
+        while not done.wait(MEMORY_POLL_SECONDS):
+            total = 0.0
+            for worker in workers:
+                total += worker.sample_memory()
+                job = worker.job
+                if job is not None:
+                    scheduler.observe(job["id"], worker.memory_mb)
+            usage["current"] = total
+            usage["peak"] = max(usage["peak"], total)
+
+    def worker_loop(worker):
+        while True:
+            job = scheduler.next_job()
+            if job is None:
+                break
+            needs = f", {format_mb(memory[job['id']])}" if memory else ""
+            print(f"Rendering {job['blend']} with {os.path.basename(job['script'])} on worker {worker.worker_id} "
+                  f"(estimated {format_duration(estimates[job['id']])}{needs})...")
+            try:
+                result = worker.run(job)
+            except (WorkerDied, OSError) as e:
+                # The process crashed mid-job (or never started); the next job gets a fresh worker
+                worker.stop()
+                result = {"id": job["id"], "ok": False, "error": str(e), "peak_rss_mb": worker.job_peak_mb}
+            if not result.get("ok"):
+                logging.error(f"Error rendering {job['blend']} with {job['script']}: {result.get('error')}")
+                print(f"Error rendering {job['blend']}, logged to render_errors.log")
+            with lock:
+                results.append(dict(result, blend=job["blend"], vehicle=job["vehicle"], output_dir=job["output_dir"]))
+                if history:
+                    history.record(job, result)
+                    history.record_memory(job, result.get("peak_rss_mb"), result.get("ok"))
+                    history.save()
+                if manifest and result.get("ok"):
+                    manifest.record(job, result.get("outputs") or [])
+                    manifest.save()
+            finished, eta = scheduler.finish(job)
+            budget = f" of {format_mb(budget_mb)}" if budget_mb else ""
+            print(f"Progress: {finished}/{scheduler.total} jobs, ETA {format_duration(eta)}, "
+                  f"memory {format_mb(usage['current'])}{budget} (peak {format_mb(usage['peak'])}, "
+                  f"job peak {format_mb(result.get('peak_rss_mb') or 0.0)})")
+        worker.stop()
+
+    monitor = threading.Thread(target=watch_memory, daemon=True)
+    monitor.start()
+    threads = [threading.Thread(target=worker_loop, args=(worker,), daemon=True) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    done.set()
+    monitor.join()
+    if usage["peak"]:
+        print(f"Peak memory of all workers: {format_mb(usage['peak'])}"
+              + (f" ({usage['peak'] / budget_mb:.0%} of the budget)" if budget_mb else ""))
+    return results, workers
+
+
+def batch_outputs(results, name, wall_seconds):
+    # (result, path) of each successful job's output file written during this batch
+    for result in results:
+        path = os.path.join(result.get("output_dir", ""), name)
+        if result.get("ok") and os.path.exists(path) and os.path.getmtime(path) >= time.time() - wall_seconds:
+            yield result, path
+
+
+def metrics_report(results, wall_seconds, report_path, prometheus_path=None):
+    # Roll the per-file render_metrics.jsonl records up per vehicle class and for the whole batch
+    by_vehicle = {}
+    for result, path in batch_outputs(results, metrics.METRICS_NAME, wall_seconds):
+        record, _ = metrics.load_metrics(path)
+        if record is not None:
+            by_vehicle.setdefault(result["vehicle"], []).append(record)
+    if not by_vehicle:
+        return
+    report = {"wall_seconds": wall_seconds,
+              "total": metrics.rollup(record for records in by_vehicle.values() for record in records),
+              "vehicles": {vehicle: metrics.rollup(records) for vehicle, records in sorted(by_vehicle.items())}}
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    if prometheus_path:
+        samples = []
+        for vehicle, rollup in report["vehicles"].items():
+            samples += metrics.prometheus_samples([rollup], {"vehicle": vehicle})
+        metrics.write_prometheus(prometheus_path, samples)
+
+    for vehicle, rollup in report["vehicles"].items():
+        views = max(rollup["views"], 1)
+        stages = dict(rollup["stages"], **rollup["view_stages"])
+        per_view = ", ".join(f"{name.replace('render_', 'render ').replace('_seconds', '')} {seconds / views:.2f}s"
+                             for name, seconds in sorted(stages.items(), key=lambda item: -item[1])
+                             if name != "views")
+        peak = f", peak {rollup['peak_mb']:.0f} MB" if rollup.get("peak_mb") else ""
+        if rollup.get("peak_rss_mb"):
+            peak += f", process peak {rollup['peak_rss_mb']:.0f} MB"
+        print(f"Stages {vehicle} ({rollup['files']} files, {rollup['views']} views), per view: {per_view}{peak}")
+    print(f"Stage metrics report: {report_path}")
+
+
+def print_summary(results, workers, wall_seconds):
+    done = sum(1 for r in results if r.get("ok"))
+    failed = len(results) - done
+    spawns = sum(w.spawns for w in workers)
+    startups = [s for w in workers for s in w.startup_seconds]
+    mean_startup = sum(startups) / len(startups) if startups else 0.0
+    # The old serial loop started Blender twice per file: once to render, once to clear the cache
+    serial_spawns = 2 * len(results)
+    saved = max(serial_spawns - spawns, 0) * mean_startup
+    jobs_per_hour = done / wall_seconds * 3600 if wall_seconds > 0 else 0.0
+
+    print(f"Jobs: {done} done, {failed} failed in {wall_seconds:.1f}s ({jobs_per_hour:.1f} jobs/hour)")
+    print(f"Blender processes started: {spawns} (serial loop would start {serial_spawns}), "
+          f"mean startup {mean_startup:.1f}s, startup time saved ~{saved:.1f}s")
+
+    # Preview screening records written during this batch, per vehicle class
+    screened = {}
+    for result, path in batch_outputs(results, "screening.json", wall_seconds):
+        with open(path) as f:
+            record = json.load(f)
+        totals = screened.setdefault(result["vehicle"], [0, 0, 0.0])
+        totals[0] += record["candidates"]
+        totals[1] += record["selected"]
+        totals[2] += record.get("estimated_seconds_saved", 0.0)
+    for vehicle, (candidates, selected, seconds_saved) in sorted(screened.items()):
+        print(f"Screening {vehicle}: {selected} of {candidates} candidate views rendered, "
+              f"~{format_duration(seconds_saved)} render time saved")
+
+
+def make_plan(jobs, plan_path, root, num_workers):
+    # Run every job in planning mode: the class scripts write their poses instead of rendering
+    parts_dir = plan_path + ".parts"
+    os.makedirs(parts_dir, exist_ok=True)
+    plan_jobs = []
+    for job in jobs:
+        part_path = os.path.join(parts_dir, f"{job['id']}.jsonl")
+        plan_args = ["--plan-out", part_path, "--plan-key", render_plan.plan_key(job["blend"], root)]
+        plan_jobs.append(dict(job, args=job["args"] + plan_args, part=part_path))
+
+    print(f"Planning views for {len(plan_jobs)} files...")
+    results, _ = run_pool(plan_jobs, num_workers, 0, None)
+    failed = [r["blend"] for r in results if not r.get("ok")]
+    if failed:
+        raise RuntimeError(f"Planning failed for {len(failed)} files, see render_errors.log")
+
+    entries = []
+    for job in plan_jobs:
+        entries += render_plan.load_plan(job["part"])
+    render_plan.write_plan(plan_path, entries)
+    shutil.rmtree(parts_dir)
+    print(f"Wrote {len(entries)} planned views to {plan_path}")
+
+
+def shard_jobs(jobs, plan_path, shard, root):
+    # Keep the jobs with views in this shard and point them at a plan holding only those views
+    index, count = render_plan.parse_shard(shard)
+    entries = render_plan.shard_entries(render_plan.load_plan(plan_path), index, count)
+    shard_path = f"{os.path.splitext(plan_path)[0]}.shard-{index}-of-{count}.jsonl"
+    render_plan.write_plan(shard_path, entries)
+
+    by_key = {}
+    for entry in entries:
+        by_key.setdefault(entry["blend"], []).append(entry)
+    selected = []
+    for job in jobs:
+        key = render_plan.plan_key(job["blend"], root)
+        if key in by_key:
+            job["params"]["plan"] = render_plan.entries_hash(by_key[key])
+            job["args"] += ["--plan", shard_path, "--plan-key", key]
+            selected.append(job)
+    print(f"Shard {index}/{count}: {len(entries)} views from {len(selected)} files")
+    return selected
+
+
+def redo_jobs(jobs, failures_path, root):
+    # Keep the jobs with failed views and have them render only those views
+    failures = render_plan.load_failures(failures_path)
+    selected = []
+    for job in jobs:
+        key = render_plan.plan_key(job["blend"], root)
+        if key in failures:
+            job["args"] += ["--redo", failures_path, "--plan-key", key]
+            selected.append(job)
+    print(f"Re-rendering {sum(len(names) for names in failures.values())} failed views "
+          f"from {len(selected)} files listed in {failures_path}")
+    return selected
+
+
+def main():
+    # Setup logging to capture errors; here rather than at import, so importing this module writes no log file
+    logging.basicConfig(filename='render_errors.log', level=logging.ERROR)
+
+    parser = argparse.ArgumentParser(description='Batch-render *_xy.blend files with persistent Blender workers')
+    parser.add_argument('--root', default='.', help='Folder holding one sub-folder per vehicle class')
+    parser.add_argument('--workers', type=int, default=1, help='Number of Blender workers to run in parallel')
+    parser.add_argument('--max-jobs-per-worker', type=int, default=50,
+                        help='Restart a worker after this many jobs (0 = never)')
+    parser.add_argument('--max-worker-rss-mb', type=float, default=None,
+                        help='Restart a worker once its resident memory exceeds this many MB')
+    parser.add_argument('--memory-budget-mb', type=float, default=None,
+                        help='Start a job only when its learnt peak memory fits in this many MB across all workers '
+                             '(default: 90%% of the node\'s available memory, 0 = no limit)')
+    parser.add_argument('--history', default=None,
+                        help='Timing history file used to order jobs (default: <root>/render_history.json)')
+    parser.add_argument('--num-renders', type=int, default=30, help='Views per file (excluding the default view)')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Base seed for the per-file random streams (plans default to 0)')
+    parser.add_argument('--plan', default=None,
+                        help='Plan file of every view to render; generated first if it does not exist')
+    parser.add_argument('--replan', action='store_true', help='Regenerate the plan file even if it exists')
+    parser.add_argument('--shard', default=None,
+                        help='Render only shard i/N of the plan (implies --plan <root>/render_plan.jsonl)')
+    parser.add_argument('--animation', action='store_true',
+                        help='Render each file\'s views as one animation pass with persistent render data')
+    parser.add_argument('--async-writes', type=int, default=0, metavar='THREADS',
+                        help='Encode and write images on this many background threads per worker (0 = off)')
+    parser.add_argument('--output-format', choices=['PNG', 'WEBP', 'EXR'], default='PNG',
+                        help='Image format for --async-writes')
+    parser.add_argument('--screen-oversample', type=float, default=None, metavar='FACTOR',
+                        help='Screen FACTOR x --num-renders candidate poses with low-resolution previews '
+                             'and render only the best --num-renders')
+    parser.add_argument('--symmetric', action='store_true',
+                        help='Render one side of each symmetric vehicle and write the other as flipped images')
+    parser.add_argument('--lod', type=float, default=None, metavar='PIXELS',
+                        help='Render each view with the coarsest decimated level of detail whose projected error '
+                             'stays under PIXELS (e.g. 1.0)')
+    parser.add_argument('--lod-cache', default=None,
+                        help='Folder for decimated levels shared by all workers (default: one per output folder)')
+    parser.add_argument('--texture-levels', type=float, default=None, metavar='TEXELS',
+                        help='Bind downscaled textures giving TEXELS texels per pixel of the vehicle (e.g. 2.0)')
+    parser.add_argument('--texture-cache', default=None,
+                        help='Folder for downscaled textures (default: <root>/.texture_cache, shared by all workers)')
+    parser.add_argument('--tune-samples', type=float, default=None, metavar='NOISE',
+                        help='Tune sample settings per scene to this relative noise (e.g. 0.02) before rendering')
+    parser.add_argument('--view-cache', default=None,
+                        help='Folder for the per-view render cache shared by all workers (disabled if omitted)')
+    parser.add_argument('--view-cache-gb', type=float, default=20.0, help='Size limit of the view cache in GB')
+    parser.add_argument('--redo', default=None,
+                        help='Re-render only the views listed in a validate_renders.py failure list')
+    parser.add_argument('--manifest', default=None,
+                        help='Manifest of rendered outputs (default: <root>/render_manifest.json)')
+    parser.add_argument('--force', action='store_true', help='Re-render every file, even if up to date')
+    parser.add_argument('--dry-run', action='store_true', help='List what would be rendered and why, then exit')
+    parser.add_argument('--quiet', action='store_true', help='Drop the per-view progress lines of the class scripts')
+    parser.add_argument('--metrics-report', default=None,
+                        help='Per-class stage timing report (default: <root>/render_metrics_report.json)')
+    parser.add_argument('--prometheus', default=None,
+                        help='Also write the per-class stage metrics to this Prometheus textfile')
+    args = parser.parse_args()
+
+    planned = bool(args.plan or args.shard)
+    if planned and args.seed is None:
+        # Every node must draw the same poses, so plans are never unseeded
+        args.seed = 0
+    if args.output_format != 'PNG' and args.async_writes <= 0:
+        parser.error("--output-format needs --async-writes")
+    params = {"num_renders": args.num_renders, "seed": args.seed, "tune_noise": args.tune_samples}
+    if args.screen_oversample:
+        params["screen_oversample"] = args.screen_oversample
+    if args.output_format != 'PNG':
+        params["output_format"] = args.output_format
+    if args.symmetric:
+        params["symmetric"] = True
+    if args.lod is not None:
+        params["lod"] = True
+        params["lod_max_error_px"] = args.lod
+    if args.texture_levels is not None:
+        params["texture_levels"] = True
+        params["texture_texels_per_pixel"] = args.texture_levels
+    # Options that do not change the rendered images stay out of the manifest parameters
+    extra_args = ["--animation"] if args.animation else []
+    if args.async_writes > 0:
+        extra_args += ["--async-writes", str(args.async_writes)]
+    if args.lod_cache:
+        extra_args += ["--lod-cache", args.lod_cache]
+    if args.texture_levels is not None:
+        texture_cache = args.texture_cache or os.path.join(args.root, '.texture_cache')
+        extra_args += ["--texture-cache", os.path.abspath(texture_cache)]
+    if args.quiet:
+        extra_args.append("--quiet")
+    if args.view_cache:
+        extra_args += ["--view-cache", os.path.abspath(args.view_cache), "--view-cache-gb", str(args.view_cache_gb)]
+    jobs = find_jobs(args.root, params, extra_args)
+    if not jobs:
+        print("No *_xy.blend files found.")
+        return
+
+    if planned:
+        plan_path = os.path.abspath(args.plan or os.path.join(args.root, "render_plan.jsonl"))
+        if args.replan or not os.path.exists(plan_path):
+            make_plan(jobs, plan_path, args.root, max(args.workers, 1))
+        jobs = shard_jobs(jobs, plan_path, args.shard or "0/1", args.root)
+        if not jobs:
+            print("No views in this shard.")
+            return
+
+    # Skip jobs whose .blend, script and parameters match the last successful render
+    manifest = RenderManifest(args.manifest or os.path.join(args.root, "render_manifest.json"), args.root)
+    if args.redo:
+        jobs = redo_jobs(jobs, os.path.abspath(args.redo), args.root)
+    stale = []
+    for job in jobs:
+        # Failed views are re-rendered even when the manifest says the file is up to date
+        reasons = ["forced"] if args.force else ["failed views"] if args.redo else manifest.stale_reasons(job)
+        if reasons:
+            stale.append(job)
+            print(f"{'Would render' if args.dry_run else 'Will render'} {job['blend']}: {'; '.join(reasons)}")
+    print(f"{len(stale)} of {len(jobs)} files need rendering, {len(jobs) - len(stale)} up to date.")
+    if args.dry_run or not stale:
+        return
+    jobs = stale
+
+    history = RenderHistory(args.history or os.path.join(args.root, "render_history.json"), args.root)
+    budget_mb = args.memory_budget_mb
+    if budget_mb is None:
+        available = available_memory_mb()
+        budget_mb = available * MEMORY_BUDGET_FRACTION if available else None
+
+    start_time = time.time()
+    results, workers = run_pool(jobs, max(args.workers, 1), args.max_jobs_per_worker, args.max_worker_rss_mb,
+                                history=history, manifest=manifest, budget_mb=budget_mb)
+    wall_seconds = time.time() - start_time
+    print_summary(results, workers, wall_seconds)
+    metrics_report(results, wall_seconds, args.metrics_report or os.path.join(args.root, "render_metrics_report.json"),
+                   args.prometheus)
+    print("Rendering process completed.")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
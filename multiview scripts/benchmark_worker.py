@@ -0,0 +1,94 @@
+import bpy
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import sample_tuner
+
+# One benchmark render for render_benchmark.py.
+#
+#   blender --background --python benchmark_worker.py -- file.blend --engine CYCLES --samples 128 ...
+#
+# Opens the .blend (without modifying it), applies one combination of engine,
+# samples, denoiser, resolution and threads, renders the default camera view to
+# a float EXR and compares it with the reference render, if one is given, on the
+# vehicle's alpha-masked pixels. The result is printed as one prefixed JSON line.
+BENCH_MSG = "@@street2air-bench "
+
+argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+parser = argparse.ArgumentParser(prog="benchmark_worker.py")
+parser.add_argument("blend_file_path")
+parser.add_argument("--engine", choices=["CYCLES", "EEVEE", "WORKBENCH"], default="CYCLES")
+parser.add_argument("--samples", type=int, default=128)
+parser.add_argument("--denoise", action="store_true")
+parser.add_argument("--percent", type=int, default=100, help="Resolution percentage")
+parser.add_argument("--threads", type=int, default=0, help="Render threads (0 = automatic)")
+parser.add_argument("--out-dir", required=True)
+parser.add_argument("--name", required=True, help="Output file name, without extension")
+parser.add_argument("--reference", default=None, help="Reference EXR to score against")
+parser.add_argument("--keep", action="store_true", help="Keep the rendered EXR")
+args = parser.parse_args(argv)
+
+
+def engine_id(name):
+    # EEVEE is called BLENDER_EEVEE_NEXT from Blender 4.2
+    available = bpy.types.RenderSettings.bl_rna.properties['engine'].enum_items.keys()
+    if name == "EEVEE":
+        return 'BLENDER_EEVEE_NEXT' if 'BLENDER_EEVEE_NEXT' in available else 'BLENDER_EEVEE'
+    if name == "WORKBENCH":
+        return 'BLENDER_WORKBENCH'
+    return 'CYCLES'
+
+
+def load_reference(path):
+    image = bpy.data.images.load(path)
+    pixels = np.empty(image.size[0] * image.size[1] * 4, dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    bpy.data.images.remove(image)
+    return pixels.reshape(-1, 4)
+
+
+bpy.ops.wm.open_mainfile(filepath=args.blend_file_path)
+scene = bpy.context.scene
+render = scene.render
+render.engine = engine_id(args.engine)
+if render.engine == 'CYCLES':
+    scene.cycles.device = 'CPU'
+render.resolution_percentage = args.percent
+render.film_transparent = True  # The quality score is measured on the vehicle's alpha mask
+if args.threads > 0:
+    render.threads_mode = 'FIXED'
+    render.threads = args.threads
+else:
+    render.threads_mode = 'AUTO'
+if render.engine != 'BLENDER_WORKBENCH':
+    sample_tuner.apply_settings(scene, {"samples": args.samples, "denoise": args.denoise, "adaptive": True,
+                                       "time_limit": 0})
+render.image_settings.file_format = 'OPEN_EXR'
+render.image_settings.color_mode = 'RGBA'
+render.image_settings.color_depth = '32'
+
+os.makedirs(args.out_dir, exist_ok=True)
+pixels, seconds = sample_tuner.render_probe(scene, args.out_dir, args.name)
+result = {
+    "engine": render.engine,
+    "samples": args.samples,
+    "denoise": args.denoise,
+    "percent": args.percent,
+    "threads": args.threads,
+    "resolution": [int(render.resolution_x * args.percent / 100), int(render.resolution_y * args.percent / 100)],
+    "render_seconds": seconds,
+    "error": None
+}
+if args.reference:
+    reference = load_reference(args.reference)
+    if reference.shape == pixels.shape:
+        result["error"] = sample_tuner.relative_noise(pixels, reference)
+if not args.keep:
+    os.remove(os.path.join(args.out_dir, f"{args.name}.exr"))
+sys.stdout.write(BENCH_MSG + json.dumps(result) + "\n")
+sys.stdout.flush()
@@ -0,0 +1,79 @@
+import bpy
+from bpy_extras.object_utils import world_to_camera_view
+from mathutils import Vector
+
+# Analytic framing check for candidate camera poses, run before anything is rendered.
+#
+# The world-space bounding boxes of the vehicle's meshes are projected through
+# the camera at the candidate location (with its Track To constraint evaluated).
+# A pose is rejected when a corner falls behind the camera or outside the frame
+# (less --frame-margin), or when the projected box covers less than --min-fill
+# of the frame. Bounding boxes are slightly larger than the vehicle, so the
+# check errs on the side of rejecting poses that only just fit.
+
+
+def target_meshes(scene, camera, target=None):
+    # The tracked object and everything parented to it, else every renderable mesh
+    if target is None and camera.constraints and getattr(camera.constraints[0], "target", None):
+        target = camera.constraints[0].target
+    objects = [target, *target.children_recursive] if target is not None else list(scene.objects)
+    return [obj for obj in objects if obj.type == 'MESH' and not obj.hide_render]
+
+
+def world_corners(objects):
+    return [obj.matrix_world @ Vector(corner) for obj in objects for corner in obj.bound_box]
+
+
+class FramingCheck:
+    def __init__(self, scene, camera, target=None, min_fill=0.01, margin=0.0, max_attempts=20):
+        self.scene = scene
+        self.camera = camera
+        self.min_fill = min_fill
+        self.margin = margin
+        self.max_attempts = max_attempts
+        self.corners = world_corners(target_meshes(scene, camera, target))
+        self.accepted = 0
+        self.rejected = {}
+        self.exhausted = 0
+
+    def measure(self, location):
+        # (reason or None, fill ratio) for the camera at location
+        saved = self.camera.location.copy()
+        self.camera.location = location
+        bpy.context.view_layer.update()
+        try:
+            projected = [world_to_camera_view(self.scene, self.camera, corner) for corner in self.corners]
+        finally:
+            self.camera.location = saved
+            bpy.context.view_layer.update()
+        if any(point.z <= 0 for point in projected):
+            return "behind camera", 0.0
+        xs = [point.x for point in projected]
+        ys = [point.y for point in projected]
+        fill = (min(max(xs), 1.0) - max(min(xs), 0.0)) * (min(max(ys), 1.0) - max(min(ys), 0.0))
+        low, high = self.margin, 1.0 - self.margin
+        if min(xs) < low or max(xs) > high or min(ys) < low or max(ys) > high:
+            return "out of frame", max(fill, 0.0)
+        if fill < self.min_fill:
+            return "too small", fill
+        return None, fill
+
+    def accept(self, location):
+        if not self.corners:
+            return True  # Nothing to frame; leave the pose alone
+        reason, _ = self.measure(location)
+        if reason is None:
+            self.accepted += 1
+            return True
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        return False
+
+    def summary(self):
+        rejected = sum(self.rejected.values())
+        details = ", ".join(f"{count} {reason}" for reason, count in sorted(self.rejected.items()))
+        text = f"Framing check: {self.accepted} poses accepted, {rejected} rejected and redrawn"
+        if details:
+            text += f" ({details})"
+        if self.exhausted:
+            text += f", {self.exhausted} kept after {self.max_attempts} failed attempts"
+        return text
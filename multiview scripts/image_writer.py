@@ -0,0 +1,176 @@
+import bpy
+import os
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Background image writer for the render_*.py class scripts.
+#
+# Instead of `bpy.ops.render.render(write_still=True)`, which encodes and
+# writes each image before the next view can start, the render loop renders
+# without writing, copies the float pixels from a compositor Viewer node and
+# hands them to a small thread pool that encodes PNG (zlib releases the GIL),
+# lossless WebP or EXR. A bounded number of frames may be in flight; submit()
+# blocks when the queue is full. Files are written to a temporary name,
+# fsynced and renamed, so a file exists only once it is complete.
+#
+# The display transform is reproduced for the 'Standard' view transform only
+# (exposure, gamma, sRGB curve); any other view transform or look keeps the
+# synchronous Blender writer so colours never change.
+
+EXTENSIONS = {"PNG": ".png", "WEBP": ".webp", "EXR": ".exr"}
+
+
+def supports(scene):
+    view = scene.view_settings
+    return view.view_transform == 'Standard' and view.look in ('None', 'Standard')
+
+
+def setup_viewer(scene):
+    # Route the final composite into a Viewer node so its pixels can be read back
+    scene.use_nodes = True
+    tree = scene.node_tree
+    composite = next((node for node in tree.nodes if node.type == 'COMPOSITE'), None)
+    if composite is None:
+        layers = tree.nodes.new('CompositorNodeRLayers')
+        composite = tree.nodes.new('CompositorNodeComposite')
+        tree.links.new(layers.outputs['Image'], composite.inputs['Image'])
+    if not composite.inputs['Image'].links:
+        layers = next((node for node in tree.nodes if node.type == 'R_LAYERS'), None) \
+            or tree.nodes.new('CompositorNodeRLayers')
+        tree.links.new(layers.outputs['Image'], composite.inputs['Image'])
+    viewer = next((node for node in tree.nodes if node.type == 'VIEWER'), None) \
+        or tree.nodes.new('CompositorNodeViewer')
+    if hasattr(viewer, "use_alpha"):
+        viewer.use_alpha = True
+    tree.links.new(composite.inputs['Image'].links[0].from_socket, viewer.inputs['Image'])
+
+
+def grab_pixels():
+    # Copy the last composite out of Blender (main thread only); rows are bottom-up, premultiplied
+    viewer = bpy.data.images['Viewer Node']
+    width, height = viewer.size
+    pixels = np.empty(width * height * 4, dtype=np.float32)
+    viewer.pixels.foreach_get(pixels)
+    return pixels.reshape(height, width, 4)
+
+
+def to_display(pixels, exposure, gamma):
+    # Linear premultiplied float -> straight-alpha sRGB in [0, 1], top row first
+    rgba = pixels[::-1].copy()
+    alpha = rgba[..., 3:4]
+    np.divide(rgba[..., :3], alpha, out=rgba[..., :3], where=alpha > 0)
+    rgb = np.clip(rgba[..., :3] * (2.0 ** exposure), 0.0, None)
+    rgb = np.where(rgb <= 0.0031308, rgb * 12.92, 1.055 * np.power(rgb, 1 / 2.4) - 0.055)
+    if gamma != 1.0:
+        rgb = np.power(np.clip(rgb, 0.0, 1.0), 1.0 / gamma)
+    rgba[..., :3] = rgb
+    return np.clip(rgba, 0.0, 1.0)
+
+
+def png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+
+
+def encode_png(rgba8, level):
+    # 8-bit RGBA PNG with the 'Up' filter on every row
+    height, width, _ = rgba8.shape
+    filtered = np.empty((height, width * 4 + 1), dtype=np.uint8)
+    filtered[:, 0] = 2
+    rows = rgba8.reshape(height, width * 4)
+    filtered[0, 1:] = rows[0]
+    filtered[1:, 1:] = rows[1:] - rows[:-1]
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + png_chunk(b"IHDR", header)
+            + png_chunk(b"IDAT", zlib.compress(filtered.tobytes(), level)) + png_chunk(b"IEND", b""))
+
+
+def write_oiio(path, pixels, file_format):
+    import OpenImageIO as oiio
+    spec = oiio.ImageSpec(pixels.shape[1], pixels.shape[0], 4, "float" if file_format == "EXR" else "uint8")
+    if file_format == "WEBP":
+        spec.attribute("compression", "lossless")
+    output = oiio.ImageOutput.create(path)
+    if output is None:
+        raise RuntimeError(f"OpenImageIO cannot write {path}")
+    output.open(path, spec)
+    output.write_image(pixels)
+    output.close()
+
+
+def write_webp(path, rgba8):
+    try:
+        from PIL import Image
+    except ImportError:
+        write_oiio(path, rgba8, "WEBP")
+        return
+    Image.fromarray(rgba8, "RGBA").save(path, format="WEBP", lossless=True)
+
+
+class AsyncImageWriter:
+    def __init__(self, threads=2, max_pending=4, file_format="PNG", compression=15, exposure=0.0, gamma=1.0,
+                 verbose=True):
+        self.file_format = file_format
+        self.verbose = verbose
+        self.level = max(0, min(9, round(compression * 9 / 100)))
+        self.exposure = exposure
+        self.gamma = gamma
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="image_writer")
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.futures = []
+        self.errors = []
+        self.seconds = {}  # Encode and write time per output path
+
+    def output_path(self, filepath):
+        return os.path.splitext(filepath)[0] + EXTENSIONS[self.file_format]
+
+    def submit(self, filepath, on_written=None):
+        # Blocks while max_pending frames are still being encoded (backpressure on the render loop)
+        pixels = grab_pixels()
+        self.slots.acquire()
+        future = self.pool.submit(self._write, pixels, self.output_path(filepath), on_written)
+        self.futures.append(future)
+        return future
+
+    def _write(self, pixels, path, on_written):
+        start_time = time.time()
+        try:
+            # Keep the extension on the temporary name; OpenImageIO picks the format from it
+            root, extension = os.path.splitext(path)
+            tmp_path = f"{root}.tmp{extension}"
+            if self.file_format == "EXR":
+                write_oiio(tmp_path, np.ascontiguousarray(pixels[::-1]), "EXR")
+            else:
+                rgba8 = (to_display(pixels, self.exposure, self.gamma) * 255.0 + 0.5).astype(np.uint8)
+                if self.file_format == "PNG":
+                    with open(tmp_path, "wb") as f:
+                        f.write(encode_png(rgba8, self.level))
+                else:
+                    write_webp(tmp_path, rgba8)
+            with open(tmp_path, "rb+") as f:
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            self.seconds[path] = time.time() - start_time
+            if os.path.exists(path):
+                if self.verbose:
+                    print(f"Saved image: {path}")
+            else:
+                print(f"Failed to save image: {path}")
+            if on_written is not None:
+                on_written(path)
+        except Exception as e:
+            self.errors.append((path, e))
+            print(f"Failed to save image: {path} ({e})")
+        finally:
+            self.slots.release()
+
+    def close(self):
+        # Wait until every queued image is on disk
+        for future in self.futures:
+            future.result()
+        self.futures = []
+        self.pool.shutdown(wait=True)
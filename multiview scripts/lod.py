@@ -0,0 +1,182 @@
+import bpy
+import json
+import math
+import os
+import time
+
+import numpy as np
+from mathutils import Vector
+from mathutils.bvhtree import BVHTree
+
+import framing
+
+# Distance-based level of detail for the render_*.py class scripts.
+#
+# Every mesh of the vehicle gets decimated copies (Decimate modifier, collapse)
+# at a few face ratios. Each level's geometric error is the largest distance
+# from a sample of the full mesh's vertices to the decimated surface, in the
+# mesh's own units. Per view the error is projected to pixels at the vehicle's
+# nearest depth (or through the orthographic scale) and the coarsest level
+# whose error stays under the pixel threshold is swapped in as the objects'
+# mesh data. The objects' own modifiers still apply on top.
+#
+# Levels are cached as a .blend of meshes plus a JSON of their errors, keyed on
+# the scene's content hash and the ratios, so each asset is decimated once.
+
+# Bump when levels are built differently, so cached levels are rebuilt
+LOD_VERSION = 1
+
+# Full-mesh vertices sampled for the error of each level
+ERROR_SAMPLES = 20000
+
+
+def mesh_arrays(mesh):
+    vertices = np.empty(len(mesh.vertices) * 3, dtype=np.float64)
+    mesh.vertices.foreach_get("co", vertices)
+    return vertices.reshape(-1, 3)
+
+
+def decimate(mesh, ratio, name):
+    # Decimated copy of mesh, built on a temporary object so the real object's modifiers stay out of it
+    temp = bpy.data.objects.new("street2air_lod", mesh)
+    bpy.context.scene.collection.objects.link(temp)
+    try:
+        modifier = temp.modifiers.new("lod", 'DECIMATE')
+        modifier.decimate_type = 'COLLAPSE'
+        modifier.ratio = ratio
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        decimated = bpy.data.meshes.new_from_object(temp.evaluated_get(depsgraph), preserve_all_data_layers=True,
+                                                    depsgraph=depsgraph)
+    finally:
+        bpy.data.objects.remove(temp, do_unlink=True)
+    decimated.name = name
+    return decimated
+
+
+def share_materials(full, decimated):
+    # The levels use the full mesh's materials, never copies of them
+    decimated.materials.clear()
+    for material in full.materials:
+        decimated.materials.append(material)
+
+
+def surface_error(full, decimated):
+    # Largest distance from sampled full-mesh vertices to the decimated surface
+    vertices = mesh_arrays(full)
+    if len(vertices) > ERROR_SAMPLES:
+        vertices = vertices[np.random.default_rng(0).choice(len(vertices), ERROR_SAMPLES, replace=False)]
+    polygons = [tuple(polygon.vertices) for polygon in decimated.polygons]
+    if not polygons:
+        return math.inf
+    tree = BVHTree.FromPolygons([tuple(co) for co in mesh_arrays(decimated)], polygons)
+    error = 0.0
+    for co in vertices:
+        nearest = tree.find_nearest(co)
+        if nearest[0] is not None:
+            error = max(error, nearest[3])
+    return error
+
+
+class LodSet:
+    """Detail levels of a set of mesh objects; level 0 is the full mesh."""
+
+    def __init__(self, objects, ratios, cache_dir=None, scene_hash=None):
+        self.objects = objects
+        self.full = {obj: obj.data for obj in objects}
+        meshes = list(dict.fromkeys(self.full.values()))
+        self.ratios = [1.0] + sorted((ratio for ratio in ratios if 0 < ratio < 1), reverse=True)
+        # levels[n][mesh name] = (mesh, error in mesh units)
+        self.levels = [{mesh.name: (mesh, 0.0) for mesh in meshes}]
+        self.build_seconds = 0.0
+        self.cached = False
+        start_time = time.time()
+        key = f"{scene_hash}-{'-'.join(f'{ratio:g}' for ratio in self.ratios)}-v{LOD_VERSION}" if scene_hash else None
+        if not (cache_dir and key and self.load(cache_dir, key, meshes)):
+            for n, ratio in enumerate(self.ratios[1:], start=1):
+                level = {}
+                for mesh in meshes:
+                    decimated = decimate(mesh, ratio, f"{mesh.name}__lod{n}")
+                    share_materials(mesh, decimated)
+                    level[mesh.name] = (decimated, surface_error(mesh, decimated))
+                self.levels.append(level)
+            if cache_dir and key:
+                self.save(cache_dir, key)
+        self.build_seconds = time.time() - start_time
+        self.polygons = [sum(len(level[obj.data.name][0].polygons) for obj in objects) for level in self.levels]
+        self.current = 0
+
+    def load(self, cache_dir, key, meshes):
+        meta_path = os.path.join(cache_dir, key + ".json")
+        library_path = os.path.join(cache_dir, key + ".blend")
+        if not (os.path.exists(meta_path) and os.path.exists(library_path)):
+            return False
+        with open(meta_path) as f:
+            meta = json.load(f)
+        names = {name for level in meta["levels"] for name, _ in level.values()}
+        with bpy.data.libraries.load(library_path) as (data_from, data_to):
+            data_to.meshes = [name for name in data_from.meshes if name in names]
+        loaded = {mesh.name: mesh for mesh in data_to.meshes if mesh is not None}
+        for level in meta["levels"]:
+            self.levels.append({mesh.name: (loaded[level[mesh.name][0]], level[mesh.name][1]) for mesh in meshes
+                                if mesh.name in level and level[mesh.name][0] in loaded})
+            for mesh in meshes:
+                if mesh.name in self.levels[-1]:
+                    share_materials(mesh, self.levels[-1][mesh.name][0])
+        self.cached = all(len(level) == len(meshes) for level in self.levels)
+        if not self.cached:
+            del self.levels[1:]
+        return self.cached
+
+    def save(self, cache_dir, key):
+        os.makedirs(cache_dir, exist_ok=True)
+        library_path = os.path.join(cache_dir, key + ".blend")
+        decimated = {mesh for level in self.levels[1:] for mesh, _ in level.values()}
+        # Without materials, so the library does not carry a copy of every texture
+        for mesh in decimated:
+            mesh.materials.clear()
+        try:
+            bpy.data.libraries.write(library_path + ".tmp", decimated, fake_user=True)
+        finally:
+            for level in self.levels[1:]:
+                for name, (mesh, _) in level.items():
+                    share_materials(self.levels[0][name][0], mesh)
+        os.replace(library_path + ".tmp", library_path)
+        with open(os.path.join(cache_dir, key + ".json"), "w") as f:
+            json.dump({"ratios": self.ratios, "levels": [{name: [mesh.name, error] for name, (mesh, error) in level.items()}
+                                                         for level in self.levels[1:]]}, f, indent=2)
+
+    def error_world(self, n):
+        # Largest error of level n over the objects, scaled into world units
+        return max(self.levels[n][self.full[obj].name][1] * max(obj.matrix_world.to_scale()) for obj in self.objects)
+
+    def pixels_per_metre(self, scene, camera):
+        # At the nearest point of the objects' bounding sphere
+        render = scene.render
+        size = max(render.resolution_x, render.resolution_y) * render.resolution_percentage / 100
+        data = camera.data
+        if data.type == 'ORTHO':
+            return size / data.ortho_scale
+        corners = framing.world_corners(self.objects)
+        center = sum(corners, Vector()) / len(corners)
+        radius = max((corner - center).length for corner in corners)
+        depth = max((center - camera.matrix_world.translation).length - radius, data.clip_start)
+        sensor = data.sensor_height if data.sensor_fit == 'VERTICAL' else data.sensor_width
+        return data.lens / sensor * size / depth
+
+    def select(self, scene, camera, max_error_px):
+        # Coarsest level whose projected error stays under max_error_px
+        scale = self.pixels_per_metre(scene, camera)
+        chosen = 0
+        for n in range(1, len(self.levels)):
+            if self.error_world(n) * scale <= max_error_px:
+                chosen = n
+        return chosen
+
+    def apply(self, n):
+        if n != self.current:
+            for obj in self.objects:
+                obj.data = self.levels[n][self.full[obj].name][0]
+            self.current = n
+
+    def restore(self):
+        self.apply(0)
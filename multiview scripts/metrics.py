@@ -0,0 +1,246 @@
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+
+# Per-stage timing and render statistics for the render_*.py class scripts.
+#
+# Each run records how long every file-level stage took (opening the .blend,
+# planning poses, preview screening, sample tuning, rendering the views) and,
+# per view, the scene update, view cache lookup, render and image write. While
+# Blender renders, its render stats line ("Mem:.. (Peak ..) | .. | Synchronizing
+# object", ".. | Sample 12/128") is fed to RenderStats, which keeps the peak
+# memory and splits the render time into sync, BVH build, path tracing and
+# denoising.
+#
+# Records go to <name>_renders/render_metrics.jsonl (one line per view, then
+# one for the file) and optionally to a Prometheus textfile. batch_render.py
+# rolls the files of a batch up into one report.
+#
+# This module does not import bpy, like render_plan.py.
+
+METRICS_NAME = "render_metrics.jsonl"
+
+PEAK_RE = re.compile(r"Peak[:\s]+([\d.]+)([KMG])")
+MEM_RE = re.compile(r"Mem:\s*([\d.]+)([KMG])")
+UNIT_MB = {"K": 1 / 1024.0, "M": 1.0, "G": 1024.0}
+
+# Render stats status text -> phase, first match wins
+PHASES = [
+    ("denoise", ("Denois",)),
+    ("path_tracing", ("Sample", "Path Tracing", "Rendering", "Tile")),
+    ("bvh", ("BVH",)),
+    ("sync", ("Synchroniz", "Loading", "Updating", "Building", "Compiling", "Initializing", "Preparing")),
+]
+
+PROMETHEUS_HELP = {
+    "street2air_stage_seconds_total": "Seconds spent in each render stage",
+    "street2air_views_total": "Views rendered",
+    "street2air_render_phase_seconds_total": "Render time split by Blender render phase",
+    "street2air_render_peak_memory_bytes": "Peak render memory reported by Blender",
+    "street2air_process_peak_rss_bytes": "Peak resident memory of the Blender process",
+}
+
+
+def parse_render_stats(text):
+    # {"mem_mb", "peak_mb", "phase"} from one render stats line
+    peaks = [float(value) * UNIT_MB[unit] for value, unit in PEAK_RE.findall(text)]
+    memory = MEM_RE.search(text)
+    status = text.split("|")[-2:]
+    phase = "other"
+    for name, markers in PHASES:
+        if any(marker in part for part in status for marker in markers):
+            phase = name
+            break
+    return {
+        "mem_mb": float(memory.group(1)) * UNIT_MB[memory.group(2)] if memory else None,
+        "peak_mb": max(peaks) if peaks else None,
+        "phase": phase,
+    }
+
+
+class RenderStats:
+    # Render phases timed from the spacing of Blender's render stats updates
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.phases = {}
+        self.peak_mb = 0.0
+        self.last = None
+
+    def feed(self, text, now=None):
+        now = time.monotonic() if now is None else now
+        self._close(now)
+        stats = parse_render_stats(text)
+        self.peak_mb = max(self.peak_mb, stats["peak_mb"] or stats["mem_mb"] or 0.0)
+        self.last = (stats["phase"], now)
+
+    def _close(self, now):
+        if self.last is not None:
+            phase, since = self.last
+            self.phases[phase] = self.phases.get(phase, 0.0) + now - since
+
+    def finish(self, now=None):
+        # Stats since the last reset; the last phase runs until now
+        self._close(time.monotonic() if now is None else now)
+        result = {f"{phase}_seconds": seconds for phase, seconds in sorted(self.phases.items())}
+        if self.peak_mb:
+            result["peak_mb"] = self.peak_mb
+        self.reset()
+        return result
+
+
+class MetricsRecorder:
+    """Stage timings of one class script run; written once the views are rendered."""
+
+    def __init__(self, blend):
+        self.blend = blend
+        self.started = time.time()
+        self.stages = {}
+        self.views = []
+        self.view = None
+        self.last_stage_end = time.monotonic()
+        self.render_stats = RenderStats()
+
+    @contextmanager
+    def stage(self, name):
+        # Time a block as a stage of the current view, or of the file when no view is open
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(name, time.monotonic() - start)
+
+    def add(self, name, seconds):
+        stages = self.view["stages"] if self.view is not None else self.stages
+        stages[name] = stages.get(name, 0.0) + seconds
+        self.last_stage_end = time.monotonic()
+
+    def since_last_stage(self, name):
+        # Record the time since the previous stage ended, e.g. planning between loading and rendering
+        self.add(name, time.monotonic() - self.last_stage_end)
+
+    def begin_view(self, index, name):
+        self.render_stats.reset()
+        self.view = {"event": "view", "view": index, "name": name, "stages": {}}
+
+    def end_view(self, **extra):
+        self.view.update(extra)
+        stats = self.render_stats.finish()
+        if stats:
+            self.view["render_stats"] = stats
+        self.views.append(self.view)
+        self.view = None
+
+    def discard_view(self):
+        self.render_stats.reset()
+        self.view = None
+
+    def add_write_seconds(self, seconds_by_name):
+        # Background encode and write time reported by an AsyncImageWriter
+        for view in self.views:
+            if view["name"] in seconds_by_name:
+                view["stages"]["write_async"] = seconds_by_name[view["name"]]
+
+    def file_record(self, **extra):
+        totals = {}
+        peak_mb = 0.0
+        for view in self.views:
+            for name, seconds in view["stages"].items():
+                totals[name] = totals.get(name, 0.0) + seconds
+            for name, value in view.get("render_stats", {}).items():
+                if name == "peak_mb":
+                    peak_mb = max(peak_mb, value)
+                else:
+                    totals[f"render_{name}"] = totals.get(f"render_{name}", 0.0) + value
+        record = {
+            "event": "file",
+            "blend": self.blend,
+            "started": self.started,
+            "stages": self.stages,
+            "view_stages": totals,
+            "views": len(self.views),
+        }
+        if peak_mb:
+            record["peak_mb"] = peak_mb
+        record.update(extra)
+        return record
+
+    def write(self, path, prometheus_path=None, **extra):
+        record = self.file_record(**extra)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            for view in self.views:
+                f.write(json.dumps(view) + "\n")
+            f.write(json.dumps(record) + "\n")
+        os.replace(tmp_path, path)
+        if prometheus_path:
+            write_prometheus(prometheus_path, prometheus_samples([record], {"blend": os.path.basename(self.blend)}))
+        return record
+
+
+def load_metrics(path):
+    # (file record, view records) of a render_metrics.jsonl; the file record is None for a partial run
+    file_record, views = None, []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                if record.get("event") == "file":
+                    file_record = record
+                else:
+                    views.append(record)
+    return file_record, views
+
+
+def rollup(records):
+    # Sum the file records of a batch: stage seconds, views, render phases, highest peak memory and RSS
+    total = {"files": 0, "views": 0, "stages": {}, "view_stages": {}}
+    for record in records:
+        total["files"] += 1
+        total["views"] += record.get("views", 0)
+        for key in ("stages", "view_stages"):
+            for name, seconds in record.get(key, {}).items():
+                total[key][name] = total[key].get(name, 0.0) + seconds
+        for key in ("peak_mb", "peak_rss_mb"):
+            if record.get(key):
+                total[key] = max(total.get(key, 0.0), record[key])
+    return total
+
+
+def prometheus_samples(records, labels):
+    # (metric, labels, value) lines for the file records (or rollups) in records
+    samples = []
+    for record in records:
+        for key in ("stages", "view_stages"):
+            for name, seconds in sorted(record.get(key, {}).items()):
+                if name.startswith("render_") and name.endswith("_seconds"):
+                    phase = name[len("render_"):-len("_seconds")]
+                    samples.append(("street2air_render_phase_seconds_total", dict(labels, phase=phase), seconds))
+                else:
+                    samples.append(("street2air_stage_seconds_total", dict(labels, stage=name), seconds))
+        samples.append(("street2air_views_total", dict(labels), record.get("views", 0)))
+        if record.get("peak_mb"):
+            samples.append(("street2air_render_peak_memory_bytes", dict(labels), record["peak_mb"] * 1024 * 1024))
+        if record.get("peak_rss_mb"):
+            samples.append(("street2air_process_peak_rss_bytes", dict(labels), record["peak_rss_mb"] * 1024 * 1024))
+    return samples
+
+
+def write_prometheus(path, samples):
+    # Prometheus textfile collector format, replaced atomically so a scrape never sees half a file
+    lines = []
+    for metric in sorted({sample[0] for sample in samples}):
+        lines.append(f"# HELP {metric} {PROMETHEUS_HELP[metric]}")
+        lines.append(f"# TYPE {metric} {'gauge' if metric.endswith('_bytes') else 'counter'}")
+        for name, labels, value in samples:
+            if name == metric:
+                label_text = ",".join(f'{key}="{str(label).replace(chr(34), chr(39))}"'
+                                      for key, label in sorted(labels.items()))
+                lines.append(f"{metric}{{{label_text}}} {value:.6g}")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
@@ -0,0 +1,122 @@
+import bpy
+import math
+
+import numpy as np
+from bpy_extras.object_utils import world_to_camera_view
+from mathutils import Vector
+
+import image_writer
+
+# 2D warps standing in for renders under a top-down camera, for rotate_and_render.py.
+#
+# With an orthographic camera looking straight down, moving the car on the
+# ground plane only shifts the image and spinning it about Z only rotates the
+# image about the car's pivot. With a perspective camera looking straight down
+# the rotation is still exact for a pivot on the optical axis, but moves are
+# not (parallax). Lights and shadows do not follow the car, so whether a warp
+# really matches a render depends on the scene: rotate_and_render.py renders a
+# few of the warped views for real and compares them before trusting the warps.
+#
+# Warps map pixel centres back into the source image and sample it bilinearly,
+# with premultiplied alpha so edges do not pick up the background colour.
+# Integer shifts and quarter turns reproduce the source pixels exactly.
+
+
+def view_direction(camera):
+    return camera.matrix_world.to_quaternion() @ Vector((0.0, 0.0, -1.0))
+
+
+def is_nadir(camera, tolerance_deg=1.0):
+    # Camera looking straight down to within tolerance_deg
+    return view_direction(camera).z <= -math.cos(math.radians(tolerance_deg))
+
+
+def render_size(scene):
+    render = scene.render
+    return (int(render.resolution_x * render.resolution_percentage / 100),
+            int(render.resolution_y * render.resolution_percentage / 100))
+
+
+def to_pixels(scene, camera, point):
+    # Pixel position (column, row from the top) of a world point
+    width, height = render_size(scene)
+    projected = world_to_camera_view(scene, camera, Vector(point))
+    return np.array([projected.x * width, (1.0 - projected.y) * height])
+
+
+def ground_mapping(scene, camera, pivot):
+    """(A, pivot pixel): A maps a world XY step at the pivot's height to a pixel step."""
+    pivot = Vector(pivot)
+    origin = to_pixels(scene, camera, pivot)
+    columns = [to_pixels(scene, camera, pivot + Vector(step)) - origin for step in ((1, 0, 0), (0, 1, 0))]
+    return np.column_stack(columns), origin
+
+
+def on_axis(scene, camera, pivot, tolerance_px=0.5):
+    # Whether the pivot projects onto the image centre (the optical axis, without lens shift)
+    width, height = render_size(scene)
+    return bool(np.linalg.norm(to_pixels(scene, camera, pivot) - np.array([width / 2, height / 2])) <= tolerance_px)
+
+
+def image_warp(mapping, angle_deg, translation=(0.0, 0.0)):
+    """(matrix, shift) such that a pixel u of the source moves to matrix @ (u - pivot) + pivot + shift."""
+    a, _ = mapping
+    angle = math.radians(angle_deg)
+    rotation = np.array([[math.cos(angle), -math.sin(angle)], [math.sin(angle), math.cos(angle)]])
+    return a @ rotation @ np.linalg.inv(a), a @ np.asarray(translation, dtype=float)
+
+
+def warp_rgba(image, mapping, matrix, shift):
+    # image is straight-alpha RGBA in [0, 1], top row first
+    height, width, _ = image.shape
+    _, pivot = mapping
+    premultiplied = image.copy()
+    premultiplied[..., :3] *= image[..., 3:4]
+    padded = np.pad(premultiplied, ((1, 1), (1, 1), (0, 0)))  # Transparent outside the frame
+
+    inverse = np.linalg.inv(matrix)
+    columns, rows = np.meshgrid(np.arange(width) + 0.5, np.arange(height) + 0.5)
+    dx = columns - pivot[0] - shift[0]
+    dy = rows - pivot[1] - shift[1]
+    source_x = inverse[0, 0] * dx + inverse[0, 1] * dy + pivot[0] - 0.5
+    source_y = inverse[1, 0] * dx + inverse[1, 1] * dy + pivot[1] - 0.5
+    # Snap coordinates within rounding error of a pixel centre, so exact warps stay exact
+    source_x = np.where(np.abs(source_x - np.round(source_x)) < 1e-6, np.round(source_x), source_x)
+    source_y = np.where(np.abs(source_y - np.round(source_y)) < 1e-6, np.round(source_y), source_y)
+    x0 = np.floor(source_x)
+    y0 = np.floor(source_y)
+    fx = (source_x - x0)[..., None]
+    fy = (source_y - y0)[..., None]
+
+    def sample(x, y):
+        return padded[np.clip(y, -1, height).astype(int) + 1, np.clip(x, -1, width).astype(int) + 1]
+
+    result = ((1 - fx) * (1 - fy) * sample(x0, y0) + fx * (1 - fy) * sample(x0 + 1, y0)
+              + (1 - fx) * fy * sample(x0, y0 + 1) + fx * fy * sample(x0 + 1, y0 + 1))
+    alpha = result[..., 3:4]
+    np.divide(result[..., :3], alpha, out=result[..., :3], where=alpha > 0)
+    return np.clip(result, 0.0, 1.0)
+
+
+def touches_edge(image):
+    # A warp cannot bring back what the source render cut off
+    mask = image[..., 3] > 0
+    return bool(mask[0].any() or mask[-1].any() or mask[:, 0].any() or mask[:, -1].any())
+
+
+def load_rgba(path):
+    # Straight-alpha RGBA in [0, 1], top row first
+    image = bpy.data.images.load(path)
+    try:
+        width, height = image.size
+        pixels = np.empty(width * height * 4, dtype=np.float32)
+        image.pixels.foreach_get(pixels)
+    finally:
+        bpy.data.images.remove(image)
+    return pixels.reshape(height, width, 4)[::-1]
+
+
+def save_png(path, rgba, compression=15):
+    level = max(0, min(9, round(compression * 9 / 100)))
+    with open(path, "wb") as f:
+        f.write(image_writer.encode_png((np.clip(rgba, 0.0, 1.0) * 255.0 + 0.5).astype(np.uint8), level))
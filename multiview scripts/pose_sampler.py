@@ -0,0 +1,123 @@
+import math
+
+# Coverage-driven camera pose sampling for the render_*.py class scripts.
+#
+# Candidate poses come from a randomly shifted Halton sequence over azimuth,
+# height and distance around the vehicle, which fills the space evenly instead
+# of clumping like independent uniform draws. Views are then picked from the
+# candidates by farthest-point sampling on viewing direction (and distance).
+#
+# Coverage is the fraction of reference directions (a Fibonacci lattice over the
+# band of elevations the poses can reach) that lie within `radius_deg` of some
+# view. It is used to report how well a set of views covers the vehicle and to
+# stop adding views once a target is reached.
+#
+# This module does not import bpy, like render_plan.py.
+
+HALTON_BASES = (2, 3, 5)
+REFERENCE_POINTS = 2000
+
+
+def halton(index, base):
+    result, fraction = 0.0, 1.0
+    while index > 0:
+        fraction /= base
+        result += fraction * (index % base)
+        index //= base
+    return result
+
+
+def candidate_poses(center, distance_range, height_range, count, rng):
+    # count (x, y, z) locations; the random shift makes each file's sequence different but seeded
+    shifts = [rng.random() for _ in HALTON_BASES]
+    poses = []
+    for n in range(1, count + 1):
+        u, v, w = ((halton(n, base) + shift) % 1.0 for base, shift in zip(HALTON_BASES, shifts))
+        azimuth = 2 * math.pi * u
+        z = height_range[0] + v * (height_range[1] - height_range[0])
+        distance = distance_range[0] + w * (distance_range[1] - distance_range[0])
+        poses.append((center[0] + distance * math.cos(azimuth), center[1] + distance * math.sin(azimuth), z))
+    return poses
+
+
+def direction(location, center):
+    dx, dy, dz = (location[i] - center[i] for i in range(3))
+    length = math.sqrt(dx * dx + dy * dy + dz * dz) or 1.0
+    return dx / length, dy / length, dz / length
+
+
+def angle_between(a, b):
+    return math.acos(max(-1.0, min(1.0, a[0] * b[0] + a[1] * b[1] + a[2] * b[2])))
+
+
+def elevation_band(center, distance_range, height_range):
+    # Lowest and highest elevation (radians) the pose ranges can reach
+    elevations = [math.atan2(z - center[2], d) for z in height_range for d in distance_range if d > 0]
+    return min(elevations), max(elevations)
+
+
+def reference_directions(band):
+    # Fibonacci lattice on the sphere, kept inside the elevation band
+    low, high = math.sin(band[0]), math.sin(band[1])
+    golden = math.pi * (3 - math.sqrt(5))
+    points = []
+    for n in range(REFERENCE_POINTS):
+        z = low + (high - low) * (n + 0.5) / REFERENCE_POINTS
+        ring = math.sqrt(max(0.0, 1 - z * z))
+        points.append((ring * math.cos(golden * n), ring * math.sin(golden * n), z))
+    return points
+
+
+class CoverageTracker:
+    # Reference directions covered so far; adding a view costs one pass over the reference set
+    def __init__(self, center, band, radius_deg=15.0):
+        self.center = center
+        self.cos_radius = math.cos(math.radians(radius_deg))
+        self.reference = reference_directions(band)
+        self.covered = [False] * len(self.reference)
+
+    def add(self, location):
+        view = direction(location, self.center)
+        for n, point in enumerate(self.reference):
+            if not self.covered[n] and point[0] * view[0] + point[1] * view[1] + point[2] * view[2] >= self.cos_radius:
+                self.covered[n] = True
+
+    def value(self):
+        return sum(self.covered) / len(self.covered)
+
+
+def coverage(locations, center, band, radius_deg=15.0):
+    """Fraction of the reachable viewing directions within radius_deg of one of the views."""
+    tracker = CoverageTracker(center, band, radius_deg)
+    for location in locations:
+        tracker.add(location)
+    return tracker.value()
+
+
+def select_poses(candidates, center, distance_range, band, count=None, target=None, radius_deg=15.0):
+    """Farthest-point selection of count poses, or of the fewest poses reaching coverage target.
+
+    Returns (poses, coverage). Distance differences count as up to 0.5 rad of separation.
+    """
+    if not candidates:
+        return [], 0.0
+    span = max(distance_range[1] - distance_range[0], 1e-9)
+    directions = [direction(candidate, center) for candidate in candidates]
+    distances = [math.dist(candidate[:2], center[:2]) / span for candidate in candidates]
+
+    def separation(i, j):
+        return angle_between(directions[i], directions[j]) + 0.5 * abs(distances[i] - distances[j])
+
+    tracker = CoverageTracker(center, band, radius_deg)
+    chosen = [0]
+    tracker.add(candidates[0])
+    nearest = [separation(0, j) for j in range(len(candidates))]
+    limit = len(candidates) if count is None else min(count, len(candidates))
+    while len(chosen) < limit and (target is None or tracker.value() < target):
+        best = max(range(len(candidates)), key=lambda j: nearest[j])
+        if nearest[best] <= 0:
+            break
+        chosen.append(best)
+        tracker.add(candidates[best])
+        nearest = [min(nearest[j], separation(best, j)) for j in range(len(candidates))]
+    return [candidates[i] for i in chosen], tracker.value()
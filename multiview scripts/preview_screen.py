@@ -0,0 +1,170 @@
+import bpy
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import framing
+
+# Low-resolution preview screening for the render_*.py class scripts.
+#
+# Every candidate pose is first rendered as a small Workbench thumbnail with a
+# transparent background. Thumbnails are scored on the vehicle's silhouette
+# (alpha coverage, whether it touches the frame edge), on occlusion by other
+# objects in the scene, and on duplication: a pose whose silhouette mask is
+# nearly the same as one already selected adds little. Only the best `keep`
+# poses go on to the full-quality render.
+#
+# Thumbnails use flat object colours: the vehicle white, everything else black.
+# Occlusion is the part of the vehicle-only silhouette that is black (or empty)
+# once the other objects are shown again.
+
+DUPLICATE_GRID = 32
+
+
+def render_rgba(scene, filepath):
+    # Render one thumbnail and return it as a float (H, W, 4) array in [0, 1]
+    scene.render.filepath = filepath
+    bpy.ops.render.render(write_still=True)
+    image = bpy.data.images.load(filepath)
+    pixels = np.empty(image.size[0] * image.size[1] * 4, dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    height, width = image.size[1], image.size[0]
+    bpy.data.images.remove(image)
+    return pixels.reshape(height, width, 4)
+
+
+def silhouette_grid(mask):
+    # Coarse silhouette for duplicate detection
+    height, width = mask.shape
+    rows = np.linspace(0, height, DUPLICATE_GRID + 1).astype(int)
+    cols = np.linspace(0, width, DUPLICATE_GRID + 1).astype(int)
+    return np.add.reduceat(np.add.reduceat(mask.astype(np.float32), rows[:-1], axis=0), cols[:-1], axis=1) > 0
+
+
+def mask_iou(a, b):
+    union = np.logical_or(a, b).sum()
+    return np.logical_and(a, b).sum() / union if union else 1.0
+
+
+def screen_views(scene, camera, views, keep, size=128, min_coverage=0.005, max_occlusion=0.3, max_iou=0.9):
+    """Return (selected views, record): the best `keep` of views by preview score, in plan order.
+
+    Failed and near-duplicate candidates are skipped; if that leaves fewer than `keep`, the best-scoring
+    of them fill the gap.
+    """
+    render = scene.render
+    settings = scene.display.shading
+    saved = {
+        "engine": render.engine,
+        "percent": render.resolution_percentage,
+        "filepath": render.filepath,
+        "transparent": render.film_transparent,
+        "format": (render.image_settings.file_format, render.image_settings.color_mode),
+        "aa": scene.display.render_aa,
+        "light": settings.light,
+        "color_type": settings.color_type,
+        "location": camera.location.copy(),
+    }
+    targets = framing.target_meshes(scene, camera)
+    others = [obj for obj in scene.objects if obj.type == 'MESH' and not obj.hide_render and obj not in targets]
+    colors = {obj: tuple(obj.color) for obj in targets + others}
+    preview_percent = max(1, min(100, round(100 * size / max(render.resolution_x, render.resolution_y))))
+    render.engine = 'BLENDER_WORKBENCH'
+    render.resolution_percentage = preview_percent
+    render.film_transparent = True
+    render.image_settings.file_format = 'PNG'
+    render.image_settings.color_mode = 'RGBA'
+    scene.display.render_aa = 'OFF'
+    settings.light = 'FLAT'
+    settings.color_type = 'OBJECT'
+    for obj in targets:
+        obj.color = (1.0, 1.0, 1.0, 1.0)
+    for obj in others:
+        obj.color = (0.0, 0.0, 0.0, 1.0)
+
+    start_time = time.time()
+    scored = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="street2air_preview_") as preview_dir:
+            for n, view in enumerate(views):
+                camera.location = view["location"]
+                bpy.context.view_layer.update()
+                # Vehicle on its own
+                for obj in others:
+                    obj.hide_render = True
+                alpha = render_rgba(scene, os.path.join(preview_dir, f"{n}.png"))[..., 3]
+                for obj in others:
+                    obj.hide_render = False
+                mask = alpha > 0.5
+                coverage = float(mask.mean())
+                occlusion = 0.0
+                if others and mask.any():
+                    # Whole scene: silhouette pixels that are no longer white are covered by something
+                    full = render_rgba(scene, os.path.join(preview_dir, f"{n}_scene.png"))
+                    visible = (full[..., 3] > 0.5) & (full[..., 0] > 0.25)
+                    occlusion = 1.0 - float(visible[mask].mean())
+                edge = bool(mask[0].any() or mask[-1].any() or mask[:, 0].any() or mask[:, -1].any())
+                reasons = []
+                if coverage < min_coverage:
+                    reasons.append("too small")
+                if edge:
+                    reasons.append("cut off")
+                if occlusion > max_occlusion:
+                    reasons.append("occluded")
+                scored.append({"view": view, "coverage": coverage, "occlusion": occlusion, "reasons": reasons,
+                               "grid": silhouette_grid(mask), "score": coverage * (1.0 - occlusion)})
+    finally:
+        for obj in others:
+            obj.hide_render = False
+        for obj, color in colors.items():
+            obj.color = color
+        render.engine = saved["engine"]
+        render.resolution_percentage = saved["percent"]
+        render.filepath = saved["filepath"]
+        render.film_transparent = saved["transparent"]
+        render.image_settings.file_format, render.image_settings.color_mode = saved["format"]
+        scene.display.render_aa = saved["aa"]
+        settings.light = saved["light"]
+        settings.color_type = saved["color_type"]
+        camera.location = saved["location"]
+        bpy.context.view_layer.update()
+    preview_seconds = time.time() - start_time
+
+    # Best scores first; skip failures and near-duplicates of what is already selected
+    selected = []
+    rejected = {}
+    for entry in sorted(scored, key=lambda entry: entry["score"], reverse=True):
+        reasons = entry["reasons"]
+        if not reasons and any(mask_iou(entry["grid"], other["grid"]) > max_iou for other in selected):
+            reasons = ["duplicate"]
+        if reasons:
+            for reason in reasons:
+                rejected[reason] = rejected.get(reason, 0) + 1
+        elif len(selected) < keep:
+            selected.append(entry)
+    # Too few clean candidates: fill up with the best-scoring rejected ones rather than render fewer views
+    topped_up = 0
+    if len(selected) < keep:
+        chosen = {id(entry) for entry in selected}
+        spares = sorted((entry for entry in scored if id(entry) not in chosen), key=lambda entry: entry["score"],
+                        reverse=True)
+        topped_up = min(keep - len(selected), len(spares))
+        selected += spares[:topped_up]
+        print(f"Preview screening: only {len(selected) - topped_up} of {keep} candidates passed; "
+              f"kept {topped_up} of the best-scoring rejected ones")
+    order = {id(view): n for n, view in enumerate(views)}
+    selected_views = sorted((entry["view"] for entry in selected), key=lambda view: order[id(view)])
+    record = {
+        "candidates": len(views),
+        "selected": len(selected_views),
+        "rejected": rejected,
+        "topped_up": topped_up,
+        "preview_seconds": preview_seconds,
+        "preview_percent": preview_percent,
+    }
+    details = ", ".join(f"{count} {reason}" for reason, count in sorted(rejected.items()))
+    print(f"Preview screening: {len(views)} candidates in {preview_seconds:.1f}s, {len(selected_views)} selected"
+          f"{f' (rejected: {details})' if details else ''}")
+    return selected_views, record
@@ -0,0 +1,191 @@
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+
+import batch_render
+
+# Benchmark sweep of render settings per vehicle class.
+#
+#   python3 render_benchmark.py --root /path/to/blend/folders --engines CYCLES,EEVEE --samples 32,128,512
+#
+# For one sample .blend per class (the first *_xy.blend, or --blend class=path)
+# every combination of engine, samples, denoiser, resolution and threads is
+# rendered from the default camera view in its own Blender process, so peak
+# memory (the process's max RSS, start-up and file load included) is per setting.
+# Quality is the alpha-masked relative RMSE against a high-sample Cycles
+# reference at the same resolution. Results go to benchmark.json, and the
+# settings not beaten on time, memory and error together to benchmark_pareto.json.
+
+BENCH_MSG = "@@street2air-bench "
+worker_script = os.path.join(batch_render.scripts_dir, "benchmark_worker.py")
+
+
+def parse_list(text, kind=str):
+    return [kind(value) for value in text.split(",") if value.strip()]
+
+
+def sample_blends(root, overrides):
+    # {class: .blend path}; the first *_xy.blend of each class folder unless overridden
+    blends = {}
+    for vehicle in batch_render.vehicle_scripts:
+        vehicle_dir = os.path.join(root, vehicle)
+        if os.path.isdir(vehicle_dir):
+            names = sorted(name for name in os.listdir(vehicle_dir)
+                           if name.endswith("_xy.blend") and not name.startswith("temp_"))
+            if names:
+                blends[vehicle] = os.path.abspath(os.path.join(vehicle_dir, names[0]))
+    for override in overrides:
+        vehicle, _, path = override.partition("=")
+        blends[vehicle] = os.path.abspath(path)
+    return blends
+
+
+def settings_grid(args):
+    grid = []
+    for engine, samples, denoise, percent, threads in itertools.product(
+            args.engines, args.samples, args.denoise, args.resolutions, args.threads):
+        if engine != "CYCLES" and denoise:
+            continue  # Only Cycles has a denoiser
+        if engine == "WORKBENCH" and samples != args.samples[0]:
+            continue  # Workbench has no sample count
+        grid.append({"engine": engine, "samples": samples, "denoise": denoise, "percent": percent,
+                     "threads": threads})
+    return grid
+
+
+def run_blender(blend, settings, out_dir, name, reference=None, keep=False):
+    # (result, peak RSS in MB, wall seconds) for one benchmark process
+    command = [batch_render.blender_executable, "--background", "--python", worker_script, "--",
+               blend, "--engine", settings["engine"], "--samples", str(settings["samples"]),
+               "--percent", str(settings["percent"]), "--threads", str(settings["threads"]),
+               "--out-dir", out_dir, "--name", name]
+    if settings["denoise"]:
+        command.append("--denoise")
+    if reference:
+        command += ["--reference", reference]
+    if keep:
+        command.append("--keep")
+    start_time = time.time()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    result = None
+    for line in process.stdout:
+        if line.startswith(BENCH_MSG):
+            result = json.loads(line[len(BENCH_MSG):])
+    # wait4 reports this child's own peak memory (ru_maxrss is in KB on Linux)
+    peak_mb = None
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        peak_mb = usage.ru_maxrss / 1024.0
+    else:
+        process.wait()
+    return result, peak_mb, time.time() - start_time
+
+
+def pareto_front(results):
+    # Results no other result beats on render time, peak memory and error at once
+    def costs(result):
+        return result["render_seconds"], result["peak_mb"] or 0.0, result["error"] if result["error"] is not None else 1e9
+
+    front = []
+    for result in results:
+        dominated = any(all(a <= b for a, b in zip(costs(other), costs(result))) and costs(other) != costs(result)
+                        for other in results)
+        if not dominated:
+            front.append(result)
+    return sorted(front, key=lambda result: result["render_seconds"])
+
+
+def describe(result):
+    denoise = "+denoise" if result["denoise"] else ""
+    threads = result["threads"] or "auto"
+    return f"{result['engine']} {result['samples']} spp{denoise} @{result['percent']}% threads={threads}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark render settings on one sample .blend per vehicle class')
+    parser.add_argument('--root', default='.', help='Folder holding one sub-folder per vehicle class')
+    parser.add_argument('--blend', action='append', default=[], metavar='CLASS=PATH',
+                        help='Sample .blend for a class (default: the first *_xy.blend in its folder)')
+    parser.add_argument('--engines', type=parse_list, default=['CYCLES', 'EEVEE'],
+                        help='Comma-separated engines: CYCLES, EEVEE, WORKBENCH')
+    parser.add_argument('--samples', type=lambda text: parse_list(text, int), default=[32, 128, 512],
+                        help='Comma-separated sample counts')
+    parser.add_argument('--denoise', type=lambda text: [value == 'on' for value in parse_list(text)],
+                        default=[False, True], help='Comma-separated denoiser settings: on, off')
+    parser.add_argument('--resolutions', type=lambda text: parse_list(text, int), default=[50, 100],
+                        help='Comma-separated resolution percentages')
+    parser.add_argument('--threads', type=lambda text: parse_list(text, int), default=[0],
+                        help='Comma-separated render thread counts (0 = automatic)')
+    parser.add_argument('--reference-samples', type=int, default=2048,
+                        help='Cycles samples of the reference render quality is measured against')
+    parser.add_argument('--max-error', type=float, default=0.02,
+                        help='Error allowed for the recommended (fastest acceptable) setting')
+    parser.add_argument('--out', default='benchmark', help='Folder for references and results')
+    args = parser.parse_args()
+
+    blends = sample_blends(args.root, args.blend)
+    if not blends:
+        print("No sample .blend files found.")
+        return 1
+    grid = settings_grid(args)
+    os.makedirs(args.out, exist_ok=True)
+    print(f"Benchmarking {len(grid)} settings on {len(blends)} classes: {', '.join(sorted(blends))}")
+
+    results = []
+    for vehicle, blend in sorted(blends.items()):
+        # One high-sample Cycles reference per resolution
+        references = {}
+        for percent in args.resolutions:
+            name = f"{vehicle}_reference_{percent}"
+            reference = os.path.join(args.out, f"{name}.exr")
+            if not os.path.exists(reference):
+                print(f"Rendering {vehicle} reference at {percent}% with {args.reference_samples} samples...")
+                settings = {"engine": "CYCLES", "samples": args.reference_samples, "denoise": False,
+                            "percent": percent, "threads": 0}
+                run_blender(blend, settings, args.out, name, keep=True)
+            references[percent] = reference if os.path.exists(reference) else None
+
+        for n, settings in enumerate(grid):
+            result, peak_mb, wall_seconds = run_blender(blend, settings, args.out, f"{vehicle}_{n}",
+                                                        reference=references[settings["percent"]])
+            if result is None:
+                print(f"{vehicle}: {describe(settings)} failed")
+                continue
+            result.update(vehicle=vehicle, blend=blend, peak_mb=peak_mb, wall_seconds=wall_seconds)
+            results.append(result)
+            error = f"{result['error']:.4f}" if result["error"] is not None else "n/a"
+            peak = f"{peak_mb:.0f} MB" if peak_mb is not None else "n/a"
+            print(f"{vehicle}: {describe(result)}: {result['render_seconds']:.1f}s render, "
+                  f"{wall_seconds:.1f}s wall, peak {peak}, error {error}")
+
+    with open(os.path.join(args.out, "benchmark.json"), "w") as f:
+        json.dump(results, f, indent=2)
+
+    summary = {}
+    for vehicle in sorted(blends):
+        vehicle_results = [result for result in results if result["vehicle"] == vehicle]
+        acceptable = [result for result in vehicle_results
+                      if result["error"] is not None and result["error"] <= args.max_error]
+        recommended = min(acceptable, key=lambda result: result["render_seconds"]) if acceptable else None
+        summary[vehicle] = {"pareto": pareto_front(vehicle_results), "recommended": recommended,
+                            "max_error": args.max_error}
+        print(f"{vehicle}: Pareto front")
+        for result in summary[vehicle]["pareto"]:
+            error = f"{result['error']:.4f}" if result["error"] is not None else "n/a"
+            print(f"  {describe(result)}: {result['render_seconds']:.1f}s, {result['peak_mb'] or 0:.0f} MB, "
+                  f"error {error}")
+        if recommended:
+            print(f"{vehicle}: recommended {describe(recommended)} (fastest with error <= {args.max_error})")
+    with open(os.path.join(args.out, "benchmark_pareto.json"), "w") as f:
+        json.dump(summary, f, indent=2, sort_keys=True)
+    print(f"Results: {os.path.join(args.out, 'benchmark.json')}, {os.path.join(args.out, 'benchmark_pareto.json')}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,18 +2,17 @@ import bpy
 import math
 import os
 import sys
-import random
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import render_common
 
 # Convert feet to meters (assuming 1 Blender unit = 1 meter)
 def feet_to_meters(feet):
     return feet * 0.3048
 
-# Get the Blender file path from the command line arguments
-if len(sys.argv) < 2:
-    raise ValueError("Please provide the Blender file path as an argument.")
-
-# Blender command line arguments start after '--'
-blend_file_path = sys.argv[sys.argv.index("--") + 1]
+# Get the Blender file path (and optional render parameters) from the command line arguments
+args = render_common.parse_args(num_renders=30)
+blend_file_path = args.blend_file_path
 
 # Load the Blender file
 bpy.ops.wm.open_mainfile(filepath=blend_file_path)
@@ -31,6 +30,9 @@ camera = bpy.data.objects.get('Camera')
 if camera is None:
     raise ValueError("No camera named 'Camera' found in the scene.")
 
+# Reuse views already rendered from the same scene, pose and settings
+cache = render_common.open_view_cache(args, blend_file_path)
+
 # Check if the camera has a tracking constraint
 if camera.constraints:
     tracked_object = camera.constraints[0].target
@@ -57,44 +59,59 @@ max_radius = feet_to_meters(20)
 radius = min(max(original_distance, min_radius), max_radius)
 
 # Parameters for randomness (converted to meters)
-num_views = 30  # Number of images to render (e.g., 12 images for a full circle)
+num_views = args.num_renders  # Number of images to render (e.g., 12 images for a full circle)
 height_variation = feet_to_meters(2.0)  # Maximum variation in height (Z-axis)
 horizontal_variation = feet_to_meters(2.0)  # Maximum variation in horizontal plane (X and Y)
 
-# Render images from different camera positions
+# Per-file random stream: the same --seed and file always give the same poses
+rng = render_common.rng_for(blend_file_path, args.seed)
+
+# Check each drawn pose by projecting the tracked object's bounding box before paying for a render
+framing = render_common.open_framing_check(args, camera, tracked_object)
+
+# Plan every camera position before rendering
+views = []
+camera_z = camera.location.z
 for i in range(num_views):
     # Calculate the base angle in radians
     angle = (i / num_views) * 2 * math.pi
     
-    # Introduce randomness to the camera position
-    random_angle_offset = random.uniform(-0.1, 0.1) * math.pi  # Small random angular offset
-    random_radius_offset = random.uniform(-horizontal_variation, horizontal_variation)  # Small random radius offset
-    random_height_offset = random.uniform(-height_variation, height_variation)  # Small random height offset
-    
-    # Calculate the new camera position with randomness
-    x = object_center.x + (radius + random_radius_offset) * math.cos(angle + random_angle_offset)
-    y = object_center.y + (radius + random_radius_offset) * math.sin(angle + random_angle_offset)
-    z = camera.location.z + random_height_offset  # Add random height variation
-    
-    # Move the camera to the new position
-    camera.location = (x, y, z)
-    
-    # Update the scene
-    bpy.context.view_layer.update()
-
-    # Set render settings
-    bpy.context.scene.render.image_settings.file_format = 'PNG'
-    bpy.context.scene.render.image_settings.color_mode = 'RGBA'  # Ensure alpha channel is used
-    render_filepath = os.path.join(output_dir, f"render_view_{i:04d}.png")
-    bpy.context.scene.render.filepath = render_filepath
-
-    # Render the image
-    bpy.ops.render.render(write_still=True)
-
-    # Check if the image was saved
-    if os.path.exists(render_filepath):
-        print(f"Saved image: {render_filepath}")
-    else:
-        print(f"Failed to save image: {render_filepath}")
+    def draw_pose():
+        # Introduce randomness to the camera position
+        random_angle_offset = rng.uniform(-0.1, 0.1) * math.pi  # Small random angular offset
+        random_radius_offset = rng.uniform(-horizontal_variation, horizontal_variation)  # Small random radius offset
+        random_height_offset = rng.uniform(-height_variation, height_variation)  # Small random height offset
+
+        # Calculate the new camera position with randomness
+        x = object_center.x + (radius + random_radius_offset) * math.cos(angle + random_angle_offset)
+        y = object_center.y + (radius + random_radius_offset) * math.sin(angle + random_angle_offset)
+        z = camera_z + random_height_offset  # Add random height variation
+        return x, y, z
+
+    # Redraw poses that would leave the vehicle partly out of frame or too small
+    x, y, z = render_common.sample_pose(framing, draw_pose)
+    camera_z = z  # Heights accumulate, as when the camera was moved inside the loop
+    views.append(render_common.plan_view(i, f"render_view_{i:04d}.png", (x, y, z)))
+
+# Swap in low-discrepancy poses with --sampler coverage and report how well the views cover the vehicle
+views = render_common.coverage_views(args, rng, views, object_center,
+                                     (radius - horizontal_variation, radius + horizontal_variation),
+                                     (camera.location.z - height_variation, camera.location.z + height_variation),
+                                     lambda i: f"render_view_{i:04d}.png", framing)
+if framing is not None:
+    print(framing.summary())
+
+# Write the plan and stop, or keep only the views a plan assigns to this file
+views = render_common.select_views(args, views)
+
+# Set render settings
+bpy.context.scene.render.image_settings.file_format = 'PNG'
+bpy.context.scene.render.image_settings.color_mode = 'RGBA'  # Ensure alpha channel is used
+
+# Render images from different camera positions
+render_common.render_views(views, camera, output_dir, cache, args)
+
+if cache is not None:
+    print(cache.summary())
 
 print(f"Rendering complete! Images saved in: {output_dir}")
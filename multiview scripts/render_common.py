@@ -0,0 +1,958 @@
+import bpy
+import argparse
+import json
+import math
+import os
+import runpy
+import sys
+import time
+
+import metrics
+import render_plan
+
+# Helpers shared by the render_*.py class scripts.
+#
+# The scripts run inside Blender (`blender --background --python <script> -- ...`)
+# and add this folder to sys.path before importing the module.
+
+# Result of --screen-oversample preview screening for this run, reported after rendering
+screening = None
+
+# Stage timings of this run (see metrics.py) and whether per-view progress is printed
+recorder = None
+quiet = False
+load_start = None
+
+# Planned views actually rendered (not view cache hits) since render_worker.py last reset it; previews,
+# probes and baseline renders are left out, so the batch history learns seconds per planned view
+views_rendered = 0
+
+# {view name: output file name} of every view this run was planned to write, including mirrored ones;
+# render_worker.py reports the names so batch_render.py records exactly these outputs in its manifest
+view_outputs = {}
+
+# validate_renders.py checks a view fails again at the same pose; --redo draws a new pose for these
+REDRAW_CHECKS = {"framing", "coverage"}
+# Frame margin the new pose must keep, so the vehicle no longer touches the edge
+REDRAW_MARGIN = 0.02
+
+
+def parse_args(num_renders=30):
+    global screening, recorder, quiet
+    screening = None  # Workers render many files in one session
+    # Blender command line arguments start after '--'
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    if not argv:
+        raise ValueError("Please provide the Blender file path as an argument.")
+
+    parser = argparse.ArgumentParser(prog=os.path.basename(sys.argv[0]))
+    parser.add_argument("blend_file_path", help="Blender file to render")
+    parser.add_argument("--num-renders", type=int, default=num_renders,
+                        help="Number of views to render (excluding the default view)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Base seed for this file's random camera offsets (unseeded if omitted)")
+    parser.add_argument("--plan-out", default=None,
+                        help="Write this file's planned views to a plan file instead of rendering")
+    parser.add_argument("--plan", default=None,
+                        help="Render only the views a plan file lists for this file")
+    parser.add_argument("--plan-key", default=None,
+                        help="Name of this file in the plan (default: the file name)")
+    parser.add_argument("--sampler", choices=["random", "coverage"], default="random",
+                        help="'random': the script's jittered poses; 'coverage': low-discrepancy poses picked for coverage")
+    parser.add_argument("--coverage-target", type=float, default=None,
+                        help="With --sampler coverage: render the fewest views reaching this coverage (0-1) "
+                             "instead of --num-renders")
+    parser.add_argument("--coverage-radius", type=float, default=15.0,
+                        help="A viewing direction counts as covered within this many degrees of a view")
+    parser.add_argument("--candidate-poses", type=int, default=512,
+                        help="Low-discrepancy candidates drawn for --sampler coverage")
+    parser.add_argument("--screen-oversample", type=float, default=None,
+                        help="Plan this many times --num-renders candidate poses, screen them with low-resolution "
+                             "Workbench previews and render only the best --num-renders")
+    parser.add_argument("--screen-size", type=int, default=128, help="Longest side of the preview thumbnails in pixels")
+    parser.add_argument("--screen-max-occlusion", type=float, default=0.3,
+                        help="Largest fraction of the vehicle other objects may hide in a screened view")
+    parser.add_argument("--min-fill", type=float, default=0.01,
+                        help="Smallest fraction of the frame the vehicle's projected bounding box may cover")
+    parser.add_argument("--frame-margin", type=float, default=0.0,
+                        help="Fraction of the frame width/height the vehicle must stay clear of at the edges")
+    parser.add_argument("--max-pose-attempts", type=int, default=20,
+                        help="Poses drawn per view before keeping one that fails the framing check")
+    parser.add_argument("--no-framing-check", action="store_true",
+                        help="Keep every drawn pose without projecting the vehicle first")
+    parser.add_argument("--symmetric", action="store_true",
+                        help="Render only the views on one side of the vehicle's mirror plane and write the others "
+                             "as flipped images, if a probe render shows the vehicle is symmetric")
+    parser.add_argument("--symmetry-min-iou", type=float, default=0.97,
+                        help="Smallest silhouette IoU between a probe and its flipped mirror for --symmetric")
+    parser.add_argument("--symmetry-max-error", type=float, default=0.05,
+                        help="Largest relative colour error between a probe and its flipped mirror for --symmetric")
+    parser.add_argument("--symmetry-probe-percent", type=int, default=25,
+                        help="Symmetry probe resolution as a percentage of the render resolution")
+    parser.add_argument("--lod", action="store_true",
+                        help="Render each view with the coarsest decimated level of detail whose error stays under "
+                             "--lod-max-error-px at the vehicle's projected size")
+    parser.add_argument("--lod-ratios", default="0.5,0.25,0.1,0.05",
+                        help="Comma-separated face ratios of the decimated levels")
+    parser.add_argument("--lod-max-error-px", type=float, default=1.0,
+                        help="Largest projected surface error of a level, in pixels")
+    parser.add_argument("--lod-cache", default=None,
+                        help="Folder to cache decimated levels in (default: <output dir>/lod_cache)")
+    parser.add_argument("--lod-baseline", type=int, default=1,
+                        help="Views re-rendered at full detail to compare BVH build and render time against")
+    parser.add_argument("--texture-levels", action="store_true",
+                        help="Bind each view to downscaled copies of the vehicle's textures that suit its projected size")
+    parser.add_argument("--texture-texels-per-pixel", type=float, default=2.0,
+                        help="Texture resolution needed per pixel of the vehicle's projected size")
+    parser.add_argument("--texture-cache", default=None,
+                        help="Folder to cache downscaled textures in (default: .texture_cache next to the "
+                             ".blend file, outside the render output)")
+    parser.add_argument("--texture-baseline", type=int, default=1,
+                        help="Views re-rendered with full-resolution textures to compare peak memory against")
+    parser.add_argument("--redo", default=None,
+                        help="Render only the views a validate_renders.py failure list names for this file")
+    parser.add_argument("--animation", action="store_true",
+                        help="Render all views as one animation pass with persistent render data")
+    parser.add_argument("--async-writes", type=int, default=0, metavar="THREADS",
+                        help="Encode and write images on this many background threads (0 = Blender writes them)")
+    parser.add_argument("--write-queue", type=int, default=4,
+                        help="Most rendered images waiting to be written before the render loop blocks")
+    parser.add_argument("--output-format", choices=["PNG", "WEBP", "EXR"], default="PNG",
+                        help="Image format written by --async-writes")
+    parser.add_argument("--tune-samples", action="store_true",
+                        help="Pick the cheapest sample settings that meet --tune-noise on a low-resolution probe")
+    parser.add_argument("--tune-noise", type=float, default=0.02,
+                        help="Highest relative RMSE against the saved settings accepted by --tune-samples")
+    parser.add_argument("--tune-probe-percent", type=int, default=25,
+                        help="Probe resolution as a percentage of the render resolution")
+    parser.add_argument("--view-cache", default=None,
+                        help="Folder of previously rendered views to reuse (disabled if omitted)")
+    parser.add_argument("--view-cache-gb", type=float, default=20.0,
+                        help="Size limit of the view cache in GB")
+    parser.add_argument("--quiet", action="store_true",
+                        help="Print only per-file progress, warnings and failures, not a line per view")
+    parser.add_argument("--prometheus", default=None,
+                        help="Also write this run's metrics to a Prometheus textfile")
+    args = parser.parse_args(argv)
+    recorder = metrics.MetricsRecorder(args.blend_file_path)
+    quiet = args.quiet
+    # Time the script's open_mainfile call, as render_many.py does
+    if load_started not in bpy.app.handlers.load_pre:
+        bpy.app.handlers.load_pre.append(load_started)
+        bpy.app.handlers.load_post.append(load_finished)
+    args.keep_views = args.num_renders
+    if args.screen_oversample:
+        # The scripts plan --num-renders poses; give them more candidates and keep the requested count
+        args.num_renders = max(args.num_renders, math.ceil(args.num_renders * args.screen_oversample))
+    return args
+
+
+def say(message):
+    # Per-view progress, dropped with --quiet
+    if not quiet:
+        print(message)
+
+
+def stage(name):
+    # Time a block as a named stage of this run, or of the current view
+    return recorder.stage(name)
+
+
+@bpy.app.handlers.persistent
+def load_started(*_):
+    global load_start
+    load_start = time.monotonic()
+
+
+@bpy.app.handlers.persistent
+def load_finished(*_):
+    if recorder is not None and load_start is not None:
+        recorder.add("open_mainfile", time.monotonic() - load_start)
+
+
+def feed_render_stats(stats, *args):
+    # render_stats handler: Blender's status line while a render is running
+    if recorder is not None:
+        recorder.render_stats.feed(stats if isinstance(stats, str) else str(stats))
+
+
+def rng_for(blend_file_path, seed):
+    return render_plan.rng_for(blend_file_path, seed)
+
+
+def plan_view(index, name, location):
+    # One planned view: index -1 is the file's default view
+    return {"view": index, "name": name, "location": [float(value) for value in location]}
+
+
+def open_framing_check(args, camera, target=None):
+    # Pose check against the tracked object (or every mesh) for sample_pose
+    if args.no_framing_check:
+        return None
+    import framing
+    return framing.FramingCheck(bpy.context.scene, camera, target, min_fill=args.min_fill,
+                                margin=args.frame_margin, max_attempts=max(args.max_pose_attempts, 1))
+
+
+def sample_pose(check, draw):
+    # Call draw() until its (x, y, z) passes the framing check, keeping the last draw if none does
+    location = draw()
+    if check is None:
+        return location
+    for _ in range(check.max_attempts - 1):
+        if check.accept(location):
+            return location
+        location = draw()
+    if not check.accept(location):
+        check.exhausted += 1
+        print(f"Warning: no well-framed pose in {check.max_attempts} attempts, keeping "
+              f"({location[0]:.3f}, {location[1]:.3f}, {location[2]:.3f})")
+    return location
+
+
+def coverage_views(args, rng, views, center, distance_range, height_range, view_name, check=None):
+    # Swap the script's poses for coverage-driven ones with --sampler coverage; report coverage either way
+    import pose_sampler
+    center = tuple(center)
+    band = pose_sampler.elevation_band(center, distance_range, height_range)
+    if args.sampler == "coverage":
+        candidates = pose_sampler.candidate_poses(center, distance_range, height_range, args.candidate_poses, rng)
+        if check is not None:
+            candidates = [candidate for candidate in candidates if check.accept(candidate)]
+        if candidates:
+            count = None if args.coverage_target is not None else args.num_renders
+            poses, _ = pose_sampler.select_poses(candidates, center, distance_range, band, count,
+                                                 args.coverage_target, args.coverage_radius)
+            views = [view for view in views if view["view"] < 0]
+            views += [plan_view(i, view_name(i), pose) for i, pose in enumerate(poses)]
+        else:
+            print("Warning: no candidate pose passed the framing check; keeping the random poses")
+    locations = [view["location"] for view in views if view["view"] >= 0]
+    value = pose_sampler.coverage(locations, center, band, args.coverage_radius)
+    print(f"View coverage: {value:.1%} of viewing directions within {args.coverage_radius:g} degrees "
+          f"from {len(locations)} views ({args.sampler} sampler)")
+    return views
+
+
+def screen_views(args, views):
+    # Keep the default view and the best previewed --num-renders of the other candidates
+    global screening
+    import preview_screen
+    scene = bpy.context.scene
+    camera = scene.camera or bpy.data.objects.get('Camera')
+    defaults = [view for view in views if view["view"] < 0]
+    candidates = [view for view in views if view["view"] >= 0]
+    selected, screening = preview_screen.screen_views(scene, camera, candidates, args.keep_views,
+                                                      size=args.screen_size,
+                                                      max_occlusion=args.screen_max_occlusion)
+    # Kept candidates are numbered 0..N-1 again, as the validator and dataset tools expect
+    selected = [dict(view, view=n, name=render_plan.renumber_view_name(view["name"], n))
+                for n, view in enumerate(selected)]
+    return defaults + selected
+
+
+def select_views(args, views):
+    # Apply --plan-out / --plan to the views a script generated; returns the views to render
+    key = args.plan_key or os.path.basename(args.blend_file_path)
+    # Everything since the file was loaded went into drawing and checking poses
+    recorder.since_last_stage("plan")
+    if args.screen_oversample and not args.plan and not args.redo:
+        with stage("screen"):
+            views = screen_views(args, views)
+    if args.plan_out:
+        import view_cache
+        settings = view_cache.render_settings(bpy.context.scene)
+        entries = [dict(view, blend=key, seed=args.seed, settings=settings) for view in views]
+        render_plan.write_plan(args.plan_out, entries)
+        print(f"Planned {len(entries)} views for {key} in {args.plan_out}")
+        return []
+    if args.plan:
+        entries = [entry for entry in render_plan.load_plan(args.plan) if entry["blend"] == key]
+        print(f"Plan {args.plan} assigns {len(entries)} views to {key}")
+        import view_cache
+        if entries and entries[0].get("settings") != view_cache.render_settings(bpy.context.scene):
+            print(f"Warning: render settings of {key} differ from when the plan was made")
+        views = [plan_view(entry["view"], entry["name"], entry["location"]) for entry in entries]
+    if args.redo:
+        failures = render_plan.match_failures(views, render_plan.load_failures(args.redo).get(key, {}))
+        views = [view for view in views if view["name"] in failures]
+        print(f"Re-rendering {len(views)} failed views of {key} from {args.redo}")
+        views = redraw_views(args, views, failures)
+    return views
+
+
+def redraw_views(args, views, failures):
+    # Views that failed framing or coverage would come back the same at their old pose: draw a new one
+    # near it (azimuth, elevation and distance jittered) that passes the analytic framing check
+    failed = [view for view in views if view["view"] >= 0 and REDRAW_CHECKS & failures.get(view["name"], set())]
+    if not failed:
+        return views
+    import framing
+    scene = bpy.context.scene
+    camera = scene.camera or bpy.data.objects.get('Camera')
+    corners = framing.world_corners(framing.target_meshes(scene, camera)) if camera is not None else []
+    if not corners:
+        print("Warning: no vehicle meshes to frame; re-rendering failed views at their old poses")
+        return views
+    center = [sum(corner[i] for corner in corners) / len(corners) for i in range(3)]
+    # Even with --no-framing-check: these views failed on framing, so the new pose must pass it
+    check = framing.FramingCheck(scene, camera, min_fill=args.min_fill, margin=max(args.frame_margin, REDRAW_MARGIN),
+                                 max_attempts=max(args.max_pose_attempts, 1))
+    rng = render_plan.rng_for(args.blend_file_path + ":redo", args.seed)
+    redrawn = {}
+    for view in failed:
+        offset = [view["location"][i] - center[i] for i in range(3)]
+        distance = math.sqrt(sum(value * value for value in offset)) or 1.0
+        azimuth = math.atan2(offset[1], offset[0])
+        elevation = math.asin(max(-1.0, min(1.0, offset[2] / distance)))
+
+        def draw():
+            d = distance * rng.uniform(0.9, 1.3)
+            a = azimuth + math.radians(rng.uniform(-20, 20))
+            e = max(-1.5, min(1.5, elevation + math.radians(rng.uniform(-5, 5))))
+            return (center[0] + d * math.cos(e) * math.cos(a), center[1] + d * math.cos(e) * math.sin(a),
+                    center[2] + d * math.sin(e))
+
+        location = sample_pose(check, draw)
+        redrawn[view["name"]] = dict(view, location=list(location), redrawn_from=list(view["location"]),
+                                     failed_checks=sorted(failures[view["name"]]))
+        say(f"New pose for {view['name']} ({', '.join(sorted(failures[view['name']]))} failure): "
+            f"({location[0]:.3f}, {location[1]:.3f}, {location[2]:.3f})")
+    print(f"Drew new poses for {len(redrawn)} views that failed framing or coverage. {check.summary()}")
+    return [redrawn.get(view["name"], view) for view in views]
+
+
+def record_redrawn(views, output_dir):
+    # Pose metadata of views --redo moved away from their planned pose, merged into redo_poses.json
+    redrawn = {view["name"]: {"location": view["location"], "planned_location": view["redrawn_from"],
+                              "failed_checks": view["failed_checks"]} for view in views if "redrawn_from" in view}
+    if not redrawn:
+        return
+    path = os.path.join(output_dir, "redo_poses.json")
+    record = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            record = json.load(f)
+    record.update(redrawn)
+    with open(path, "w") as f:
+        json.dump(record, f, indent=2, sort_keys=True)
+
+
+def open_view_cache(args, blend_file_path):
+    # Views are keyed on the content of the original .blend, not on its path
+    if not args.view_cache:
+        return None
+    if args.redo:
+        # The cache would hand back the same bad images
+        print("View cache disabled while re-rendering failed views")
+        return None
+    import view_cache
+    cache = view_cache.ViewCache(args.view_cache, int(args.view_cache_gb * 1e9),
+                                 view_cache.file_hash(blend_file_path))
+    print(f"Using view cache: {args.view_cache}")
+    return cache
+
+
+def open_image_writer(args, scene):
+    # Background writer for --async-writes, when the scene's colour management allows it
+    if args is None or args.async_writes <= 0:
+        return None
+    import image_writer
+    if not image_writer.supports(scene):
+        print(f"Async writes need the 'Standard' view transform (scene uses "
+              f"'{scene.view_settings.view_transform}'); Blender will write images instead.")
+        return None
+    image_writer.setup_viewer(scene)
+    print(f"Writing {args.output_format} images on {args.async_writes} background threads")
+    return image_writer.AsyncImageWriter(threads=args.async_writes, max_pending=max(args.write_queue, 1),
+                                         file_format=args.output_format, verbose=not args.quiet,
+                                         compression=scene.render.image_settings.compression,
+                                         exposure=scene.view_settings.exposure, gamma=scene.view_settings.gamma)
+
+
+def mirror_views(args, views, camera, output_dir):
+    # With --symmetric: (views to render, [(view, source name, mirrored location)] to write as flipped images)
+    if args is None or not args.symmetric or not views:
+        return views, []
+    import symmetry
+    import view_cache
+    scene = bpy.context.scene
+    plane = symmetry.mirror_plane(scene, camera)
+    if plane is None:
+        print("Symmetry: no vehicle meshes found; rendering every view")
+        return views, []
+    center, normal = plane
+    rendered, mirrored = symmetry.pair_views(views, center, normal)
+    if not mirrored:
+        return views, []
+
+    # Reuse an earlier check of the same scene content and thresholds
+    record_path = os.path.join(output_dir, "symmetry.json")
+    scene_hash = view_cache.file_hash(args.blend_file_path)
+    thresholds = {"min_iou": args.symmetry_min_iou, "max_error": args.symmetry_max_error,
+                  "probe_percent": args.symmetry_probe_percent}
+    check = None
+    if os.path.exists(record_path):
+        with open(record_path) as f:
+            record = json.load(f)
+        if record.get("scene_hash") == scene_hash and record.get("thresholds") == thresholds:
+            check = record["check"]
+            print(f"Symmetry check reused from {record_path}: symmetric={check['symmetric']}")
+    if check is None:
+        saved = camera.location.copy()
+
+        def pose(location):
+            def apply():
+                camera.location = location
+            return apply
+
+        # Probe the first two pairs: a rendered pose against its exact mirror
+        pairs = [(pose(next(view["location"] for view in rendered if view["name"] == source)), pose(location))
+                 for _, source, location in mirrored[:2]]
+        with stage("symmetry"):
+            check = symmetry.check_symmetry(scene, pairs, percent=args.symmetry_probe_percent,
+                                            min_iou=args.symmetry_min_iou, max_error=args.symmetry_max_error)
+        camera.location = saved
+        bpy.context.view_layer.update()
+
+    record = {"scene_hash": scene_hash, "thresholds": thresholds, "check": check,
+              "plane": {"center": list(center), "normal": list(normal)}, "mirrored": {}}
+    if check["symmetric"]:
+        # Pose metadata of every written view: mirrored views sit at the exact mirror of their source
+        record["mirrored"] = {view["name"]: {"source": source, "location": location,
+                                             "planned_location": view["location"]}
+                              for view, source, location in mirrored}
+    with open(record_path, "w") as f:
+        json.dump(record, f, indent=2)
+    if not check["symmetric"]:
+        return views, []
+    print(f"Symmetric mode: rendering {len(rendered)} of {len(views)} views, {len(mirrored)} mirrored")
+    return rendered, mirrored
+
+
+def write_mirrored(mirrored, output_dir):
+    # Flip each rendered source image into its mirrored view, in whatever format the source was written
+    import symmetry
+    for view, source, _ in mirrored:
+        root = os.path.splitext(os.path.join(output_dir, source))[0]
+        source_path = next((root + extension for extension in (".png", ".webp", ".exr")
+                            if os.path.exists(root + extension)), None)
+        if source_path is None:
+            view_outputs[view["name"]] = view["name"]
+            print(f"Failed to save image: {view['name']} (source {source} was not rendered)")
+            continue
+        target_path = os.path.splitext(os.path.join(output_dir, view["name"]))[0] + os.path.splitext(source_path)[1]
+        view_outputs[view["name"]] = os.path.basename(target_path)
+        try:
+            symmetry.flip_image(source_path, target_path)
+        except Exception as e:
+            print(f"Mirroring failed with error: {e}")
+        report_saved(target_path)
+
+
+def open_lods(args, camera, output_dir):
+    # With --lod: decimated levels of the vehicle's meshes, built once per scene content
+    if args is None or not args.lod:
+        return None
+    import framing
+    import lod
+    import view_cache
+    objects = framing.target_meshes(bpy.context.scene, camera)
+    if not objects:
+        print("LOD: no vehicle meshes found; rendering at full detail")
+        return None
+    with stage("lod_build"):
+        lods = lod.LodSet(objects, [float(ratio) for ratio in args.lod_ratios.split(",")],
+                          cache_dir=args.lod_cache or os.path.join(output_dir, "lod_cache"),
+                          scene_hash=view_cache.file_hash(args.blend_file_path))
+    levels = ", ".join(f"{ratio:g}: {polygons} polygons, {lods.error_world(n) * 1000:.1f} mm"
+                       for n, (ratio, polygons) in enumerate(zip(lods.ratios, lods.polygons)))
+    print(f"LOD levels {'loaded' if lods.cached else 'built'} in {lods.build_seconds:.1f}s ({levels})")
+    return lods
+
+
+def open_textures(args, camera):
+    # With --texture-levels: downscaled copies of the vehicle's textures, made once per image content
+    if args is None or not args.texture_levels:
+        return None
+    import framing
+    import texture_lod
+    objects = framing.target_meshes(bpy.context.scene, camera)
+    # Not under output_dir: the level PNGs there would be taken for rendered views
+    cache_dir = args.texture_cache or os.path.join(os.path.dirname(os.path.abspath(args.blend_file_path)),
+                                                   ".texture_cache")
+    with stage("texture_build"):
+        textures = texture_lod.TextureSet(objects, cache_dir, texels_per_pixel=args.texture_texels_per_pixel)
+    if not textures.levels:
+        print("Textures: the vehicle's materials use no image textures; keeping them as they are")
+        return None
+    print(f"Texture levels for {len(textures.levels)} images ({textures.made} made) in "
+          f"{textures.build_seconds:.1f}s, {textures.megabytes():.0f} MB at full resolution")
+    return textures
+
+
+def detail_fields(lods=None, textures=None, level=None, chosen=None):
+    # View record fields and view cache variant for a mesh level and texture levels
+    fields = {}
+    parts = []
+    if lods is not None:
+        fields.update(lod=level, polygons=lods.polygons[level])
+        if level:
+            parts.append(f"lod{level}")
+    if textures is not None:
+        fields.update(texture_level=max(chosen.values(), default=0), texture_mb=textures.megabytes(chosen))
+        if fields["texture_level"]:
+            parts.append("tex" + ",".join(str(chosen[name]) for name in sorted(chosen)))
+    return fields, "-".join(parts) or None
+
+
+def select_detail(camera, args, lods=None, textures=None):
+    # Swap in the coarsest mesh level and smallest texture levels that are fine for the camera's current pose
+    scene = bpy.context.scene
+    level = chosen = None
+    if lods is not None:
+        with stage("lod"):
+            level = lods.select(scene, camera, args.lod_max_error_px)
+            lods.apply(level)
+    if textures is not None:
+        with stage("textures"):
+            chosen = textures.select(scene, camera)
+            textures.apply(chosen)
+    if lods is not None or textures is not None:
+        bpy.context.view_layer.update()
+    return detail_fields(lods, textures, level, chosen)
+
+
+def select_animation_detail(views, camera, args, lods=None, textures=None):
+    # One mesh and one set of textures for every frame: the finest levels any of the views needs
+    scene = bpy.context.scene
+    levels = []
+    choices = []
+    for view in views:
+        camera.location = view["location"]
+        bpy.context.view_layer.update()
+        if lods is not None:
+            levels.append(lods.select(scene, camera, args.lod_max_error_px))
+        if textures is not None:
+            choices.append(textures.select(scene, camera))
+    level = chosen = None
+    if lods is not None:
+        level = min(levels)
+        lods.apply(level)
+    if textures is not None:
+        chosen = {name: min(choice[name] for choice in choices) for name in textures.levels}
+        textures.apply(chosen)
+    return detail_fields(lods, textures, level, chosen)
+
+
+def baseline_renders(views, camera, records, prepare):
+    # Re-render the views of records without saving, after prepare() puts the scene into the state to compare
+    # against; {name: (render seconds, render stats)}
+    poses = {view["name"]: view["location"] for view in views}
+    results = {}
+    for record in records:
+        camera.location = poses[record["name"]]
+        bpy.context.view_layer.update()
+        prepare()
+        bpy.context.view_layer.update()
+        recorder.render_stats.reset()
+        start = time.monotonic()
+        try:
+            bpy.ops.render.render()
+        except Exception as e:
+            print(f"Baseline render failed with error: {e}")
+            continue
+        results[record["name"]] = (time.monotonic() - start, recorder.render_stats.finish())
+    return results
+
+
+def lod_baseline(lods, textures, views, camera, count):
+    # Up to count views that used a coarser level, re-rendered at full detail (textures as the view had them)
+    records = [record for record in recorder.views if record.get("lod") and not record.get("cached")][:count]
+
+    def full_detail():
+        lods.apply(0)
+        if textures is not None:
+            textures.apply(textures.select(bpy.context.scene, camera))
+
+    compared = []
+    for record in records:
+        for seconds, stats in baseline_renders(views, camera, [record], full_detail).values():
+            compared.append({
+                "name": record["name"], "lod": record["lod"],
+                "polygons": {"full": lods.polygons[0], "lod": record["polygons"]},
+                "bvh_seconds": {"full": stats.get("bvh_seconds", 0.0),
+                                "lod": record.get("render_stats", {}).get("bvh_seconds", 0.0)},
+                "render_seconds": {"full": seconds, "lod": record["stages"].get("render", 0.0)},
+            })
+    return compared
+
+
+def texture_baseline(textures, lods, views, camera, count, args):
+    # Up to count views that used smaller textures, re-rendered at full resolution (mesh as the view had it)
+    records = [record for record in recorder.views if record.get("texture_level") and not record.get("cached")]
+
+    def full_resolution():
+        textures.restore()
+        if lods is not None:
+            lods.apply(lods.select(bpy.context.scene, camera, args.lod_max_error_px))
+
+    compared = []
+    for record in records[:count]:
+        for seconds, stats in baseline_renders(views, camera, [record], full_resolution).values():
+            compared.append({
+                "name": record["name"], "texture_level": record["texture_level"],
+                "texture_mb": {"full": textures.megabytes(), "levels": record["texture_mb"]},
+                "peak_mb": {"full": stats.get("peak_mb", 0.0),
+                            "levels": record.get("render_stats", {}).get("peak_mb", 0.0)},
+                "render_seconds": {"full": seconds, "levels": record["stages"].get("render", 0.0)},
+            })
+    return compared
+
+
+def lod_summary(lods, compared):
+    # LOD levels used by the views and the full-detail comparison, for the metrics file record
+    records = [record for record in recorder.views if "lod" in record]
+    levels = {}
+    for record in records:
+        levels[str(record["lod"])] = levels.get(str(record["lod"]), 0) + 1
+    polygons = sum(record["polygons"] for record in records) / max(len(records), 1)
+    print(f"LOD: levels used {levels}, {polygons:.0f} polygons per view (full detail {lods.polygons[0]})")
+    for entry in compared:
+        print(f"LOD vs full detail ({entry['name']}, level {entry['lod']}): "
+              f"{entry['polygons']['lod']} vs {entry['polygons']['full']} polygons, "
+              f"BVH {entry['bvh_seconds']['lod']:.2f}s vs {entry['bvh_seconds']['full']:.2f}s, "
+              f"render {entry['render_seconds']['lod']:.1f}s vs {entry['render_seconds']['full']:.1f}s")
+    return {"ratios": lods.ratios, "polygons": lods.polygons, "errors_m": [lods.error_world(n)
+                                                                            for n in range(len(lods.levels))],
+            "build_seconds": lods.build_seconds, "cached": lods.cached, "levels_used": levels,
+            "polygons_per_view": polygons, "baseline": compared}
+
+
+def texture_summary(textures, compared, process_peak_mb):
+    # Texture levels used by the views and the full-resolution comparison, for the metrics file record
+    records = [record for record in recorder.views if "texture_mb" in record]
+    megabytes = sum(record["texture_mb"] for record in records) / max(len(records), 1)
+    print(f"Textures: {megabytes:.0f} MB bound per view (full resolution {textures.megabytes():.0f} MB), "
+          f"process peak {process_peak_mb or 0:.0f} MB resident")
+    for entry in compared:
+        print(f"Texture levels vs full resolution ({entry['name']}, level {entry['texture_level']}): "
+              f"{entry['texture_mb']['levels']:.0f} vs {entry['texture_mb']['full']:.0f} MB of textures, "
+              f"render peak {entry['peak_mb']['levels']:.0f} vs {entry['peak_mb']['full']:.0f} MB, "
+              f"render {entry['render_seconds']['levels']:.1f}s vs {entry['render_seconds']['full']:.1f}s")
+    return {"images": len(textures.levels), "made": textures.made, "build_seconds": textures.build_seconds,
+            "full_mb": textures.megabytes(), "mb_per_view": megabytes,
+            "texels_per_pixel": textures.texels_per_pixel, "baseline": compared}
+
+
+def render_view(filepath, camera, cache=None, writer=None, variant=None):
+    # Render the current scene to filepath, or materialise it from the view cache
+    scene = bpy.context.scene
+    scene.render.filepath = filepath
+    if cache is not None:
+        with stage("cache"):
+            bpy.context.view_layer.update()
+            key = cache.key(scene, camera, variant)
+            hit = cache.fetch(key, filepath)
+        if hit:
+            say(f"View cache hit: {filepath}")
+            return True
+    # Never render into a file that may be hardlinked into the cache
+    if os.path.exists(filepath):
+        os.remove(filepath)
+    with stage("render"):
+        bpy.ops.render.render()
+    with stage("write"):
+        if writer is not None:
+            # The writer reports "Saved image" once the file is flushed and renamed into place
+            writer.submit(filepath, (lambda path: cache.store(key, path)) if cache is not None else None)
+            return False
+        # Same output as write_still=True, timed apart from the render
+        bpy.data.images['Render Result'].save_render(filepath=filepath, scene=scene)
+        if cache is not None:
+            cache.store(key, filepath)
+    return False
+
+
+def report_saved(filepath, seconds=None):
+    # Check if the image was saved
+    timing = f" ({seconds:.1f}s)" if seconds is not None else ""
+    if os.path.exists(filepath):
+        say(f"Saved image: {filepath}{timing}")
+    else:
+        print(f"Failed to save image: {filepath}")
+
+
+def render_views(views, camera, output_dir, cache=None, args=None):
+    # Render the planned views one still at a time, or in a single animation pass with --animation
+    view_outputs.clear()  # render_many.py renders many files in one session
+    if args is not None and args.tune_samples and views:
+        # Tune on the camera's current (default) pose before any view moves it
+        import sample_tuner
+        import view_cache
+        with stage("tune"):
+            sample_tuner.tune_samples(bpy.context.scene, noise_threshold=args.tune_noise,
+                                      probe_percent=args.tune_probe_percent,
+                                      cache_path=os.path.join(output_dir, "sample_tuning.json"),
+                                      scene_hash=view_cache.file_hash(args.blend_file_path), num_views=len(views))
+
+    record_redrawn(views, output_dir)
+
+    # Views on the far side of the vehicle's mirror plane become flipped copies
+    views, mirrored = mirror_views(args, views, camera, output_dir)
+
+    # Decimated levels of the vehicle and downscaled textures, picked per view by its projected size
+    lods = open_lods(args, camera, output_dir) if views else None
+    textures = open_textures(args, camera) if views else None
+    if textures is not None:
+        # Bind the first view's levels, then start a new peak: a cache miss decodes every texture at full
+        # resolution once, and that should not count as what rendering with the levels needs
+        camera.location = views[0]["location"]
+        bpy.context.view_layer.update()
+        textures.apply(textures.select(bpy.context.scene, camera))
+        reset_peak_rss(hold=True)
+
+    start_time = time.time()
+    mode = "still"
+    lod_compared = []
+    texture_compared = []
+    process_peak_mb = None
+    # Blender's render stats line gives peak memory and the sync / path tracing split
+    bpy.app.handlers.render_stats.append(feed_render_stats)
+    try:
+        if args is not None and args.animation and len(views) > 1:
+            # The whole pass is one record: its frames are not timed separately
+            recorder.begin_view(None, "animation")
+            fields, variant = select_animation_detail(views, camera, args, lods, textures)
+            with stage("render"):
+                animated = render_animation(views, camera, output_dir, cache, variant)
+            if animated:
+                mode = "animation"
+                recorder.end_view(**fields)
+            else:
+                recorder.discard_view()
+        if mode == "still":
+            render_stills(views, camera, output_dir, cache, args, lods, textures)
+        # Taken before the baseline renders put full detail back; with textures, it starts after the levels are made
+        process_peak_mb = peak_rss_mb()
+        if lods is not None and args.lod_baseline > 0:
+            with stage("lod_baseline"):
+                lod_compared = lod_baseline(lods, textures, views, camera, args.lod_baseline)
+        if textures is not None and args.texture_baseline > 0:
+            with stage("texture_baseline"):
+                texture_compared = texture_baseline(textures, lods, views, camera, args.texture_baseline, args)
+    finally:
+        bpy.app.handlers.render_stats.remove(feed_render_stats)
+        if lods is not None:
+            lods.restore()
+        if textures is not None:
+            textures.restore()
+    seconds = (time.time() - start_time - recorder.stages.get("lod_baseline", 0.0)
+               - recorder.stages.get("texture_baseline", 0.0))
+    recorder.add("views", seconds)
+    extra = {}
+    if lods is not None:
+        extra["lod"] = lod_summary(lods, lod_compared)
+    if textures is not None:
+        extra["textures"] = texture_summary(textures, texture_compared, process_peak_mb)
+    if mirrored:
+        with stage("mirror"):
+            write_mirrored(mirrored, output_dir)
+        print(f"Mirrored {len(mirrored)} views: ~{len(mirrored) * seconds / max(len(views), 1):.0f}s of rendering saved")
+    if views:
+        print(f"Rendered {len(views)} views in {seconds:.1f}s "
+              f"({seconds / len(views):.2f}s per view, {mode} mode)")
+    if screening is not None and views:
+        # Every screened-out candidate would have cost a full render
+        per_view = seconds / len(views)
+        dropped = screening["candidates"] - screening["selected"]
+        screening["seconds_per_view"] = per_view
+        screening["estimated_seconds_saved"] = dropped * per_view - screening["preview_seconds"]
+        print(f"Screening skipped {dropped} full renders: ~{dropped * per_view:.0f}s saved for "
+              f"{screening['preview_seconds']:.1f}s of previews (net {screening['estimated_seconds_saved']:.0f}s)")
+        with open(os.path.join(output_dir, "screening.json"), "w") as f:
+            json.dump(screening, f, indent=2)
+    if views and not (args is not None and args.plan_out):
+        record = recorder.write(os.path.join(output_dir, metrics.METRICS_NAME),
+                                args.prometheus if args is not None else None,
+                                mode=mode, views=len(views), mirrored=len(mirrored), rss_mb=current_rss_mb(),
+                                peak_rss_mb=process_peak_mb, **extra)
+        print(f"Stage times: {format_stages(record)}")
+    # A planned view that is not on disk fails the file with a non-zero exit, so batch_render.py
+    # reports the job as failed and never records it as up to date
+    missing = sorted(name for name in view_outputs.values() if not os.path.exists(os.path.join(output_dir, name)))
+    if missing:
+        print(f"{len(missing)} of {len(view_outputs)} views were not written: {', '.join(missing)}")
+        sys.exit(1)
+
+
+def format_stages(record):
+    # "open_mainfile 1.2s, plan 0.3s, ..., render sync 4.1s, render path_tracing 52.0s, peak 812 MB"
+    parts = [f"{name} {seconds:.1f}s" for name, seconds in record["stages"].items()]
+    for name, seconds in record["view_stages"].items():
+        if name.startswith("render_"):
+            name = "render " + name[len("render_"):-len("_seconds")]
+        parts.append(f"{name} {seconds:.1f}s")
+    if record.get("peak_mb"):
+        parts.append(f"peak {record['peak_mb']:.0f} MB")
+    return ", ".join(parts)
+
+
+def render_stills(views, camera, output_dir, cache=None, args=None, lods=None, textures=None):
+    # One still per view, each view's stages timed separately
+    global views_rendered
+    writer = open_image_writer(args, bpy.context.scene)
+    for n, view in enumerate(views):
+        recorder.begin_view(view["view"], view["name"])
+        camera.location = view["location"]
+        say(f"Rendering view {n+1}/{len(views)} ({view['name']}) from "
+            f"({camera.location.x:.3f}, {camera.location.y:.3f}, {camera.location.z:.3f})")
+        with stage("update"):
+            bpy.context.view_layer.update()
+        fields, variant = select_detail(camera, args, lods, textures)
+        render_filepath = os.path.join(output_dir, view["name"])
+        if writer is not None:
+            render_filepath = writer.output_path(render_filepath)
+        view_outputs[view["name"]] = os.path.basename(render_filepath)
+        view_start = time.time()
+        cached = False
+        try:
+            cached = render_view(render_filepath, camera, cache, writer, variant)
+            if not cached:
+                views_rendered += 1
+        except Exception as e:
+            # The other views still render; render_views fails the file afterwards
+            print(f"Render failed with error: {e}")
+        if writer is None:
+            report_saved(render_filepath, time.time() - view_start)
+        recorder.end_view(cached=cached, **fields)
+    if writer is not None:
+        writer.close()
+        recorder.add_write_seconds({view["name"]: writer.seconds[path] for view in views
+                                    for path in [writer.output_path(os.path.join(output_dir, view["name"]))]
+                                    if path in writer.seconds})
+
+
+def render_animation(views, camera, output_dir, cache=None, variant=None):
+    # Keyframe every pose on consecutive frames and render them in one pass, so scene sync,
+    # textures and the BVH are built once. Frames are renamed to the usual view file names.
+    global views_rendered
+    scene = bpy.context.scene
+    if camera.animation_data is not None and camera.animation_data.action is not None:
+        print("Camera is already animated; rendering views as stills instead.")
+        return False
+
+    pending = []
+    keys = {}
+    for view in views:
+        render_filepath = os.path.join(output_dir, view["name"])
+        view_outputs[view["name"]] = view["name"]
+        if cache is not None:
+            camera.location = view["location"]
+            bpy.context.view_layer.update()
+            keys[view["name"]] = cache.key(scene, camera, variant)
+            if cache.fetch(keys[view["name"]], render_filepath):
+                say(f"View cache hit: {render_filepath}")
+                continue
+        pending.append(view)
+    if not pending:
+        return True
+
+    first_frame = scene.frame_current
+    saved = (scene.frame_start, scene.frame_end, scene.render.filepath, scene.render.use_persistent_data)
+    for n, view in enumerate(pending):
+        camera.location = view["location"]
+        camera.keyframe_insert(data_path="location", frame=first_frame + n)
+    # Constant interpolation: every frame sits exactly on its planned pose
+    for fcurve in camera.animation_data.action.fcurves:
+        for keyframe in fcurve.keyframe_points:
+            keyframe.interpolation = 'CONSTANT'
+
+    scene.frame_start = first_frame
+    scene.frame_end = first_frame + len(pending) - 1
+    scene.render.use_persistent_data = True
+    scene.render.filepath = os.path.join(output_dir, "animation_frame_")
+    print(f"Rendering {len(pending)} views as frames {scene.frame_start}-{scene.frame_end} with persistent data")
+    try:
+        bpy.ops.render.render(animation=True)
+        for n, view in enumerate(pending):
+            frame_path = scene.render.frame_path(frame=first_frame + n)
+            render_filepath = os.path.join(output_dir, view["name"])
+            if os.path.exists(frame_path):
+                os.replace(frame_path, render_filepath)
+                views_rendered += 1
+                if cache is not None:
+                    cache.store(keys[view["name"]], render_filepath)
+            report_saved(render_filepath)
+    finally:
+        camera.animation_data_clear()
+        scene.frame_start, scene.frame_end, scene.render.filepath, scene.render.use_persistent_data = saved
+        scene.frame_set(first_frame)
+    return True
+
+
+def current_rss_mb():
+    # Resident memory of this Blender process
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def peak_rss_mb():
+    # Peak resident memory of this Blender process so far
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+# Peak from before a reset_peak_rss(hold=True); it still counts towards job_peak_rss_mb()
+held_peak_mb = 0.0
+
+
+def reset_peak_rss(hold=False):
+    # Start a new peak for peak_rss_mb() where the kernel allows it (Linux clear_refs); False if it did not
+    global held_peak_mb
+    held_peak_mb = max(held_peak_mb, peak_rss_mb()) if hold else 0.0
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def job_peak_rss_mb():
+    # Peak since the last reset_peak_rss() without hold, i.e. everything the worker's job needed
+    return max(peak_rss_mb(), held_peak_mb)
+
+
+def reset_session():
+    # Drop everything the previous file loaded and free render buffers, inside the same process
+    for image in bpy.data.images:
+        if image.type == 'RENDER_RESULT':
+            image.buffers_free()
+    bpy.ops.wm.read_homefile(use_empty=True)
+    if hasattr(bpy.data, "orphans_purge"):
+        bpy.data.orphans_purge(do_local_ids=True, do_linked_ids=True, do_recursive=True)
+
+
+def run_script(script, blend_file_path, script_args=()):
+    # Run a class script as if Blender had been started with `--python script -- blend_file_path ...`
+    saved_argv = sys.argv
+    sys.argv = [saved_argv[0], "--", blend_file_path] + list(script_args)
+    try:
+        runpy.run_path(script, run_name="__main__")
+    finally:
+        sys.argv = saved_argv
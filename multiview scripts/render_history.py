@@ -0,0 +1,100 @@
+import json
+import os
+import time
+
+# Per-file render timing history used by batch_render.py to order jobs.
+#
+# Entries are keyed by "<blend path relative to the batch root>|<class script>"
+# and hold the smoothed seconds per view plus the view count, resolution and
+# samples of the last successful run. Jobs we have never seen are estimated
+# from other files rendered with the same class script.
+#
+# Entries also keep the peak resident memory of the Blender worker during the
+# file's last run, which batch_render.py uses to admit jobs within a memory
+# budget. A failed run (often an out-of-memory kill) never lowers it.
+
+# Weight of the newest run when smoothing seconds per view
+SMOOTHING = 0.5
+
+# Used when there is no history at all, so unseen jobs still get an order
+DEFAULT_SECONDS_PER_VIEW = 10.0
+DEFAULT_VIEWS = 31
+
+# Headroom on a file's measured peak memory when admitting it again
+MEMORY_MARGIN = 1.15
+
+
+def history_key(blend_path, script, root):
+    return f"{os.path.relpath(blend_path, root)}|{os.path.basename(script)}"
+
+
+class RenderHistory:
+    def __init__(self, path, root):
+        self.path = path
+        self.root = root
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.entries = json.load(f)
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def record(self, job, result):
+        # Only successful runs that actually rendered something say anything about cost
+        views = result.get("views") or 0
+        if not result.get("ok") or views <= 0:
+            return
+        key = history_key(job["blend"], job["script"], self.root)
+        seconds_per_view = result["seconds"] / views
+        entry = self.entries.get(key)
+        if entry and "seconds_per_view" in entry:
+            seconds_per_view = SMOOTHING * seconds_per_view + (1 - SMOOTHING) * entry["seconds_per_view"]
+        self.entries[key] = dict(entry or {}, **{
+            "seconds_per_view": seconds_per_view,
+            "views": views,
+            "resolution": result.get("resolution"),
+            "samples": result.get("samples"),
+            "runs": (entry or {}).get("runs", 0) + 1,
+            "updated": time.time()
+        })
+
+    def record_memory(self, job, peak_rss_mb, ok):
+        # Peak resident memory of the worker during the job; failed runs only ever raise it
+        if not peak_rss_mb:
+            return
+        key = history_key(job["blend"], job["script"], self.root)
+        entry = self.entries.setdefault(key, {})
+        if not ok:
+            peak_rss_mb = max(peak_rss_mb, entry.get("peak_rss_mb", 0.0))
+        entry["peak_rss_mb"] = peak_rss_mb
+
+    def estimate(self, job):
+        # Estimated seconds for a job: its own history, else the mean for its class script
+        key = history_key(job["blend"], job["script"], self.root)
+        entry = self.entries.get(key)
+        if entry and "seconds_per_view" in entry:
+            return entry["seconds_per_view"] * entry["views"]
+
+        script = os.path.basename(job["script"])
+        timed = {k: e for k, e in self.entries.items() if "seconds_per_view" in e}
+        same_script = [e for k, e in timed.items() if k.endswith("|" + script)]
+        pool = same_script or list(timed.values())
+        if not pool:
+            return DEFAULT_SECONDS_PER_VIEW * DEFAULT_VIEWS
+        seconds_per_view = sum(e["seconds_per_view"] for e in pool) / len(pool)
+        views = sum(e["views"] for e in pool) / len(pool)
+        return seconds_per_view * views
+
+    def memory_estimate(self, job):
+        # Estimated peak MB for a job: its own history, else the largest for its class script, else None
+        key = history_key(job["blend"], job["script"], self.root)
+        entry = self.entries.get(key)
+        if entry and entry.get("peak_rss_mb"):
+            return entry["peak_rss_mb"] * MEMORY_MARGIN
+        script = os.path.basename(job["script"])
+        peaks = [e["peak_rss_mb"] for k, e in self.entries.items() if k.endswith("|" + script) and e.get("peak_rss_mb")]
+        return max(peaks) * MEMORY_MARGIN if peaks else None
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import time
+
+from view_cache import file_hash
+
+# Content-hashed record of what batch_render.py has already rendered.
+#
+# A job is up to date when the hashes of its .blend file, its class script
+# (plus the helper modules every class script imports) and its render
+# parameters all match the last successful run, and the files of that run's
+# planned views are still on disk. The worker reports those file names, so
+# stray files in the output folder never stand in for a missing view. Anything
+# else is re-rendered, with the reason reported.
+
+# Modules the class scripts import, directly or through render_common.py (nadir_warp.py through
+# rotate_and_render.py); a change here affects every render
+SHARED_MODULES = ["render_common.py", "render_plan.py", "sample_tuner.py", "image_writer.py", "framing.py",
+                  "pose_sampler.py", "preview_screen.py", "metrics.py", "view_cache.py",
+                  "symmetry.py", "lod.py", "texture_lod.py", "nadir_warp.py"]
+
+
+def params_hash(params):
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+class RenderManifest:
+    def __init__(self, path, root):
+        self.path = path
+        self.root = root
+        self.entries = {}
+        self.script_hashes = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.entries = json.load(f)
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def key(self, job):
+        return f"{os.path.relpath(job['blend'], self.root)}|{os.path.basename(job['script'])}"
+
+    def blend_hash(self, job):
+        # Re-use the stored hash while size and mtime are unchanged; .blend files are large
+        stat = os.stat(job["blend"])
+        entry = self.entries.get(self.key(job), {})
+        if entry.get("blend_stat") == [stat.st_size, stat.st_mtime_ns]:
+            return entry["blend_hash"], entry["blend_stat"]
+        return file_hash(job["blend"]), [stat.st_size, stat.st_mtime_ns]
+
+    def script_hash(self, script):
+        if script not in self.script_hashes:
+            digest = hashlib.sha256(file_hash(script).encode())
+            for module in SHARED_MODULES:
+                module_path = os.path.join(os.path.dirname(script), module)
+                if os.path.exists(module_path):
+                    digest.update(file_hash(module_path).encode())
+            self.script_hashes[script] = digest.hexdigest()
+        return self.script_hashes[script]
+
+    def stale_reasons(self, job):
+        # Empty list means the job's outputs are up to date
+        entry = self.entries.get(self.key(job))
+        if entry is None:
+            return ["never rendered"]
+        reasons = []
+        if self.blend_hash(job)[0] != entry["blend_hash"]:
+            reasons.append("blend file changed")
+        if self.script_hash(job["script"]) != entry["script_hash"]:
+            reasons.append("render script changed")
+        if params_hash(job["params"]) != entry["params_hash"]:
+            reasons.append(f"render parameters changed ({entry.get('params')} -> {job['params']})")
+        missing = []
+        for name, size in entry["outputs"].items():
+            path = os.path.join(job["output_dir"], name)
+            if not os.path.isfile(path) or os.path.getsize(path) != size:
+                missing.append(name)
+        if not entry["outputs"]:
+            reasons.append("no outputs recorded")
+        elif missing:
+            reasons.append(f"{len(missing)} output files missing or changed")
+        return reasons
+
+    def record(self, job, names):
+        # names: output files of the views the job was planned to write; one missing keeps the job stale
+        blend_hash, blend_stat = self.blend_hash(job)
+        script_hash = self.script_hash(job["script"])
+        entry = self.entries.get(self.key(job), {})
+        inputs = (blend_hash, script_hash, params_hash(job["params"]))
+        outputs = {}
+        if (entry.get("blend_hash"), entry.get("script_hash"), entry.get("params_hash")) == inputs:
+            # Same inputs (a --redo of some views): the other views are still part of the output
+            outputs = dict(entry["outputs"])
+        for name in names:
+            path = os.path.join(job["output_dir"], name)
+            outputs[name] = os.path.getsize(path) if os.path.isfile(path) else None
+        self.entries[self.key(job)] = {
+            "blend_hash": blend_hash,
+            "blend_stat": blend_stat,
+            "script_hash": script_hash,
+            "params": job["params"],
+            "params_hash": params_hash(job["params"]),
+            "outputs": outputs,
+            "rendered": time.time()
+        }
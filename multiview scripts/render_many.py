@@ -0,0 +1,105 @@
+import bpy
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import traceback
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import render_common
+
+# Render many .blend files in a single Blender session.
+#
+#   blender --background --python render_many.py -- --script render_truck_xy.py "truck/*_xy.blend" -- --seed 7
+#
+# Each file is opened in turn and rendered by the class script. Between files
+# the session is reset, orphan data-blocks are purged and render buffers are
+# freed, so start-up, add-on registration and imports are paid once. Load time
+# and resident memory are logged per file to check that memory stays flat.
+# Anything after a second '--' is passed through to the class script.
+
+argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+script_args = []
+if "--" in argv:
+    script_args = argv[argv.index("--") + 1:]
+    argv = argv[:argv.index("--")]
+
+parser = argparse.ArgumentParser(prog="render_many.py")
+parser.add_argument("--script", required=True, help="Class render script to run for every file")
+parser.add_argument("blend_files", nargs="+", help=".blend files or glob patterns")
+parser.add_argument("--log", default=None, help="Append one JSON line per file to this log")
+args = parser.parse_args(argv)
+
+# Expand globs ourselves so quoting the pattern keeps the shell from hitting argument limits
+blend_files = []
+for pattern in args.blend_files:
+    matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+    blend_files += [path for path in matches if not os.path.basename(path).startswith("temp_")]
+if not blend_files:
+    raise ValueError("No .blend files matched.")
+script = os.path.abspath(args.script) if os.path.exists(args.script) else \
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), args.script)
+print(f"Rendering {len(blend_files)} files with {os.path.basename(script)} in one session")
+
+# Time the open_mainfile call the class script makes
+load_times = {}
+
+
+@bpy.app.handlers.persistent
+def load_started(*_):
+    load_times["start"] = time.time()
+
+
+@bpy.app.handlers.persistent
+def load_finished(*_):
+    load_times["seconds"] = time.time() - load_times.get("start", time.time())
+
+
+bpy.app.handlers.load_pre.append(load_started)
+bpy.app.handlers.load_post.append(load_finished)
+
+baseline_rss = render_common.current_rss_mb()
+failed = []
+for index, blend_file_path in enumerate(blend_files):
+    load_times.clear()
+    start_time = time.time()
+    ok = True
+    try:
+        render_common.run_script(script, blend_file_path, script_args)
+    except SystemExit as e:
+        ok = e.code in (None, 0)
+    except Exception:
+        traceback.print_exc()
+        ok = False
+    seconds = time.time() - start_time
+    load_seconds = load_times.get("seconds")
+    peak_rss = render_common.current_rss_mb()
+
+    # Reclaim memory before the next file (read_homefile fires the load handlers too)
+    render_common.reset_session()
+    rss = render_common.current_rss_mb()
+
+    if not ok:
+        failed.append(blend_file_path)
+    record = {
+        "file": blend_file_path,
+        "ok": ok,
+        "load_seconds": load_seconds,
+        "seconds": seconds,
+        "rss_before_reset_mb": peak_rss,
+        "rss_mb": rss,
+        "rss_growth_mb": rss - baseline_rss
+    }
+    load_text = f"{load_seconds:.2f}s" if load_seconds is not None else "n/a"
+    print(f"[{index + 1}/{len(blend_files)}] {os.path.basename(blend_file_path)}: "
+          f"{'ok' if ok else 'FAILED'}, load {load_text}, "
+          f"total {seconds:.1f}s, RSS {rss:.0f} MB after reset ({rss - baseline_rss:+.0f} MB since start)")
+    if args.log:
+        with open(args.log, "a") as log:
+            log.write(json.dumps(record) + "\n")
+
+print(f"Single-session rendering complete: {len(blend_files) - len(failed)} ok, {len(failed)} failed")
+for blend_file_path in failed:
+    print(f"Failed: {blend_file_path}")
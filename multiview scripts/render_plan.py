@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+import random
+import re
+
+# Render plans: every (blend file, view index, camera pose, render settings)
+# of a batch, one JSON object per line.
+#
+# Plans are generated from per-file seeded random streams, so the same seed
+# and the same .blend files give the same plan on any machine. A plan sorted
+# by (blend, view) can then be cut into N contiguous shards; each node renders
+# its slice and together they produce exactly the single-node dataset.
+#
+# This module does not import bpy: batch_render.py uses it outside Blender and
+# the class scripts use it through render_common.py.
+
+# The view number in a view file name, e.g. render_view_0047.png
+VIEW_NUMBER_RE = re.compile(r"(\d+)\.\w+$")
+
+
+def rng_for(blend_file_path, seed):
+    # Independent random stream per file, keyed on the file name rather than its location
+    if seed is None:
+        return random.Random()
+    digest = hashlib.sha256(f"{seed}:{os.path.basename(blend_file_path)}".encode()).hexdigest()
+    return random.Random(int(digest[:16], 16))
+
+
+def plan_key(blend_file_path, root):
+    # Identifies a file in the plan the same way on every node
+    return os.path.relpath(blend_file_path, root).replace(os.sep, "/")
+
+
+def sort_key(entry):
+    return entry["blend"], entry["view"]
+
+
+def load_plan(path):
+    with open(path) as f:
+        return sorted((json.loads(line) for line in f if line.strip()), key=sort_key)
+
+
+def write_plan(path, entries):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        for entry in sorted(entries, key=sort_key):
+            f.write(json.dumps(entry, sort_keys=True) + "\n")
+    os.replace(tmp_path, path)
+
+
+def parse_shard(text):
+    # "i/N" with 0 <= i < N
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise ValueError(f"Shard must look like i/N, got {text!r}")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Shard index must be in 0..{count - 1}, got {text!r}")
+    return index, count
+
+
+def shard_entries(entries, index, count):
+    # Contiguous, view-balanced slice of the sorted plan; a file is split across at most two shards
+    entries = sorted(entries, key=sort_key)
+    start = len(entries) * index // count
+    end = len(entries) * (index + 1) // count
+    return entries[start:end]
+
+
+def renumber_view_name(name, index):
+    # "render_view_0047.png" -> "render_view_0003.png" for index 3, keeping the digit width
+    match = VIEW_NUMBER_RE.search(name)
+    if match is None:
+        return name
+    digits = match.group(1)
+    return f"{name[:match.start(1)]}{index:0{len(digits)}d}{name[match.end(1):]}"
+
+
+def view_stem(name):
+    # "render_view_003.exr" -> "render_view_003": plan view names always end in .png, while the
+    # written files take the extension of --output-format
+    return os.path.splitext(name)[0]
+
+
+def load_failures(path):
+    # {plan key: {view stem: set of failed checks}} from a validate_renders.py failure list
+    failures = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                failures.setdefault(entry["blend"], {}).setdefault(view_stem(entry["name"]), set()).update(
+                    entry.get("reasons", {}))
+    return failures
+
+
+def match_failures(views, failures):
+    # {view name: failed checks} for the views whose output file failed, whatever its extension
+    return {view["name"]: failures[view_stem(view["name"])] for view in views if view_stem(view["name"]) in failures}
+
+
+def entries_hash(entries):
+    return hashlib.sha256(json.dumps(sorted(entries, key=sort_key), sort_keys=True).encode()).hexdigest()
@@ -1,16 +1,15 @@
 import bpy
 import math
-import random
 import os
 import shutil
 import sys
 
-# Get the Blender file path from the command line arguments
-if len(sys.argv) < 2:
-    raise ValueError("Please provide the Blender file path as an argument.")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import render_common
 
-# Blender command line arguments start after '--'
-blend_file_path = sys.argv[sys.argv.index("--") + 1]
+# Get the Blender file path (and optional render parameters) from the command line arguments
+args = render_common.parse_args(num_renders=30)
+blend_file_path = args.blend_file_path
 print(f"Original Blender file path: {blend_file_path}")
 
 # Create a copy of the Blender file for rendering
@@ -25,7 +24,7 @@ bpy.ops.wm.open_mainfile(filepath=temp_blend_file_path)
 print("Copied Blender file loaded successfully.")
 
 # Number of images to render (excluding the default view)
-num_renders = 30
+num_renders = args.num_renders
 
 # Directory to save the rendered images
 output_dir = os.path.join(blend_file_dir, f"{blend_file_name}_renders")
@@ -37,13 +36,14 @@ camera = bpy.data.objects.get('Camera')
 if camera is None:
     raise ValueError("No camera named 'Camera' found in the scene.")
 
-# Render the default view first
-print("Rendering default view...")
-default_view_filepath = os.path.join(output_dir, "default_view.png")
-bpy.context.scene.render.image_settings.file_format = 'PNG'
-bpy.context.scene.render.filepath = default_view_filepath
-bpy.ops.render.render(write_still=True)
-print(f"Default view saved as: {default_view_filepath}")
+# Reuse views already rendered from the same scene, pose and settings
+cache = render_common.open_view_cache(args, blend_file_path)
+
+# Per-file random stream: the same --seed and file always give the same poses
+rng = render_common.rng_for(blend_file_path, args.seed)
+
+# Check each drawn pose by projecting the vehicle's bounding box before paying for a render
+framing = render_common.open_framing_check(args, camera)
 
 # Initial Y and Z coordinates (keep Z constant)
 initial_y = camera.location.y
@@ -70,53 +70,58 @@ for i in range(num_random_positions):
     section = i % 4
     
     # Apply random Y variation
-    y_variation = random.uniform(-1, 0.5)
+    y_variation = rng.uniform(-1, 0.5)
     
     # Calculate position along the circle, not directly on the axes
     if section == 0:  # Between (0, y) and (y, 0)
-        a = random.uniform(0, initial_y)
+        a = rng.uniform(0, initial_y)
         pos = (a, initial_y - a + y_variation)
     elif section == 1:  # Between (y, 0) and (0, -y)
-        a = random.uniform(0, initial_y)
+        a = rng.uniform(0, initial_y)
         pos = (initial_y - a, -a + y_variation)
     elif section == 2:  # Between (0, -y) and (-y, 0)
-        a = random.uniform(0, initial_y)
+        a = rng.uniform(0, initial_y)
         pos = (-a, -initial_y + a + y_variation)
     else:  # Between (-y, 0) and (0, y)
-        a = random.uniform(0, initial_y)
+        a = rng.uniform(0, initial_y)
         pos = (-initial_y + a, a + y_variation)
     
     random_positions.append(pos)
 
 # Combine predefined positions and random positions
 all_positions = random_positions + axes_positions
-random.shuffle(all_positions)  # Shuffle to mix predefined and random positions
+rng.shuffle(all_positions)  # Shuffle to mix predefined and random positions
+
+# Plan every view before rendering: the default view first, then the positions with extra jitter
+views = [render_common.plan_view(-1, "default_view.png", camera.location)]
+for i, (base_x, base_y) in enumerate(all_positions):
+    def draw_pose():
+        # Apply additional random Y variation to avoid exact duplication of positions
+        # y = base_y + rng.uniform(-1, 1)
+        y = base_y + rng.uniform(-1, 0.5)
+        z = initial_z + rng.uniform(-0.5, 0.5)  # Keep Z constant
+        return base_x, y, z
+
+    # Redraw poses that would leave the vehicle partly out of frame or too small
+    x, y, z = render_common.sample_pose(framing, draw_pose)
+    views.append(render_common.plan_view(i, f"render_view_{i:04d}.png", (x, y, z)))
+
+# Swap in low-discrepancy poses with --sampler coverage and report how well the views cover the vehicle
+views = render_common.coverage_views(args, rng, views, (0, 0, 0), (abs(initial_y) / math.sqrt(2), abs(initial_y)),
+                                     (initial_z - 0.5, initial_z + 0.5), lambda i: f"render_view_{i:04d}.png", framing)
+if framing is not None:
+    print(framing.summary())
+
+# Write the plan and stop, or keep only the views a plan assigns to this file
+views = render_common.select_views(args, views)
+bpy.context.scene.render.image_settings.file_format = 'PNG'
 
 # Render images at these positions
-for i, (x, y) in enumerate(all_positions):
-    # Apply additional random Y variation to avoid exact duplication of positions
-    # y += random.uniform(-1, 1)
-    y += random.uniform(-1, 0.5)
-    
-    # Set the camera position
-    camera.location.x = x
-    camera.location.y = y
-    camera.location.z = initial_z + random.uniform(-0.5, 0.5) # Keep Z constant
-
-    print(f"Camera position for render {i+1}: ({camera.location.x}, {camera.location.y}, {camera.location.z})")
-
-    # Update the scene to apply the new camera position
-    bpy.context.view_layer.update()
-
-    # Set the render settings
-    render_filepath = os.path.join(output_dir, f"render_view_{i:04d}.png")
-    bpy.context.scene.render.filepath = render_filepath
-
-    # Render the image
-    bpy.ops.render.render(write_still=True)
-    print(f"Rendered image {i+1} saved to {render_filepath}")
+render_common.render_views(views, camera, output_dir, cache, args)
 
 print("Rendering complete!")
+if cache is not None:
+    print(cache.summary())
 
 # Clean up: Delete the temporary Blender file
 os.remove(temp_blend_file_path)
@@ -0,0 +1,93 @@
+import bpy
+import json
+import os
+import sys
+import time
+import traceback
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import render_common
+
+# Long-lived headless Blender worker used by batch_render.py.
+#
+# Started once as:
+#   blender --background --python render_worker.py -- <worker_id>
+# it reads one JSON job per line on stdin, runs the class render script inside
+# this Blender session and answers with one JSON line on stdout. Everything the
+# render scripts print still goes to stdout, so our own messages carry a prefix
+# the orchestrator can pick out.
+WORKER_MSG = "@@street2air-worker "
+
+argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+worker_id = argv[0] if argv else "0"
+
+
+def send(message):
+    sys.stdout.write(WORKER_MSG + json.dumps(message) + "\n")
+    sys.stdout.flush()
+
+
+def scene_settings():
+    # Resolution and sample count of the scene the job left loaded
+    scene = bpy.context.scene
+    render = scene.render
+    if render.engine == 'CYCLES':
+        samples = scene.cycles.samples
+    elif hasattr(scene, "eevee"):
+        samples = scene.eevee.taa_render_samples
+    else:
+        samples = None
+    scale = render.resolution_percentage / 100.0
+    return {
+        "resolution": [int(render.resolution_x * scale), int(render.resolution_y * scale)],
+        "samples": samples,
+        "engine": render.engine
+    }
+
+
+send({"event": "ready", "worker": worker_id, "pid": os.getpid(), "rss_mb": render_common.current_rss_mb()})
+
+for line in sys.stdin:
+    line = line.strip()
+    if not line:
+        continue
+    job = json.loads(line)
+    if job.get("command") == "stop":
+        break
+
+    start_time = time.time()
+    # Only planned views count, so the batch driver learns seconds per view without previews and probes
+    render_common.views_rendered = 0
+    render_common.view_outputs.clear()
+    # Peak memory of this job alone, so batch_render.py can learn what each file needs
+    peak_reset = render_common.reset_peak_rss()
+    result = {"event": "result", "worker": worker_id, "id": job.get("id"), "ok": True}
+    try:
+        render_common.run_script(job["script"], job["blend"], job.get("args", []))
+    except SystemExit as e:
+        # A script calling sys.exit(0) finished normally; anything else is a failure
+        if e.code not in (None, 0):
+            result.update(ok=False, error=f"SystemExit({e.code})")
+    except Exception as e:
+        traceback.print_exc()
+        result.update(ok=False, error=f"{type(e).__name__}: {e}")
+    result["seconds"] = time.time() - start_time
+    result["views"] = render_common.views_rendered
+    # The files the job's planned views were written to, for batch_render.py's manifest
+    result["outputs"] = sorted(render_common.view_outputs.values())
+    try:
+        result.update(scene_settings())
+    except Exception as e:
+        print(f"Could not read scene settings: {e}")
+
+    if peak_reset:
+        result["peak_rss_mb"] = render_common.job_peak_rss_mb()
+    try:
+        render_common.reset_session()
+    except Exception as e:
+        print(f"Session reset failed: {e}")
+        result["reset_failed"] = True
+    result["rss_mb"] = render_common.current_rss_mb()
+    send(result)
+
+send({"event": "stopped", "worker": worker_id})
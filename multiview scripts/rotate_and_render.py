@@ -1,7 +1,14 @@
 import bpy
+import argparse
+import json
 import math
 import os
 import sys
+from mathutils import Vector
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import nadir_warp
+import symmetry
 
 # Function to convert feet to meters (assuming 1 Blender unit = 1 meter)
 def feet_to_meters(feet):
@@ -16,8 +23,34 @@ argv = sys.argv
 if "--" in argv:
     argv = argv[argv.index("--") + 1:]
 
-blend_file_path = argv[0]
-rotation_interval = int(argv[1])  # Rotation interval in degrees
+parser = argparse.ArgumentParser(prog="rotate_and_render.py")
+parser.add_argument("blend_file_path", help="Blender file to render")
+parser.add_argument("rotation_interval", type=int, help="Rotation interval in degrees")
+parser.add_argument("--symmetric", action="store_true",
+                    help="Render only one of each pair of mirror-image rotations and write the other flipped, "
+                         "if a probe render shows the vehicle is symmetric")
+parser.add_argument("--symmetry-min-iou", type=float, default=0.97,
+                    help="Smallest silhouette IoU between a probe and its flipped mirror")
+parser.add_argument("--symmetry-max-error", type=float, default=0.05,
+                    help="Largest relative colour error between a probe and its flipped mirror")
+parser.add_argument("--symmetry-tolerance", type=float, default=1.0,
+                    help="Degrees a mirrored rotation may be off the rotation grid (and the camera's view plane "
+                         "off the object's pivot) for a position to use mirroring")
+parser.add_argument("--nadir-warp", action="store_true",
+                    help="With a top-down camera, render each unique view once and produce the moved and rotated "
+                         "views by 2D warps, once a few true renders confirm the warps match")
+parser.add_argument("--nadir-tolerance", type=float, default=1.0,
+                    help="Degrees the camera may be off straight down for --nadir-warp")
+parser.add_argument("--warp-checks", type=int, default=2,
+                    help="True renders compared against their warps for each kind of warp")
+parser.add_argument("--warp-min-iou", type=float, default=0.98,
+                    help="Smallest silhouette IoU between a warp and the true render")
+parser.add_argument("--warp-max-error", type=float, default=0.02,
+                    help="Largest relative colour error between a warp and the true render")
+args = parser.parse_args(argv)
+
+blend_file_path = args.blend_file_path
+rotation_interval = args.rotation_interval  # Rotation interval in degrees
 
 # Load the Blender file
 bpy.ops.wm.open_mainfile(filepath=blend_file_path)
@@ -45,31 +78,236 @@ positions = [
     (0, 8, 0)
 ]
 
-# Iterate over the specified positions
-for position_index, position in enumerate(positions):
-    # Move the car to the new position
-    tracked_object.location = position
+angles = list(range(0, 360, rotation_interval))
+
 
-    # Render the car at different rotations
-    for angle in range(0, 360, rotation_interval):
-        # Set the rotation (around Z-axis)
-        tracked_object.rotation_euler[2] = math.radians(angle)
+def render_filepath_for(position_index, position, angle):
+    return os.path.join(output_dir, f"render_pos_{position_index}_angle_{angle:03d}_loc_{position[0]:.2f}_{position[1]:.2f}.png")
 
-        # Update the scene
-        bpy.context.view_layer.update()
 
-        # Set render settings
-        bpy.context.scene.render.image_settings.file_format = 'PNG'
-        render_filepath = os.path.join(output_dir, f"render_pos_{position_index}_angle_{angle:03d}_loc_{position[0]:.2f}_{position[1]:.2f}.png")
-        bpy.context.scene.render.filepath = render_filepath
+def mirror_angles(position):
+    # {derived angle: source angle} for the car at position, or None when mirroring cannot apply there.
+    #
+    # Reflecting the scene across the vertical plane through the camera's view direction flips the
+    # image left to right. If that plane passes through the car's pivot, the reflected (symmetric)
+    # car is the same car turned to 2 * (view azimuth - long axis azimuth) - angle.
+    scene = bpy.context.scene
+    camera = scene.camera
+    forward = camera.matrix_world.to_quaternion() @ Vector((0.0, 0.0, -1.0))
+    if math.hypot(forward.x, forward.y) < 1e-3:
+        return None  # Looking straight down: every vertical plane contains the view direction
+    view_azimuth = math.degrees(math.atan2(forward.y, forward.x))
+    normal = Vector((-forward.y, forward.x, 0.0)).normalized()
+    offset = Vector(position) - camera.matrix_world.translation
+    if abs(offset.dot(normal)) > offset.length * math.sin(math.radians(args.symmetry_tolerance)):
+        return None
 
-        # Render the image
-        bpy.ops.render.render(write_still=True)
+    tracked_object.rotation_euler[2] = 0.0
+    bpy.context.view_layer.update()
+    plane = symmetry.mirror_plane(scene, camera, tracked_object)
+    if plane is None:
+        return None
+    _, (nx, ny, _) = plane
+    long_axis_azimuth = math.degrees(math.atan2(ny, nx)) - 90.0
+    turn = (2 * (view_azimuth - long_axis_azimuth)) % 360
+    steps = round(turn / rotation_interval)
+    if abs(turn - steps * rotation_interval) > args.symmetry_tolerance or 360 % rotation_interval:
+        return None
+    turn = (steps * rotation_interval) % 360
+    derived = {}
+    for angle in angles:
+        partner = (turn - angle) % 360
+        if partner < angle:
+            derived[angle] = partner
+    return derived
 
-        # Check if the image was saved
-        if os.path.exists(render_filepath):
-            print(f"Saved image: {render_filepath}")
+
+# Decide which rotations to render at each position
+# A top-down camera is handled by 2D warps instead (see warp_views below)
+use_warps = args.nadir_warp and nadir_warp.is_nadir(bpy.context.scene.camera, args.nadir_tolerance)
+if args.nadir_warp and not use_warps:
+    print("Nadir warp: the camera is not looking straight down; rendering every view")
+
+mirrored = {}
+if args.symmetric and not use_warps:
+    for position_index, position in enumerate(positions):
+        tracked_object.location = position
+        derived = mirror_angles(position)
+        if derived:
+            mirrored[position_index] = derived
         else:
-            print(f"Failed to save image: {render_filepath}")
+            print(f"Position {position_index}: the camera's view plane misses the car or the mirrored rotations "
+                  f"are off the {rotation_interval} degree grid; rendering every rotation")
+    if mirrored:
+        # Probe the first position that can mirror: two rotations against their mirrored rotations
+        position_index = next(iter(mirrored))
+        derived = sorted(mirrored[position_index].items())
+
+        def rotate(position, angle):
+            def apply():
+                tracked_object.location = position
+                tracked_object.rotation_euler[2] = math.radians(angle)
+            return apply
+
+        position = positions[position_index]
+        pairs = [(rotate(position, source), rotate(position, angle))
+                 for angle, source in (derived[0], derived[len(derived) // 2])]
+        check = symmetry.check_symmetry(bpy.context.scene, pairs, min_iou=args.symmetry_min_iou,
+                                        max_error=args.symmetry_max_error)
+        if not check["symmetric"]:
+            mirrored = {}
+        with open(os.path.join(output_dir, "symmetry.json"), "w") as f:
+            json.dump({"check": check, "mirrored": {
+                os.path.basename(render_filepath_for(index, positions[index], angle)):
+                    os.path.basename(render_filepath_for(index, positions[index], source))
+                for index, derived in mirrored.items() for angle, source in derived.items()}}, f, indent=2)
+
+def render_image(position_index, position, angle):
+    # Move the car to the position and rotation, and render it for real
+    tracked_object.location = position
+
+    # Set the rotation (around Z-axis)
+    tracked_object.rotation_euler[2] = math.radians(angle)
+
+    # Update the scene
+    bpy.context.view_layer.update()
+
+    # Set render settings
+    bpy.context.scene.render.image_settings.file_format = 'PNG'
+    render_filepath = render_filepath_for(position_index, position, angle)
+    bpy.context.scene.render.filepath = render_filepath
+
+    # Render the image
+    bpy.ops.render.render(write_still=True)
+
+    # Check if the image was saved
+    if os.path.exists(render_filepath):
+        print(f"Saved image: {render_filepath}")
+    else:
+        print(f"Failed to save image: {render_filepath}")
+    return render_filepath
+
+
+def warp_views():
+    # With a top-down camera: render each unique view once and warp it into the other views
+    scene = bpy.context.scene
+    camera = scene.camera
+    ortho = camera.data.type == 'ORTHO'
+    rendered = {}
+
+    def true_render(position_index, angle):
+        if (position_index, angle) not in rendered:
+            rendered[(position_index, angle)] = render_image(position_index, positions[position_index], angle)
+        return rendered[(position_index, angle)]
+
+    sources = {}
+
+    def source(position_index):
+        # (image, mapping) of the car's render at rotation 0 at position_index; None if it cannot be warped
+        if position_index not in sources:
+            path = true_render(position_index, 0)
+            image = nadir_warp.load_rgba(path) if os.path.exists(path) else None
+            if image is None or nadir_warp.touches_edge(image):
+                sources[position_index] = None
+            else:
+                sources[position_index] = (image, nadir_warp.ground_mapping(scene, camera, positions[position_index]))
+        return sources[position_index]
+
+    def predict(position_index, angle, base_index):
+        image, mapping = source(base_index)
+        translation = [positions[position_index][i] - positions[base_index][i] for i in range(2)]
+        matrix, shift = nadir_warp.image_warp(mapping, angle, translation)
+        return nadir_warp.warp_rgba(image, mapping, matrix, shift)
+
+    def verify(views, base_index):
+        # Render views for real and compare them with their warps; returns (passed, comparisons)
+        comparisons = []
+        for position_index, angle in views:
+            if source(base_index) is None:
+                return False, comparisons
+            predicted = predict(position_index, angle, base_index)
+            actual = nadir_warp.load_rgba(true_render(position_index, angle))
+            iou, error = symmetry.compare(actual, predicted)
+            comparisons.append({"position": position_index, "angle": angle, "iou": iou, "error": error})
+            print(f"Nadir warp check: position {position_index}, {angle} degrees: silhouette IoU {iou:.4f}, "
+                  f"colour error {error:.4f}")
+        passed = bool(comparisons) and all(item["iou"] >= args.warp_min_iou and item["error"] <= args.warp_max_error
+                                           for item in comparisons)
+        return passed, comparisons
+
+    # Spins are exact under an orthographic camera, and under a perspective one for a pivot on the optical axis
+    spin_positions = [index for index, position in enumerate(positions)
+                      if ortho or nadir_warp.on_axis(scene, camera, position)]
+    spin_ok, moves_ok = False, False
+    checks = {}
+    turned = [angle for angle in angles if angle % 90] or angles[1:]
+    if spin_positions and turned:
+        picks = [turned[(n * len(turned)) // max(args.warp_checks, 1)] for n in range(max(args.warp_checks, 1))]
+        spin_ok, checks["rotation"] = verify([(spin_positions[0], angle) for angle in dict.fromkeys(picks)],
+                                             spin_positions[0])
+    if ortho and len(positions) > 1:
+        moved = list(range(1, len(positions)))[:max(args.warp_checks, 1)]
+        views = [(index, 0) for index in moved]
+        if spin_ok and turned:
+            views.append((moved[-1], turned[len(turned) // 2]))  # A move and a spin together
+        moves_ok, checks["translation"] = verify(views, 0)
+    print(f"Nadir warp: {'orthographic' if ortho else 'perspective'} top-down camera, "
+          f"rotations {'warped' if spin_ok else 'rendered'}, moves {'warped' if moves_ok else 'rendered'}")
+
+    warped = {}
+    compression = scene.render.image_settings.compression
+    for position_index, position in enumerate(positions):
+        for angle in angles:
+            if (position_index, angle) in rendered:
+                continue
+            base_index = None
+            if moves_ok and source(0) is not None:
+                base_index = 0
+            elif spin_ok and position_index in spin_positions and source(position_index) is not None:
+                base_index = position_index
+            if base_index is None:
+                true_render(position_index, angle)
+                continue
+            render_filepath = render_filepath_for(position_index, position, angle)
+            nadir_warp.save_png(render_filepath, predict(position_index, angle, base_index), compression)
+            warped[os.path.basename(render_filepath)] = {
+                "source": os.path.basename(render_filepath_for(base_index, positions[base_index], 0)),
+                "angle": angle,
+                "translation": [positions[position_index][i] - positions[base_index][i] for i in range(2)]}
+            print(f"Saved image: {render_filepath} (warped)")
+
+    with open(os.path.join(output_dir, "nadir_warp.json"), "w") as f:
+        json.dump({"orthographic": ortho, "rotations_warped": spin_ok, "moves_warped": moves_ok, "checks": checks,
+                   "rendered": len(rendered), "warped": warped}, f, indent=2)
+    print(f"Nadir warp: {len(rendered)} views rendered, {len(warped)} warped "
+          f"(of {len(positions) * len(angles)})")
+
+
+if use_warps:
+    warp_views()
+else:
+    # Iterate over the specified positions
+    for position_index, position in enumerate(positions):
+        derived = mirrored.get(position_index, {})
+
+        # Render the car at different rotations
+        for angle in angles:
+            if angle in derived:
+                continue  # Written below as the flipped image of its mirrored rotation
+            render_image(position_index, position, angle)
+
+        # Mirrored rotations are the rendered ones flipped left to right
+        for angle, source in sorted(derived.items()):
+            render_filepath = render_filepath_for(position_index, position, angle)
+            source_filepath = render_filepath_for(position_index, position, source)
+            if os.path.exists(source_filepath):
+                symmetry.flip_image(source_filepath, render_filepath)
+            if os.path.exists(render_filepath):
+                print(f"Saved image: {render_filepath} (mirrored from {os.path.basename(source_filepath)})")
+            else:
+                print(f"Failed to save image: {render_filepath}")
 
+if mirrored:
+    count = sum(len(derived) for derived in mirrored.values())
+    print(f"Symmetric mode: {count} of {len(positions) * len(angles)} images mirrored instead of rendered")
 print(f"Rendering complete! Images saved in: {output_dir}")
@@ -0,0 +1,170 @@
+import bpy
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+# Per-scene sample-count tuning for the render_*.py class scripts.
+#
+# Renders a low-resolution probe of the current (default) camera view with the
+# settings the .blend was saved with as the reference, then with increasing
+# sample counts (with and without denoising). Noise is the RMSE against the
+# reference over the vehicle's pixels only (reference alpha > 0.5), relative to
+# their mean value. The cheapest probe under the threshold wins and is applied
+# to every view of the scene.
+
+SAMPLE_LADDER = [16, 32, 64, 128, 256, 512, 1024, 2048]
+
+# Overridden for the trial renders only: a time limit would cut trials short, but the file keeps its own
+TRIAL_ONLY = ("time_limit",)
+
+
+def get_samples(scene):
+    if scene.render.engine == 'CYCLES':
+        return scene.cycles.samples
+    return scene.eevee.taa_render_samples
+
+
+def current_settings(scene):
+    # Everything apply_settings() can change, so the file's own settings can be restored exactly
+    settings = {"samples": get_samples(scene)}
+    if scene.render.engine == 'CYCLES':
+        settings["denoise"] = scene.cycles.use_denoising
+        settings["adaptive"] = scene.cycles.use_adaptive_sampling
+        settings["adaptive_threshold"] = scene.cycles.adaptive_threshold
+        settings["time_limit"] = scene.cycles.time_limit
+    return settings
+
+
+def apply_settings(scene, settings):
+    # Only the settings given are changed; the rest keep what the scene has
+    if scene.render.engine == 'CYCLES':
+        scene.cycles.samples = settings["samples"]
+        if "denoise" in settings:
+            scene.cycles.use_denoising = settings["denoise"]
+        if "adaptive" in settings:
+            scene.cycles.use_adaptive_sampling = settings["adaptive"]
+        if "adaptive_threshold" in settings:
+            scene.cycles.adaptive_threshold = settings["adaptive_threshold"]
+        if "time_limit" in settings:
+            scene.cycles.time_limit = settings["time_limit"]
+    else:
+        scene.eevee.taa_render_samples = settings["samples"]
+
+
+def candidates(scene, reference_samples):
+    # Cheapest first; Cycles also tries the denoiser at every sample count
+    for samples in SAMPLE_LADDER:
+        if samples >= reference_samples:
+            break
+        if scene.render.engine == 'CYCLES':
+            yield {"samples": samples, "denoise": False, "adaptive": True, "time_limit": 0}
+            yield {"samples": samples, "denoise": True, "adaptive": True, "time_limit": 0}
+        else:
+            yield {"samples": samples}
+
+
+def render_probe(scene, probe_dir, name):
+    # Render one float EXR probe and return (RGBA array, seconds)
+    filepath = os.path.join(probe_dir, f"{name}.exr")
+    scene.render.filepath = filepath
+    start_time = time.time()
+    bpy.ops.render.render(write_still=True)
+    seconds = time.time() - start_time
+    image = bpy.data.images.load(filepath)
+    pixels = np.empty(image.size[0] * image.size[1] * 4, dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    bpy.data.images.remove(image)
+    return pixels.reshape(-1, 4), seconds
+
+
+def relative_noise(probe, reference):
+    # RMSE over the vehicle's pixels, relative to their mean reference value
+    mask = reference[:, 3] > 0.5
+    if not mask.any():
+        return float("inf")
+    difference = probe[mask, :3] - reference[mask, :3]
+    rmse = float(np.sqrt(np.mean(difference ** 2)))
+    return rmse / max(float(np.mean(reference[mask, :3])), 1e-6)
+
+
+def tune_samples(scene, noise_threshold=0.02, probe_percent=25, cache_path=None, scene_hash=None, num_views=1):
+    """Pick and apply the cheapest sample settings whose probe noise is under noise_threshold."""
+    if scene.render.engine not in ('CYCLES', 'BLENDER_EEVEE', 'BLENDER_EEVEE_NEXT'):
+        print(f"Sample tuning skipped: engine {scene.render.engine} has no sample count")
+        return None
+
+    # Reuse an earlier tuning of the same scene content and threshold
+    if cache_path and scene_hash and os.path.exists(cache_path):
+        with open(cache_path) as f:
+            record = json.load(f)
+        if record.get("scene_hash") == scene_hash and record.get("noise_threshold") == noise_threshold \
+                and record.get("engine") == scene.render.engine:
+            apply_settings(scene, record["chosen"])
+            print(f"Sample tuning reused from {cache_path}: {record['chosen']}")
+            return record
+
+    render = scene.render
+    image_settings = render.image_settings
+    saved = {
+        "settings": current_settings(scene),
+        "filepath": render.filepath,
+        "percent": render.resolution_percentage,
+        "format": (image_settings.file_format, image_settings.color_mode, image_settings.color_depth)
+    }
+    full_pixels = render.resolution_x * render.resolution_y * (render.resolution_percentage / 100.0) ** 2
+    render.resolution_percentage = max(1, int(render.resolution_percentage * probe_percent / 100))
+    probe_pixels = render.resolution_x * render.resolution_y * (render.resolution_percentage / 100.0) ** 2
+    image_settings.file_format = 'OPEN_EXR'
+    image_settings.color_mode = 'RGBA'
+    image_settings.color_depth = '32'
+
+    reference_settings = saved["settings"]
+    trials = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="street2air_probe_") as probe_dir:
+            reference, reference_seconds = render_probe(scene, probe_dir, "reference")
+            print(f"Probe reference ({reference_settings}): {reference_seconds:.2f}s")
+            chosen, chosen_seconds = reference_settings, reference_seconds
+            for n, settings in enumerate(candidates(scene, reference_settings["samples"])):
+                apply_settings(scene, settings)
+                probe, seconds = render_probe(scene, probe_dir, f"probe_{n}")
+                noise = relative_noise(probe, reference)
+                trials.append(dict(settings, noise=noise, seconds=seconds))
+                print(f"Probe {settings}: noise {noise:.4f}, {seconds:.2f}s")
+                # More samples only get slower, so stop once a plain probe is slower than the best so far
+                if noise <= noise_threshold and seconds < chosen_seconds:
+                    chosen, chosen_seconds = settings, seconds
+                elif not settings.get("denoise") and seconds >= chosen_seconds:
+                    break
+    finally:
+        render.filepath = saved["filepath"]
+        render.resolution_percentage = saved["percent"]
+        image_settings.file_format, image_settings.color_mode, image_settings.color_depth = saved["format"]
+        apply_settings(scene, saved["settings"])
+
+    # The scene is back on its own settings; the chosen trial's settings go on top, minus trial-only ones
+    chosen = {key: value for key, value in chosen.items() if key not in TRIAL_ONLY}
+    apply_settings(scene, chosen)
+    # Probe time scales roughly with pixel count
+    scale = full_pixels / max(probe_pixels, 1)
+    saved_per_view = max(reference_seconds - chosen_seconds, 0.0) * scale
+    record = {
+        "scene_hash": scene_hash,
+        "engine": scene.render.engine,
+        "noise_threshold": noise_threshold,
+        "probe_percent": probe_percent,
+        "reference": dict(reference_settings, seconds=reference_seconds),
+        "chosen": chosen,
+        "trials": trials,
+        "estimated_seconds_saved_per_view": saved_per_view,
+        "estimated_seconds_saved": saved_per_view * num_views
+    }
+    print(f"Sample tuning chose {chosen} (saved was {reference_settings}), "
+          f"estimated {saved_per_view:.1f}s saved per view, {saved_per_view * num_views:.0f}s for {num_views} views")
+    if cache_path:
+        with open(cache_path, "w") as f:
+            json.dump(record, f, indent=2)
+    return record
@@ -0,0 +1,161 @@
+import bpy
+import math
+import os
+import tempfile
+
+import numpy as np
+
+import framing
+
+# Left/right mirror symmetry for the render_*.py class scripts and rotate_and_render.py.
+#
+# Most vehicles are close to mirror-symmetric about the vertical plane through
+# their long axis. Reflecting a camera pose across that plane (with a Track To
+# camera, or any camera without roll) gives the same image flipped left to
+# right, so only the views on one side of the plane need a render; each view on
+# the other side is paired with the rendered view whose mirror is closest to it,
+# moved to that exact mirrored pose and written as the flipped image.
+#
+# The long axis is the principal axis of the vehicle's bounding box corners on
+# the ground plane. Before the mode is used on an asset, low-resolution probes
+# from a pose and its mirror are compared: the flipped silhouettes must overlap
+# (IoU) and the colours inside them must agree, or every view is rendered.
+
+
+def mirror_plane(scene, camera, target=None):
+    """(center, normal) of the vertical plane through the vehicle's long axis, in world space."""
+    corners = framing.world_corners(framing.target_meshes(scene, camera, target))
+    if not corners:
+        return None
+    points = np.array([(corner.x, corner.y, corner.z) for corner in corners])
+    center = (points.min(axis=0) + points.max(axis=0)) / 2
+    # Principal axis of the corners on the ground plane
+    xy = points[:, :2] - points[:, :2].mean(axis=0)
+    eigenvalues, eigenvectors = np.linalg.eigh(xy.T @ xy)
+    long_axis = eigenvectors[:, np.argmax(eigenvalues)]
+    normal = (-float(long_axis[1]), float(long_axis[0]), 0.0)
+    return tuple(float(value) for value in center), normal
+
+
+def side(location, center, normal):
+    return sum((location[i] - center[i]) * normal[i] for i in range(3))
+
+
+def mirror_location(location, center, normal):
+    distance = side(location, center, normal)
+    return [float(location[i] - 2 * distance * normal[i]) for i in range(3)]
+
+
+def pair_views(views, center, normal):
+    """Split views into (rendered, mirrored): each mirrored view is (view, source name, mirrored location).
+
+    Views on the normal's side are rendered; every view on the other side takes the exact mirror of
+    the nearest unused rendered view. Views left without a partner are rendered as usual.
+    """
+    rendered = [view for view in views if view["view"] < 0 or side(view["location"], center, normal) >= 0]
+    rendered_names = {view["name"] for view in rendered}
+    opposite = [view for view in views if view["name"] not in rendered_names]
+    available = [view for view in rendered if view["view"] >= 0]
+    mirrored = []
+    for view in opposite:
+        if not available:
+            rendered.append(view)
+            continue
+        candidates = [(math.dist(view["location"], mirror_location(source["location"], center, normal)), n)
+                      for n, source in enumerate(available)]
+        _, n = min(candidates)
+        source = available.pop(n)
+        mirrored.append((view, source["name"], mirror_location(source["location"], center, normal)))
+    order = {view["name"]: n for n, view in enumerate(views)}
+    rendered.sort(key=lambda view: order[view["name"]])
+    return rendered, mirrored
+
+
+def render_rgba(scene, filepath):
+    # Render the current state to a float EXR and return it as (H, W, 4), bottom row first
+    scene.render.filepath = filepath
+    bpy.ops.render.render(write_still=True)
+    image = bpy.data.images.load(filepath)
+    width, height = image.size
+    pixels = np.empty(width * height * 4, dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    bpy.data.images.remove(image)
+    return pixels.reshape(height, width, 4)
+
+
+def compare(image, other):
+    # (silhouette IoU, RMSE inside both silhouettes relative to image's mean value) of two RGBA arrays
+    a, b = image[..., 3] > 0.5, other[..., 3] > 0.5
+    union = np.logical_or(a, b).sum()
+    iou = float(np.logical_and(a, b).sum() / union) if union else 1.0
+    both = np.logical_and(a, b)
+    if not both.any():
+        return iou, float("inf")
+    rmse = float(np.sqrt(np.mean((image[both, :3] - other[both, :3]) ** 2)))
+    return iou, rmse / max(float(np.mean(image[both, :3])), 1e-6)
+
+
+def compare_mirrored(image, mirrored):
+    # compare() against the left-right flip of mirrored
+    return compare(image, mirrored[:, ::-1])
+
+
+def check_symmetry(scene, pairs, percent=25, min_iou=0.97, max_error=0.05):
+    """Render each (pose, mirrored pose) pair as low-resolution probes and decide if mirroring is safe.
+
+    pairs holds (apply, apply_mirrored) callables that put the scene into a pose and its mirror.
+    """
+    render = scene.render
+    image_settings = render.image_settings
+    saved = (render.filepath, render.resolution_percentage, render.film_transparent,
+             image_settings.file_format, image_settings.color_mode, image_settings.color_depth)
+    render.resolution_percentage = max(1, int(render.resolution_percentage * percent / 100))
+    render.film_transparent = True  # Silhouettes come from the alpha channel
+    image_settings.file_format = 'OPEN_EXR'
+    image_settings.color_mode = 'RGBA'
+    image_settings.color_depth = '32'
+    probes = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="street2air_symmetry_") as probe_dir:
+            for n, (apply, apply_mirrored) in enumerate(pairs):
+                apply()
+                bpy.context.view_layer.update()
+                image = render_rgba(scene, os.path.join(probe_dir, f"{n}.exr"))
+                apply_mirrored()
+                bpy.context.view_layer.update()
+                mirrored = render_rgba(scene, os.path.join(probe_dir, f"{n}_mirrored.exr"))
+                iou, error = compare_mirrored(image, mirrored)
+                probes.append({"iou": iou, "error": error})
+    finally:
+        (render.filepath, render.resolution_percentage, render.film_transparent,
+         image_settings.file_format, image_settings.color_mode, image_settings.color_depth) = saved
+    iou = min((probe["iou"] for probe in probes), default=0.0)
+    error = max((probe["error"] for probe in probes), default=float("inf"))
+    symmetric = bool(probes) and iou >= min_iou and error <= max_error
+    print(f"Symmetry check: silhouette IoU {iou:.3f} (min {min_iou}), colour error {error:.3f} "
+          f"(max {max_error}): {'mirroring views' if symmetric else 'rendering every view'}")
+    return {"symmetric": symmetric, "iou": iou, "error": error, "min_iou": min_iou, "max_error": max_error,
+            "probe_percent": percent, "probes": probes}
+
+
+def flip_image(source, target):
+    # Write source flipped left to right as target, in the same format
+    try:
+        import OpenImageIO as oiio
+    except ImportError:
+        oiio = None
+    if oiio is not None:
+        buf = oiio.ImageBuf(source)
+        flopped = oiio.ImageBufAlgo.flop(buf)
+        if flopped.write(target):
+            return
+    image = bpy.data.images.load(source)
+    try:
+        width, height = image.size
+        pixels = np.empty(width * height * 4, dtype=np.float32)
+        image.pixels.foreach_get(pixels)
+        image.pixels.foreach_set(pixels.reshape(height, width, 4)[:, ::-1].ravel())
+        image.filepath_raw = target
+        image.save()
+    finally:
+        bpy.data.images.remove(image)
@@ -0,0 +1,180 @@
+import bpy
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+from bpy_extras.object_utils import world_to_camera_view
+
+import framing
+import image_writer
+import view_cache
+
+# Downscaled texture levels for the render_*.py class scripts.
+#
+# TRELLIS assets embed their textures at full resolution, and every Blender
+# process decodes them whole even when the vehicle covers a few hundred pixels.
+# Each image used by the vehicle's materials gets mip levels (2x2 box filtered,
+# halved until MIN_SIZE), written as PNGs under the texture cache keyed by the
+# image's content hash, so they are made once and shared by every process. A
+# JSON next to them records the original's size, so later runs never decode the
+# full-resolution image at all.
+#
+# Per view, the vehicle's projected size in pixels times texels_per_pixel is
+# the resolution a texture needs. Each Image Texture node is bound to the
+# smallest level at least that large, and buffers of unbound images are freed.
+# Float (HDR) images and images already at MIN_SIZE keep their full resolution.
+
+# Bump when levels are made differently, so cached levels are rebuilt
+TEXTURE_VERSION = 1
+
+MIN_SIZE = 256
+
+
+def image_nodes(objects):
+    # Image Texture nodes of the objects' materials
+    nodes = []
+    materials = {slot.material for obj in objects for slot in obj.material_slots if slot.material is not None}
+    for material in materials:
+        if material.use_nodes and material.node_tree is not None:
+            nodes += [node for node in material.node_tree.nodes if node.type == 'TEX_IMAGE' and node.image is not None]
+    return nodes
+
+
+def image_hash(image):
+    if image.packed_file is not None:
+        return hashlib.sha256(image.packed_file.data).hexdigest()
+    return view_cache.file_hash(bpy.path.abspath(image.filepath))
+
+
+def level_sizes(width, height):
+    # (width, height) of every level, the original first
+    sizes = [(width, height)]
+    while max(sizes[-1]) // 2 >= MIN_SIZE:
+        sizes.append((max(sizes[-1][0] // 2, 1), max(sizes[-1][1] // 2, 1)))
+    return sizes
+
+
+def halve(pixels):
+    # 2x2 box filter; an odd last row or column is averaged on its own
+    height, width, _ = pixels.shape
+    if height % 2:
+        pixels = np.concatenate([pixels, pixels[-1:]], axis=0)
+    if width % 2:
+        pixels = np.concatenate([pixels, pixels[:, -1:]], axis=1)
+    return (pixels[0::2, 0::2] + pixels[1::2, 0::2] + pixels[0::2, 1::2] + pixels[1::2, 1::2]) / 4
+
+
+def projected_pixels(scene, camera, objects):
+    # Longest side of the objects' bounding box on screen, in pixels
+    render = scene.render
+    width = render.resolution_x * render.resolution_percentage / 100
+    height = render.resolution_y * render.resolution_percentage / 100
+    points = [world_to_camera_view(scene, camera, corner) for corner in framing.world_corners(objects)]
+    if not points or any(point.z <= 0 for point in points):
+        return max(width, height)
+    xs = [min(max(point.x, 0.0), 1.0) * width for point in points]
+    ys = [min(max(point.y, 0.0), 1.0) * height for point in points]
+    return max(max(xs) - min(xs), max(ys) - min(ys))
+
+
+class TextureSet:
+    """Mip levels of the images bound to a set of objects; level 0 is the original image."""
+
+    def __init__(self, objects, cache_dir, texels_per_pixel=2.0):
+        self.objects = objects
+        self.texels_per_pixel = texels_per_pixel
+        self.nodes = image_nodes(objects)
+        self.full = {node: node.image for node in self.nodes}
+        self.levels = {}
+        self.sizes = {}
+        self.made = 0
+        start_time = time.time()
+        for image in dict.fromkeys(self.full.values()):
+            self.levels[image.name] = [image]
+            self.sizes[image.name] = [None]
+            try:
+                self.add_levels(image, cache_dir)
+            except Exception as e:
+                print(f"Texture levels failed for {image.name}, keeping full resolution: {e}")
+                del self.levels[image.name][1:], self.sizes[image.name][1:]
+        self.build_seconds = time.time() - start_time
+        self.current = {}
+
+    def add_levels(self, image, cache_dir):
+        digest = image_hash(image)
+        root = os.path.join(cache_dir, digest[:2], f"{digest}_v{TEXTURE_VERSION}")
+        meta = None
+        if os.path.exists(root + ".json"):
+            with open(root + ".json") as f:
+                meta = json.load(f)
+            sizes = [tuple(size) for size in meta["sizes"]]
+            if not all(os.path.exists(f"{root}_{k}.png") for k in range(1, len(sizes))):
+                meta = None
+        if meta is None:
+            meta = self.make_levels(image, root)
+            self.made += 1
+        sizes = [tuple(size) for size in meta["sizes"]]
+        self.sizes[image.name] = sizes
+        for k in range(1, len(sizes)):
+            level = bpy.data.images.load(f"{root}_{k}.png", check_existing=True)
+            level.colorspace_settings.name = image.colorspace_settings.name
+            level.alpha_mode = image.alpha_mode
+            self.levels[image.name].append(level)
+
+    def make_levels(self, image, root):
+        # Decode the original once, write every level and the JSON last (it marks the levels complete)
+        os.makedirs(os.path.dirname(root), exist_ok=True)
+        width, height = image.size
+        sizes = [(width, height)] if image.is_float else level_sizes(width, height)
+        if len(sizes) > 1:
+            pixels = np.empty(width * height * 4, dtype=np.float32)
+            image.pixels.foreach_get(pixels)
+            pixels = pixels.reshape(height, width, 4)[::-1]  # Top row first
+            for k in range(1, len(sizes)):
+                pixels = halve(pixels)
+                tmp_path = f"{root}_{k}.{os.getpid()}.tmp.png"
+                with open(tmp_path, "wb") as f:
+                    f.write(image_writer.encode_png((np.clip(pixels, 0.0, 1.0) * 255.0 + 0.5).astype(np.uint8), 6))
+                os.replace(tmp_path, f"{root}_{k}.png")
+            # The full-resolution pixels are not needed again once the levels exist
+            image.buffers_free()
+        meta = {"image": image.name, "sizes": [list(size) for size in sizes]}
+        tmp_path = f"{root}.{os.getpid()}.tmp.json"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, root + ".json")
+        return meta
+
+    def select(self, scene, camera):
+        # {image name: smallest level at least as large as the view needs}
+        needed = projected_pixels(scene, camera, self.objects) * self.texels_per_pixel
+        chosen = {}
+        for name, sizes in self.sizes.items():
+            k = 0
+            while k + 1 < len(sizes) and max(sizes[k + 1]) >= needed:
+                k += 1
+            chosen[name] = k
+        return chosen
+
+    def apply(self, chosen):
+        if chosen == self.current:
+            return
+        for node, image in self.full.items():
+            node.image = self.levels[image.name][chosen.get(image.name, 0)]
+        bound = {node.image for node in self.nodes}
+        for levels in self.levels.values():
+            for image in levels:
+                if image not in bound and image.has_data:
+                    image.buffers_free()
+        self.current = dict(chosen)
+
+    def megabytes(self, chosen=None):
+        # Decoded RGBA size of the bound levels (the originals with chosen=None), at 8 bits per channel
+        chosen = chosen or {}
+        return sum(width * height * 4 / (1024 * 1024) for name, sizes in self.sizes.items()
+                   for width, height in [sizes[chosen.get(name, 0)] or sizes[0] or (0, 0)])
+
+    def restore(self):
+        self.apply({name: 0 for name in self.levels})
@@ -0,0 +1,160 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import batch_render
+import render_plan
+
+# Post-render validation of the images written by batch_render.py.
+#
+# Every output image is decoded in a pool of processes and checked for:
+#   - integrity: the file decodes completely (truncated or corrupt files fail);
+#     EXR files need OpenImageIO for this, without it only their header is checked
+#   - coverage: the vehicle (alpha above --alpha-threshold) covers at least
+#     --min-coverage of the frame, so empty or fully transparent frames fail
+#   - framing: the vehicle's alpha bounding box does not touch the frame edge
+# Failed views are written to a JSON-lines failure list that
+# `batch_render.py --redo` reads to re-render only those views.
+
+IMAGE_EXTENSIONS = (".png", ".webp", ".exr", ".jpg", ".jpeg")
+
+EXR_MAGIC = b"\x76\x2f\x31\x01"
+
+
+def load_exr_alpha(path):
+    # Pillow cannot decode OpenEXR: read it with OpenImageIO, else check only the header (returns False)
+    from PIL import Image
+    try:
+        import OpenImageIO as oiio
+    except ImportError:
+        oiio = None
+    if oiio is None:
+        with open(path, "rb") as f:
+            header = f.read(len(EXR_MAGIC))
+        if header != EXR_MAGIC or os.path.getsize(path) <= len(EXR_MAGIC):
+            raise ValueError("not an OpenEXR file")
+        return False
+    import numpy as np
+    buf = oiio.ImageBuf(path)
+    pixels = buf.get_pixels(oiio.FLOAT)
+    if pixels is None or buf.has_error:
+        raise ValueError(buf.geterror() or "OpenImageIO could not read it")
+    channel = buf.spec().alpha_channel
+    if channel < 0:
+        return None
+    alpha = np.clip(pixels[..., channel], 0.0, 1.0) * 255.0 + 0.5
+    return Image.fromarray(alpha.astype(np.uint8), "L")
+
+
+def load_alpha(path):
+    # The alpha channel as an 8-bit image, None without one, False when only the header could be checked
+    from PIL import Image
+    if path.lower().endswith(".exr"):
+        return load_exr_alpha(path)
+    with Image.open(path) as image:
+        image.verify()
+    with Image.open(path) as image:
+        image.load()
+        if "A" not in image.getbands():
+            return None
+        return image.getchannel("A")
+
+
+def check_image(path, alpha_threshold=127, min_coverage=0.005, border=0):
+    # Returns (path, {check: reason}, stats); runs in a worker process
+    try:
+        alpha = load_alpha(path)
+    except Exception as e:
+        return path, {"integrity": f"unreadable ({e})"}, {}
+    if alpha is None:
+        return path, {"coverage": "no alpha channel"}, {}
+    if alpha is False:
+        return path, {}, {"decoded": False}
+
+    width, height = alpha.size
+    mask = alpha.point(lambda value: 255 if value > alpha_threshold else 0)
+    coverage = mask.histogram()[255] / float(width * height)
+    stats = {"coverage": coverage, "size": [width, height]}
+    reasons = {}
+    if coverage < min_coverage:
+        reasons["coverage"] = f"alpha coverage {coverage:.4f} below {min_coverage}"
+    bbox = mask.getbbox()
+    if bbox is not None:
+        stats["bbox"] = list(bbox)
+        left, top, right, bottom = bbox
+        if left <= border or top <= border or right >= width - border or bottom >= height - border:
+            reasons["framing"] = f"vehicle touches the frame edge (bbox {list(bbox)})"
+    return path, reasons, stats
+
+
+def find_outputs(root):
+    # (job, image path) for every rendered view of every *_xy.blend under root
+    for job in batch_render.find_jobs(root, {}):
+        if not os.path.isdir(job["output_dir"]):
+            continue
+        for name in sorted(os.listdir(job["output_dir"])):
+            if name.lower().endswith(IMAGE_EXTENSIONS) and ".tmp" not in name:
+                yield job, os.path.join(job["output_dir"], name)
+
+
+def validate(root, failures_path, workers=None, alpha_threshold=127, min_coverage=0.005, border=0):
+    outputs = list(find_outputs(root))
+    print(f"Validating {len(outputs)} images with {workers or os.cpu_count()} processes...")
+    start_time = time.time()
+    failures = []
+    counts = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(check_image, path, alpha_threshold, min_coverage, border) for _, path in outputs]
+        for (job, _), future in zip(outputs, futures):
+            path, reasons, stats = future.result()
+            if not reasons:
+                continue
+            for check in reasons:
+                counts[check] = counts.get(check, 0) + 1
+            failures.append({
+                "blend": render_plan.plan_key(job["blend"], root),
+                "name": os.path.basename(path),
+                "file": os.path.relpath(path, root),
+                "reasons": reasons,
+                **stats
+            })
+            print(f"Bad view {os.path.relpath(path, root)}: {'; '.join(reasons.values())}")
+
+    tmp_path = failures_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        for failure in failures:
+            f.write(json.dumps(failure, sort_keys=True) + "\n")
+    os.replace(tmp_path, failures_path)
+    seconds = time.time() - start_time
+    print(f"Validated {len(outputs)} images in {seconds:.1f}s: {len(failures)} bad views in "
+          f"{len({failure['blend'] for failure in failures})} files")
+    for check, count in sorted(counts.items()):
+        print(f"  {check}: {count}")
+    print(f"Failure list: {failures_path}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check rendered views and list the ones to re-render')
+    parser.add_argument('--root', default='.', help='Folder holding one sub-folder per vehicle class')
+    parser.add_argument('--workers', type=int, default=None, help='Decoding processes (default: one per CPU)')
+    parser.add_argument('--failures', default=None,
+                        help='Failure list to write (default: <root>/render_failures.jsonl)')
+    parser.add_argument('--alpha-threshold', type=int, default=127,
+                        help='Alpha value (0-255) above which a pixel belongs to the vehicle')
+    parser.add_argument('--min-coverage', type=float, default=0.005,
+                        help='Smallest fraction of the frame the vehicle must cover')
+    parser.add_argument('--border', type=int, default=0,
+                        help='Pixels from the frame edge the vehicle must stay clear of')
+    args = parser.parse_args()
+
+    failures = validate(args.root, args.failures or os.path.join(args.root, "render_failures.jsonl"),
+                        args.workers, args.alpha_threshold, args.min_coverage, args.border)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
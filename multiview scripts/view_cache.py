@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+# Disk cache of rendered views shared by the render_*.py class scripts.
+#
+# A view is keyed by the content hash of the .blend it came from, the camera's
+# world matrix (quantised so float noise does not split keys) plus its lens
+# settings, and a hash of the render settings that change the output image.
+# Hits are materialised with a hardlink (or a copy across file systems) instead
+# of a render. The cache is bounded in bytes and evicts least recently used
+# files, using the file mtime as the access time.
+#
+# This module does not import bpy (it reads the scene and camera passed in), so
+# render_manifest.py shares file_hash() with it outside Blender.
+
+# Camera matrix entries are rounded to this many decimals before hashing
+MATRIX_DECIMALS = 4
+
+
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def render_settings(scene):
+    # Everything besides the camera pose that changes the rendered pixels
+    render = scene.render
+    image = render.image_settings
+    settings = {
+        "engine": render.engine,
+        "resolution": [render.resolution_x, render.resolution_y, render.resolution_percentage],
+        "film_transparent": render.film_transparent,
+        "format": [image.file_format, image.color_mode, image.color_depth, image.compression],
+        "view": [scene.view_settings.view_transform, scene.view_settings.look,
+                 scene.view_settings.exposure, scene.view_settings.gamma],
+        "frame": scene.frame_current
+    }
+    if render.engine == 'CYCLES':
+        cycles = scene.cycles
+        settings["cycles"] = [cycles.samples, cycles.use_adaptive_sampling, cycles.adaptive_threshold,
+                              cycles.use_denoising, cycles.seed]
+    elif hasattr(scene, "eevee"):
+        settings["eevee"] = [scene.eevee.taa_render_samples]
+    return settings
+
+
+def camera_state(camera):
+    matrix = [round(value, MATRIX_DECIMALS) + 0.0 for row in camera.matrix_world for value in row]
+    data = camera.data
+    return {
+        "matrix": matrix,
+        "lens": [data.type, round(data.lens, 4), round(data.ortho_scale, 4), data.sensor_width,
+                 data.sensor_fit, round(data.shift_x, 4), round(data.shift_y, 4), data.clip_start, data.clip_end]
+    }
+
+
+class ViewCache:
+    def __init__(self, cache_dir, max_bytes, scene_hash):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.scene_hash = scene_hash
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # store() may run on image writer threads
+        self.lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.total_bytes = sum(size for _, size, _ in self._entries())
+
+    def _entries(self):
+        for dir_path, _, file_names in os.walk(self.cache_dir):
+            for file_name in file_names:
+                path = os.path.join(dir_path, file_name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def key(self, scene, camera, variant=None):
+        # variant tells apart renders of the same scene that differ in ways the settings miss, e.g. LOD level
+        state = {
+            "scene": self.scene_hash,
+            "camera": camera_state(camera),
+            "settings": hashlib.sha256(json.dumps(render_settings(scene), sort_keys=True).encode()).hexdigest()
+        }
+        if variant is not None:
+            state["variant"] = variant
+        return hashlib.sha256(json.dumps(state, sort_keys=True).encode()).hexdigest()
+
+    def _path(self, key, filepath):
+        extension = os.path.splitext(filepath)[1]
+        return os.path.join(self.cache_dir, key[:2], key + extension)
+
+    def fetch(self, key, filepath):
+        cached_path = self._path(key, filepath)
+        with self.lock:
+            if not os.path.exists(cached_path):
+                self.misses += 1
+                return False
+            materialise(cached_path, filepath)
+            os.utime(cached_path)  # Mark as recently used
+            self.hits += 1
+            return True
+
+    def store(self, key, filepath):
+        cached_path = self._path(key, filepath)
+        with self.lock:
+            if os.path.exists(cached_path) or not os.path.exists(filepath):
+                return
+            os.makedirs(os.path.dirname(cached_path), exist_ok=True)
+            materialise(filepath, cached_path)
+            os.utime(cached_path)
+            self.total_bytes += os.path.getsize(cached_path)
+            if self.total_bytes > self.max_bytes:
+                self.evict()
+
+    def evict(self):
+        # Drop least recently used views until the cache is back under 90% of its budget
+        target = self.max_bytes * 0.9
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        self.total_bytes = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if self.total_bytes <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.total_bytes -= size
+            self.evictions += 1
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        hit_rate = 100.0 * self.hits / lookups if lookups else 0.0
+        return (f"View cache: {self.hits} hits, {self.misses} misses ({hit_rate:.0f}% hit rate), "
+                f"{self.evictions} evicted, {self.total_bytes / 1e9:.2f} GB in {self.cache_dir}")
+
+
+def materialise(source, destination):
+    # Hardlink when possible; never write through an existing link into the cache
+    if os.path.exists(destination):
+        os.remove(destination)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""RGBA decoding shared by prepare_dataset.py and shard_loader.py, EXR renders included."""
+import io
+import tempfile
+from pathlib import Path
+
+# Pillow cannot open these; they are read with OpenImageIO when it is installed
+OIIO_SUFFIXES = {'.exr'}
+
+
+def load_oiio():
+    try:
+        import OpenImageIO
+    except ImportError:
+        return None
+    return OpenImageIO
+
+
+def srgb_encode(linear):
+    import numpy as np
+    linear = np.clip(linear, 0.0, 1.0)
+    return np.where(linear <= 0.0031308, linear * 12.92, 1.055 * np.power(linear, 1 / 2.4) - 0.055)
+
+
+def read_oiio(path, oiio):
+    """(H, W, 4) uint8 RGBA of a file OpenImageIO reads, e.g. a Blender EXR render.
+
+    EXR holds linear, premultiplied colour: it is un-premultiplied and sRGB encoded, as in the PNG renders.
+    """
+    import numpy as np
+    buf = oiio.ImageBuf(str(path))
+    pixels = buf.get_pixels(oiio.FLOAT)
+    if pixels is None or buf.has_error:
+        raise ValueError(f'{path}: {buf.geterror() or "OpenImageIO could not read it"}')
+    spec = buf.spec()
+    pixels = np.asarray(pixels, dtype=np.float32).reshape(spec.height, spec.width, spec.nchannels)
+    colour = [n for n in range(spec.nchannels) if n != spec.alpha_channel][:3]
+    rgb = pixels[..., colour] if len(colour) == 3 else np.repeat(pixels[..., colour[:1]], 3, axis=2)
+    if spec.alpha_channel >= 0:
+        alpha = np.clip(pixels[..., spec.alpha_channel:spec.alpha_channel + 1], 0.0, 1.0)
+        rgb = np.divide(rgb, alpha, out=np.zeros_like(rgb), where=alpha > 0)
+    else:
+        alpha = np.ones(rgb.shape[:2] + (1,), np.float32)
+    rgba = np.concatenate([srgb_encode(rgb), alpha], axis=2)
+    return (rgba * 255.0 + 0.5).astype(np.uint8)
+
+
+def decode_rgba(source, suffix=None, size=None):
+    """(H, W, 4) uint8 RGBA of an image path or its encoded bytes, optionally resized to size x size.
+
+    Bytes need the file suffix. EXR goes through OpenImageIO; without it, EXR returns None so
+    callers can skip the image instead of failing on it.
+    """
+    import numpy as np
+    from PIL import Image
+    suffix = (suffix or Path(source).suffix).lower()
+    if suffix in OIIO_SUFFIXES:
+        oiio = load_oiio()
+        if oiio is None:
+            return None
+        if isinstance(source, bytes):
+            # OpenImageIO reads EXR from files only
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                path = Path(tmp_dir) / f'image{suffix}'
+                path.write_bytes(source)
+                rgba = read_oiio(path, oiio)
+        else:
+            rgba = read_oiio(source, oiio)
+        image = Image.fromarray(rgba, 'RGBA')
+    else:
+        image = Image.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+    with image:
+        image = image.convert('RGBA')
+        if size:
+            image = image.resize((size, size), Image.LANCZOS)
+        return np.ascontiguousarray(np.asarray(image))
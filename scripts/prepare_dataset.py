@@ -1,23 +1,518 @@
 #!/usr/bin/env python3
 """Small helper to inspect and prepare example dataset files."""
 import argparse
+import io
+import json
+import os
+import random
+import re
+import sqlite3
+import tarfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from pathlib import Path
 
+IMAGE_SUFFIXES = {'.png', '.jpg', '.jpeg', '.webp', '.exr'}
+# 'bus_4', 'bus_4_xy_renders', 'sedan_12_renders' -> class and instance
+INSTANCE_RE = re.compile(r'^([A-Za-z]+)_(\d+)')
+# Last number in the file name: render_view_0020.png, van_3_view_017.png
+VIEW_INDEX_RE = re.compile(r'(\d+)\D*$')
+INDEX_NAME = '.dataset_index.sqlite'
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, parent TEXT, mtime_ns INTEGER);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, dir TEXT, size INTEGER, mtime_ns INTEGER,
+    class TEXT, instance TEXT, view_type TEXT, view_index INTEGER
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+CREATE INDEX IF NOT EXISTS files_class ON files (class, view_type);
+CREATE INDEX IF NOT EXISTS files_instance ON files (instance);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent);
+"""
+
 
 def list_files(root: Path):
     for p in sorted(root.rglob('*')):
         print(p.relative_to(root))
 
 
+def list_indexed(index_path: Path, classes=None, view_types=None, instances=None):
+    # Stream matching paths from the SQLite manifest written by the index command
+    query = 'SELECT path FROM files'
+    conditions = []
+    params = []
+    for column, values in (('class', classes), ('view_type', view_types), ('instance', instances)):
+        if values:
+            conditions.append(f'{column} IN ({", ".join("?" * len(values))})')
+            params += values
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    with sqlite3.connect(index_path) as db:
+        for (path,) in db.execute(query + ' ORDER BY path', params):
+            print(path)
+
+
+def view_type(folder: str):
+    # 'street views' -> 'street', 'top views' -> 'top'; render script outputs keep their script family
+    if folder.endswith(' views'):
+        return folder[:-len(' views')].replace(' ', '_')
+    if folder.endswith('_xy_renders'):
+        return 'xy'
+    if folder.endswith('_renders'):
+        return 'orbit'
+    return None
+
+
+def path_labels(relative: Path):
+    # Whatever the folder names say about a file; fields are None when unknown
+    kind = None
+    instance = None
+    for part in relative.parts[:-1]:
+        kind = view_type(part) or kind
+        match = INSTANCE_RE.match(part)
+        if match:
+            instance = match
+    # 'van_4_default' is the default view, not view 4
+    stem = INSTANCE_RE.sub('', relative.stem, count=1) if instance else relative.stem
+    index = VIEW_INDEX_RE.search(stem)
+    return {
+        'path': relative.as_posix(),
+        'class': instance.group(1).lower() if instance else None,
+        'instance': f'{instance.group(1).lower()}_{int(instance.group(2))}' if instance else None,
+        'view_type': kind,
+        'view_index': int(index.group(1)) if index and instance and kind else None,
+    }
+
+
+def image_labels(relative: Path):
+    """Labels of one image from its path relative to the dataset root, or None if it is not a view."""
+    if relative.suffix.lower() not in IMAGE_SUFFIXES:
+        return None
+    labels = path_labels(relative)
+    # Only rendered views; previews such as 'trellis artifacts/bus_4/bus_4.png' are skipped
+    if labels['instance'] is None or labels['view_type'] is None:
+        return None
+    if labels['view_index'] is None:
+        labels['view_index'] = -1
+    return labels
+
+
+def scan_images(root: Path):
+    # Every labelled image under root, in a stable order; hidden folders (e.g. a .texture_cache of
+    # downscaled textures) are skipped, as in the index
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(name for name in dirnames if not name.startswith('.'))
+        for name in sorted(filenames):
+            labels = image_labels(Path(dirpath, name).relative_to(root))
+            if labels is not None:
+                yield labels
+
+
+def scan_dir(root: Path, relative: str, known_mtime, known_subdirs, full):
+    # One directory of the index walk (runs on a worker thread); None for files means unchanged
+    path = root / relative if relative else root
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return relative, None, None, []
+    if mtime_ns == known_mtime and not full:
+        return relative, mtime_ns, None, known_subdirs
+    files = []
+    subdirs = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            name = f'{relative}/{entry.name}' if relative else entry.name
+            if entry.is_dir(follow_symlinks=False):
+                if not entry.name.startswith('.'):
+                    subdirs.append(name)
+            elif entry.is_file() and not entry.name.startswith(INDEX_NAME):
+                stat = entry.stat()
+                files.append((name, stat.st_size, stat.st_mtime_ns))
+    return relative, mtime_ns, files, subdirs
+
+
+def build_index(root: Path, index_path: Path, workers=16, full=False):
+    """Record every file under root (path, size, mtime, class, instance, view type) in SQLite.
+
+    Directories are listed in parallel with os.scandir. On re-runs a directory whose
+    mtime is unchanged is not listed again; its stored subdirectories are still
+    visited. Files rewritten in place do not change their directory's mtime, so use
+    --full to re-stat everything after such edits. Hidden directories are skipped.
+    """
+    start_time = time.time()
+    db = sqlite3.connect(index_path)
+    db.executescript(INDEX_SCHEMA)
+    known = {path: mtime for path, mtime in db.execute('SELECT path, mtime_ns FROM dirs')}
+    children = {}
+    for path, parent in db.execute('SELECT path, parent FROM dirs'):
+        children.setdefault(parent, []).append(path)
+    visited = set()
+    listed = 0
+    changed_files = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(scan_dir, root, '', known.get(''), children.get('', []), full): None}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                parent = pending.pop(future)
+                relative, mtime_ns, files, subdirs = future.result()
+                if mtime_ns is None:
+                    continue  # Removed while walking; cleaned up below
+                visited.add(relative)
+                for subdir in subdirs:
+                    pending[pool.submit(scan_dir, root, subdir, known.get(subdir), children.get(subdir, []),
+                                        full)] = relative
+                if files is None:
+                    continue
+                listed += 1
+                changed_files += len(files)
+                db.execute('DELETE FROM files WHERE dir = ?', (relative,))
+                db.executemany('INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)', [
+                    (name, relative, size, mtime, labels['class'], labels['instance'], labels['view_type'],
+                     labels['view_index'])
+                    for name, size, mtime in files
+                    for labels in [path_labels(Path(name))]])
+                db.execute('INSERT OR REPLACE INTO dirs VALUES (?, ?, ?)', (relative, parent, mtime_ns))
+    removed = [path for path in known if path not in visited]
+    db.executemany('DELETE FROM files WHERE dir = ?', [(path,) for path in removed])
+    db.executemany('DELETE FROM dirs WHERE path = ?', [(path,) for path in removed])
+    db.commit()
+    total = db.execute('SELECT COUNT(*) FROM files').fetchone()[0]
+    db.close()
+    print(f'Indexed {total} files in {len(visited)} directories in {time.time() - start_time:.1f}s: '
+          f'{listed} directories listed ({changed_files} files), {len(removed)} removed; manifest: {index_path}')
+
+
+def add_bytes(tar, name, data, mtime):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = mtime
+    info.mode = 0o644
+    # Short USTAR names always take a single 512-byte header block
+    offset = tar.offset + tarfile.BLOCKSIZE
+    tar.addfile(info, io.BytesIO(data))
+    return offset
+
+
+def pack_shards(root: Path, out_dir: Path, shard_mb=512, shuffle_seed=None, prefix='street2air'):
+    """Stream every labelled image with a JSON label file into ~shard_mb tar shards.
+
+    Samples are stored as consecutive '<key>.<ext>' and '<key>.json' members, so a
+    shard can be read front to back without seeking. '<prefix>-index.json' lists
+    the shards with their sample counts and the byte offset of every image.
+    """
+    samples = list(scan_images(root))
+    if shuffle_seed is not None:
+        # Mix classes across shards so a shuffle buffer only has to shuffle locally
+        random.Random(shuffle_seed).shuffle(samples)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    shard_bytes = shard_mb * 1024 * 1024
+    shards = []
+    tar = None
+    start_time = time.time()
+    total_bytes = 0
+
+    def close_shard():
+        tar.close()
+        os.replace(tmp_path, shard_path)
+        shards[-1]['bytes'] = shard_path.stat().st_size
+        print(f'Wrote {shard_path.name}: {shards[-1]["samples"]} samples, {shards[-1]["bytes"] / 1e6:.1f} MB')
+
+    for n, sample in enumerate(samples):
+        if tar is None:
+            shard_path = out_dir / f'{prefix}-{len(shards):06d}.tar'
+            tmp_path = shard_path.with_suffix('.tar.tmp')
+            tar = tarfile.open(tmp_path, 'w', format=tarfile.USTAR_FORMAT)
+            shards.append({'name': shard_path.name, 'samples': 0, 'members': []})
+        source = root / sample['path']
+        data = source.read_bytes()
+        key = f'{n:08d}'
+        offset = add_bytes(tar, f'{key}{source.suffix.lower()}', data, int(source.stat().st_mtime))
+        add_bytes(tar, f'{key}.json', json.dumps(sample, sort_keys=True).encode(), 0)
+        shards[-1]['samples'] += 1
+        shards[-1]['members'].append({'key': key, 'offset': offset, 'size': len(data), **sample})
+        total_bytes += len(data)
+        if tar.offset >= shard_bytes:
+            close_shard()
+            tar = None
+    if tar is not None:
+        close_shard()
+
+    index = {
+        'root': str(root.resolve()),
+        'samples': len(samples),
+        'shuffle_seed': shuffle_seed,
+        'classes': sorted({sample['class'] for sample in samples}),
+        'shards': shards,
+    }
+    index_path = out_dir / f'{prefix}-index.json'
+    with open(index_path.with_suffix('.json.tmp'), 'w') as f:
+        json.dump(index, f, indent=1)
+    os.replace(index_path.with_suffix('.json.tmp'), index_path)
+    seconds = time.time() - start_time
+    print(f'Packed {len(samples)} images ({total_bytes / 1e6:.1f} MB) into {len(shards)} shards in {seconds:.1f}s '
+          f'({total_bytes / 1e6 / max(seconds, 1e-9):.0f} MB/s); index: {index_path}')
+    return index
+
+
+def decode_image(path: Path, size=None):
+    # RGBA uint8 array, optionally resized to size x size; None for an EXR without OpenImageIO
+    import image_decode
+    return image_decode.decode_rgba(path, size=size)
+
+
+def save_npy(path: Path, array):
+    import numpy as np
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def build_tensor_cache(root: Path, cache_dir: Path, size=None, rebuild=False):
+    """Decode every labelled image into one memory-mapped uint8 file per view type.
+
+    Re-runs only decode images that are new or whose size or mtime changed. Changed
+    images are appended again and their old pixels stay unused until --rebuild.
+    """
+    import numpy as np
+    import tensor_cache
+
+    splits = {}
+    for sample in scan_images(root):
+        splits.setdefault(sample['view_type'], []).append(sample)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    for split, samples in sorted(splits.items()):
+        paths = tensor_cache.cache_paths(cache_dir, split)
+        meta = {'size': size, 'classes': [], 'entries': []}
+        if paths['meta'].exists() and paths['data'].exists() and not rebuild:
+            with open(paths['meta']) as f:
+                previous = json.load(f)
+            if previous.get('size') == size:
+                meta = previous
+            else:
+                print(f'{split}: resize changed ({previous.get("size")} -> {size}), rebuilding')
+        known = {entry['path']: entry for entry in meta['entries']}
+        entries = []
+        decoded = 0
+        skipped = 0
+        decode_seconds = 0.0
+        with open(paths['data'], 'ab' if meta['entries'] else 'wb') as data:
+            offset = data.tell()
+            for sample in samples:
+                stat = (root / sample['path']).stat()
+                entry = known.get(sample['path'])
+                if entry is None or entry['source'] != [stat.st_size, stat.st_mtime_ns]:
+                    start_time = time.perf_counter()
+                    pixels = decode_image(root / sample['path'], size)
+                    seconds = time.perf_counter() - start_time
+                    if pixels is None:
+                        skipped += 1
+                        continue
+                    data.write(pixels.tobytes())
+                    entry = {
+                        'path': sample['path'],
+                        'class': sample['class'],
+                        'source': [stat.st_size, stat.st_mtime_ns],
+                        'offset': offset,
+                        'shape': list(pixels.shape),
+                        'decode_seconds': seconds,
+                    }
+                    offset += pixels.nbytes
+                    decoded += 1
+                    decode_seconds += seconds
+                if entry['class'] not in meta['classes']:
+                    meta['classes'].append(entry['class'])  # Append only, so existing class ids stay valid
+                entries.append(entry)
+            data.flush()
+            os.fsync(data.fileno())
+
+        meta['entries'] = entries
+        index = np.array([[entry['offset'], *entry['shape']] for entry in entries], dtype=np.int64).reshape(-1, 4)
+        labels = np.array([meta['classes'].index(entry['class']) for entry in entries], dtype=np.int64)
+        save_npy(paths['index'], index)
+        save_npy(paths['labels'], labels)
+        with open(paths['meta'].with_suffix('.json.tmp'), 'w') as f:
+            json.dump(meta, f)
+        os.replace(paths['meta'].with_suffix('.json.tmp'), paths['meta'])
+
+        # What an epoch costs from PNGs versus from the cache
+        cache = tensor_cache.TensorCache(cache_dir, split)
+        start_time = time.perf_counter()
+        for n in range(len(cache)):
+            cache[n][0].copy()
+        read_seconds = time.perf_counter() - start_time
+        epoch_decode = sum(entry['decode_seconds'] for entry in entries)
+        live_bytes = int(sum(np.prod(entry['shape']) for entry in entries))
+        unused_bytes = paths['data'].stat().st_size - live_bytes
+        print(f'{split}: {len(entries)} images ({decoded} decoded now in {decode_seconds:.1f}s), '
+              f'{live_bytes / 1e6:.1f} MB in {paths["data"]}')
+        if skipped:
+            print(f'{split}: skipped {skipped} EXR images; install OpenImageIO to decode them')
+        print(f'{split}: decoding costs {epoch_decode:.2f}s per epoch, cache reads {read_seconds:.2f}s, '
+              f'saving {epoch_decode - read_seconds:.2f}s per epoch')
+        if unused_bytes > live_bytes // 4:
+            print(f'{split}: {unused_bytes / 1e6:.1f} MB of replaced images in the cache; run with --rebuild to compact')
+
+
+def alpha_bbox(alpha, threshold=10):
+    """Tight (left, top, right, bottom) box of alpha > threshold, right/bottom exclusive; None if empty."""
+    import numpy as np
+    mask = alpha > threshold
+    rows = np.flatnonzero(mask.any(axis=1))
+    if rows.size == 0:
+        return None
+    cols = np.flatnonzero(mask.any(axis=0))
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
+
+
+def crop_view(source: Path, target: Path, pad=8, square=False, threshold=10):
+    # Runs in a worker process: tight alpha box, padded crop written to target
+    import numpy as np
+    from PIL import Image
+    rgba = decode_image(source)
+    if rgba is None:
+        # An EXR without OpenImageIO
+        return {'skipped': True, 'bytes': source.stat().st_size}
+    height, width = rgba.shape[:2]
+    bbox = alpha_bbox(rgba[..., 3], threshold)
+    result = {'width': width, 'height': height, 'bbox': bbox, 'bytes': source.stat().st_size, 'crop_bytes': 0}
+    if bbox is None:
+        return result
+    left, top, right, bottom = bbox
+    crop = rgba[max(top - pad, 0):min(bottom + pad, height), max(left - pad, 0):min(right + pad, width)]
+    if square:
+        # Centre the crop on a transparent square canvas
+        crop_height, crop_width = crop.shape[:2]
+        size = max(crop_height, crop_width)
+        extra_y, extra_x = size - crop_height, size - crop_width
+        crop = np.pad(crop, ((extra_y // 2, extra_y - extra_y // 2), (extra_x // 2, extra_x - extra_x // 2), (0, 0)))
+    target.parent.mkdir(parents=True, exist_ok=True)
+    Image.fromarray(np.ascontiguousarray(crop), 'RGBA').save(target)
+    result['crop_bytes'] = target.stat().st_size
+    return result
+
+
+def export_labels(root: Path, out_dir: Path, pad=8, square=False, threshold=10, workers=None):
+    """Crop every labelled view to its alpha bounding box and export COCO and YOLO boxes.
+
+    Writes out_dir/crops/<path> (padded crops), out_dir/coco.json and
+    out_dir/yolo/<path>.txt with yolo/classes.txt. Boxes are in full-frame
+    coordinates; classes come from the instance folders (bus_4 -> bus).
+    """
+    samples = list(scan_images(root))
+    classes = sorted({sample['class'] for sample in samples})
+    class_ids = {name: n for n, name in enumerate(classes)}
+    start_time = time.time()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(crop_view, root / sample['path'],
+                               (out_dir / 'crops' / sample['path']).with_suffix('.png'), pad, square, threshold)
+                   for sample in samples]
+        results = [future.result() for future in futures]
+    kept = [(sample, result) for sample, result in zip(samples, results) if not result.get('skipped')]
+    if len(kept) < len(samples):
+        print(f'Skipped {len(samples) - len(kept)} EXR views; install OpenImageIO to decode them')
+    samples = [sample for sample, _ in kept]
+    results = [result for _, result in kept]
+
+    coco = {
+        'images': [],
+        'annotations': [],
+        'categories': [{'id': class_ids[name] + 1, 'name': name, 'supercategory': 'vehicle'} for name in classes],
+    }
+    yolo_dir = out_dir / 'yolo'
+    yolo_dir.mkdir(parents=True, exist_ok=True)
+    (yolo_dir / 'classes.txt').write_text(''.join(f'{name}\n' for name in classes))
+    empty = 0
+    for image_id, (sample, result) in enumerate(zip(samples, results), start=1):
+        width, height = result['width'], result['height']
+        coco['images'].append({'id': image_id, 'file_name': sample['path'], 'width': width, 'height': height,
+                               'instance': sample['instance'], 'view_type': sample['view_type'],
+                               'view_index': sample['view_index']})
+        label_path = (yolo_dir / sample['path']).with_suffix('.txt')
+        label_path.parent.mkdir(parents=True, exist_ok=True)
+        if result['bbox'] is None:
+            empty += 1
+            label_path.write_text('')
+            continue
+        left, top, right, bottom = result['bbox']
+        box_width, box_height = right - left, bottom - top
+        coco['annotations'].append({'id': len(coco['annotations']) + 1, 'image_id': image_id,
+                                    'category_id': class_ids[sample['class']] + 1,
+                                    'bbox': [left, top, box_width, box_height],
+                                    'area': box_width * box_height, 'iscrowd': 0})
+        label_path.write_text(f'{class_ids[sample["class"]]} {(left + right) / 2 / width:.6f} '
+                              f'{(top + bottom) / 2 / height:.6f} {box_width / width:.6f} {box_height / height:.6f}\n')
+    with open(out_dir / 'coco.json', 'w') as f:
+        json.dump(coco, f)
+
+    full_bytes = sum(result['bytes'] for result in results if result['bbox'] is not None)
+    crop_bytes = sum(result['crop_bytes'] for result in results)
+    saved = full_bytes - crop_bytes
+    print(f'Cropped {len(samples) - empty} of {len(samples)} views in {time.time() - start_time:.1f}s '
+          f'({empty} with an empty alpha channel skipped); {len(coco["annotations"])} boxes, '
+          f'{len(classes)} classes: {", ".join(classes)}')
+    print(f'Crops take {crop_bytes / 1e6:.1f} MB instead of {full_bytes / 1e6:.1f} MB for the full frames: '
+          f'{saved / 1e6:.1f} MB saved ({saved / max(full_bytes, 1):.0%})')
+    print(f'Labels: {out_dir / "coco.json"}, {yolo_dir}')
+
+
 def main():
     parser = argparse.ArgumentParser(description='Prepare/list Street2Air dataset examples')
     parser.add_argument('--root', default='.', help='Dataset root')
-    parser.add_argument('--list', action='store_true', help='List all files')
+    parser.add_argument('--list', action='store_true',
+                        help='List all files (from the index manifest when it exists)')
+    parser.add_argument('--index', default=None,
+                        help=f'SQLite manifest written by the index command (default: <root>/{INDEX_NAME})')
+    parser.add_argument('--class', dest='classes', action='append', help='With --list: only this class')
+    parser.add_argument('--view-type', dest='view_types', action='append',
+                        help="With --list: only this view type ('street', 'top', ...)")
+    parser.add_argument('--instance', dest='instances', action='append',
+                        help="With --list: only this instance ('bus_4', ...)")
+    commands = parser.add_subparsers(dest='command')
+
+    index = commands.add_parser('index', help='Record the dataset tree in a SQLite manifest, incrementally')
+    index.add_argument('--workers', type=int, default=16, help='Parallel directory listings')
+    index.add_argument('--full', action='store_true', help='List every directory, even if its mtime is unchanged')
+
+    pack = commands.add_parser('pack', help='Pack labelled images into sequential tar shards')
+    pack.add_argument('out_dir', help='Folder for the shards and their index')
+    pack.add_argument('--shard-mb', type=int, default=512, help='Approximate shard size in MB')
+    pack.add_argument('--shuffle-seed', type=int, default=None,
+                      help='Shuffle samples across shards with this seed (default: keep path order)')
+    pack.add_argument('--prefix', default='street2air', help='Shard file name prefix')
+
+    cache = commands.add_parser('cache', help='Decode images into memory-mapped uint8 arrays, one file per view type')
+    cache.add_argument('cache_dir', help='Folder for the cache files')
+    cache.add_argument('--size', type=int, default=None, help='Resize images to SIZE x SIZE (default: keep size)')
+    cache.add_argument('--rebuild', action='store_true', help='Decode everything again instead of appending')
+
+    crop = commands.add_parser('crop', help='Crop views to their alpha bounding box and export COCO/YOLO boxes')
+    crop.add_argument('out_dir', help='Folder for crops/, coco.json and yolo/')
+    crop.add_argument('--pad', type=int, default=8, help='Pixels kept around the bounding box')
+    crop.add_argument('--square', action='store_true', help='Pad crops to a square with transparent pixels')
+    crop.add_argument('--alpha-threshold', type=int, default=10,
+                      help='Alpha value (0-255) above which a pixel belongs to the vehicle')
+    crop.add_argument('--workers', type=int, default=None, help='Worker processes (default: one per CPU)')
     args = parser.parse_args()
 
     root = Path(args.root)
-    if args.list:
+    index_path = Path(args.index) if args.index else root / INDEX_NAME
+    if args.command == 'index':
+        build_index(root, index_path, args.workers, args.full)
+    filtered = args.classes or args.view_types or args.instances
+    if args.list and index_path.exists():
+        list_indexed(index_path, args.classes, args.view_types, args.instances)
+    elif args.list and filtered:
+        parser.error(f'Filtering --list needs the index manifest; run "index" first ({index_path} not found)')
+    elif args.list:
         list_files(root)
+    if args.command == 'pack':
+        pack_shards(root, Path(args.out_dir), args.shard_mb, args.shuffle_seed, args.prefix)
+    if args.command == 'cache':
+        build_tensor_cache(root, Path(args.cache_dir), args.size, args.rebuild)
+    if args.command == 'crop':
+        export_labels(root, Path(args.out_dir), args.pad, args.square, args.alpha_threshold, args.workers)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Streaming reader for the tar shards written by `prepare_dataset.py pack`."""
+import argparse
+import json
+import random
+import tarfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Large reads keep network storage streaming instead of seeking per member
+READ_BUFFER = 8 * 1024 * 1024
+
+
+def decode_pil(data: bytes, labels: dict):
+    # RGBA uint8 array; Pillow releases the GIL while decoding, so threads scale. EXR goes through
+    # OpenImageIO, and is None (the sample is skipped) without it
+    import image_decode
+    return image_decode.decode_rgba(data, Path(labels['path']).suffix)
+
+
+def read_shard(path: Path):
+    """Yield (image bytes, labels) for every sample of one shard, reading it front to back."""
+    with open(path, 'rb', buffering=READ_BUFFER) as f, tarfile.open(fileobj=f, mode='r|') as tar:
+        pending = {}
+        for member in tar:
+            if not member.isfile():
+                continue
+            key, _, extension = member.name.rpartition('.')
+            data = tar.extractfile(member).read()
+            sample = pending.setdefault(key, {})
+            if extension == 'json':
+                sample['labels'] = json.loads(data)
+            else:
+                sample['image'] = data
+            if 'labels' in sample and 'image' in sample:
+                del pending[key]
+                yield sample['image'], sample['labels']
+
+
+class ShardDataset:
+    """Iterable over packed samples, with shard shuffling, a shuffle buffer and threaded decoding.
+
+    Iterating yields (decoded image, labels) pairs; labels carry class, instance,
+    view_type, view_index and the original path. With decode=None the raw encoded
+    bytes are returned. Works as a torch IterableDataset source: each DataLoader
+    worker reads a disjoint subset of the shards. Samples the decoder returns None for (EXR without
+    OpenImageIO) are skipped and counted in `skipped`.
+    """
+
+    def __init__(self, shard_dir, prefix='street2air', shuffle_buffer=1000, seed=0,
+                 decode=decode_pil, decode_threads=4, classes=None, view_types=None):
+        self.shard_dir = Path(shard_dir)
+        with open(self.shard_dir / f'{prefix}-index.json') as f:
+            self.index = json.load(f)
+        self.shards = [self.shard_dir / shard['name'] for shard in self.index['shards']]
+        self.shuffle_buffer = shuffle_buffer
+        self.seed = seed
+        self.epoch = 0
+        self.decode = decode
+        self.decode_threads = decode_threads
+        self.classes = set(classes) if classes else None
+        self.view_types = set(view_types) if view_types else None
+        self.skipped = 0
+
+    def __len__(self):
+        return self.index['samples']
+
+    def set_epoch(self, epoch):
+        # Different shard order and buffer shuffle every epoch, reproducible from the seed
+        self.epoch = epoch
+
+    def worker_shards(self, rng):
+        shards = list(self.shards)
+        if self.shuffle_buffer:
+            rng.shuffle(shards)
+        try:
+            import torch.utils.data
+            info = torch.utils.data.get_worker_info()
+        except ImportError:
+            info = None
+        if info is not None:
+            shards = shards[info.id::info.num_workers]
+        return shards
+
+    def samples(self, rng):
+        # Raw samples in shuffled order, filtered by class and view type
+        buffer = []
+        for shard in self.worker_shards(rng):
+            for data, labels in read_shard(shard):
+                if self.classes and labels['class'] not in self.classes:
+                    continue
+                if self.view_types and labels['view_type'] not in self.view_types:
+                    continue
+                if self.shuffle_buffer <= 1:
+                    yield data, labels
+                    continue
+                if len(buffer) < self.shuffle_buffer:
+                    buffer.append((data, labels))
+                    continue
+                n = rng.randrange(len(buffer))
+                yield buffer[n]
+                buffer[n] = (data, labels)
+        rng.shuffle(buffer)
+        yield from buffer
+
+    def __iter__(self):
+        rng = random.Random(f'{self.seed}:{self.epoch}')
+        if self.decode is None:
+            yield from self.samples(rng)
+            return
+        for image, labels in self.decoded(rng):
+            if image is None:
+                self.skipped += 1
+                if self.skipped == 1:
+                    print(f'Skipping {labels["path"]} and any other image that cannot be decoded here '
+                          f'(EXR needs OpenImageIO)')
+                continue
+            yield image, labels
+
+    def decoded(self, rng):
+        # (decoded image or None, labels) in sample order
+        if self.decode_threads <= 1:
+            for data, labels in self.samples(rng):
+                yield self.decode(data, labels), labels
+            return
+        # Keep a bounded number of decodes in flight, in order
+        with ThreadPoolExecutor(self.decode_threads, thread_name_prefix='shard_decode') as pool:
+            in_flight = []
+            for data, labels in self.samples(rng):
+                in_flight.append((pool.submit(self.decode, data, labels), labels))
+                if len(in_flight) >= self.decode_threads * 2:
+                    future, done_labels = in_flight.pop(0)
+                    yield future.result(), done_labels
+            for future, done_labels in in_flight:
+                yield future.result(), done_labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Read Street2Air tar shards and report throughput')
+    parser.add_argument('shard_dir', help='Folder written by prepare_dataset.py pack')
+    parser.add_argument('--prefix', default='street2air', help='Shard file name prefix')
+    parser.add_argument('--decode', action='store_true', help='Decode images (needs numpy and Pillow)')
+    parser.add_argument('--threads', type=int, default=4, help='Decode threads')
+    parser.add_argument('--shuffle-buffer', type=int, default=1000, help='Shuffle buffer size (0 = file order)')
+    args = parser.parse_args()
+
+    dataset = ShardDataset(args.shard_dir, args.prefix, args.shuffle_buffer,
+                           decode=decode_pil if args.decode else None, decode_threads=args.threads)
+    start_time = time.time()
+    count = 0
+    total_bytes = 0
+    for image, labels in dataset:
+        count += 1
+        total_bytes += image.nbytes if args.decode else len(image)
+    seconds = max(time.time() - start_time, 1e-9)
+    print(f'Read {count} samples ({total_bytes / 1e6:.1f} MB {"decoded" if args.decode else "encoded"}) '
+          f'in {seconds:.2f}s: {count / seconds:.0f} samples/s, {total_bytes / 1e6 / seconds:.0f} MB/s')
+    if dataset.skipped:
+        print(f'Skipped {dataset.skipped} samples that could not be decoded (EXR needs OpenImageIO)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Reader for the decoded-image cache written by `prepare_dataset.py cache`."""
+import json
+from pathlib import Path
+
+import numpy as np
+
+# One split ('street', 'top', ...) is four files next to each other:
+#   <split>.u8           decoded uint8 RGBA pixels, images back to back
+#   <split>-index.npy    int64 (N, 4): byte offset, height, width, channels
+#   <split>-labels.npy   int64 (N,): class id, see 'classes' in <split>.json
+#   <split>.json         build bookkeeping: classes, resize, source path/size/mtime per image
+
+
+def cache_paths(cache_dir, split):
+    cache_dir = Path(cache_dir)
+    return {
+        'data': cache_dir / f'{split}.u8',
+        'index': cache_dir / f'{split}-index.npy',
+        'labels': cache_dir / f'{split}-labels.npy',
+        'meta': cache_dir / f'{split}.json',
+    }
+
+
+class TensorCache:
+    """Random access to one cached split; images are views into the memory map, never copies."""
+
+    def __init__(self, cache_dir, split):
+        paths = cache_paths(cache_dir, split)
+        with open(paths['meta']) as f:
+            self.meta = json.load(f)
+        self.classes = self.meta['classes']
+        self.index = np.load(paths['index'])
+        self.labels = np.load(paths['labels'])
+        self.data = np.memmap(paths['data'], dtype=np.uint8, mode='r') if len(self.index) else np.empty(0, np.uint8)
+        self.paths = [entry['path'] for entry in self.meta['entries']]
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, n):
+        """(H, W, C) uint8 view of image n and its class id."""
+        offset, height, width, channels = self.index[n]
+        size = int(height) * int(width) * int(channels)
+        return self.data[offset:offset + size].reshape(height, width, channels), int(self.labels[n])
+
+    def batch(self, start, stop):
+        """Zero-copy (N, H, W, C) view of images start..stop-1 when they share a shape and are contiguous."""
+        rows = self.index[start:stop]
+        if len(rows) == 0:
+            return np.empty((0, 0, 0, 0), np.uint8), self.labels[start:stop]
+        shape = rows[0, 1:]
+        size = int(np.prod(shape))
+        if (rows[:, 1:] == shape).all() and (np.diff(rows[:, 0]) == size).all():
+            offset = int(rows[0, 0])
+            images = self.data[offset:offset + size * len(rows)].reshape(len(rows), *(int(x) for x in shape))
+        else:
+            images = np.stack([self[n][0] for n in range(start, stop)])
+        return images, self.labels[start:stop]
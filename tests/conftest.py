@@ -0,0 +1,62 @@
+import os
+import sys
+import types
+
+import pytest
+
+# The tests run with plain Python: the script folders go on the path the way each script adds its own
+# folder, and outside Blender the bpy modules some helpers import at the top are empty placeholders.
+# Only the parts of those helpers that never touch Blender are tested.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "multiview scripts"))
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+
+def placeholder(name, **attributes):
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    sys.modules[name] = module
+    return module
+
+
+try:
+    import bpy  # noqa: F401
+except ImportError:
+    placeholder("bpy")
+    placeholder("bpy_extras").object_utils = placeholder("bpy_extras.object_utils", world_to_camera_view=None)
+    placeholder("mathutils", Vector=None).bvhtree = placeholder("mathutils.bvhtree", BVHTree=None)
+
+
+# EXR magic number; without OpenImageIO an EXR is only recognised, never decoded
+EXR_HEADER = b"\x76\x2f\x31\x01"
+
+
+@pytest.fixture
+def make_dataset(tmp_path):
+    """make_dataset(exr=False) -> (root, {relative path: RGBA pixels}) for a small rendered-views tree.
+
+    Two instances with two views each (different sizes and colours), plus a preview that is not a view.
+    With exr=True one more view is an EXR, which the returned pixels leave out.
+    """
+    def make(exr=False):
+        import numpy as np
+        from PIL import Image
+        root = tmp_path / "data"
+        images = {}
+        names = ["bus_1_renders/render_view_0000.png", "bus_1_renders/render_view_0001.png",
+                 "van_2_xy_renders/render_view_0000.png", "van_2_xy_renders/render_view_0001.png"]
+        for n, name in enumerate(names):
+            pixels = np.zeros((10 + n, 12, 4), dtype=np.uint8)
+            pixels[2:6, 3:8] = (40 * n, 200, 90, 255)
+            path = root / "multiview" / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            Image.fromarray(pixels, "RGBA").save(path)
+            images[f"multiview/{name}"] = pixels
+        preview = root / "trellis artifacts" / "bus_1" / "bus_1.png"
+        preview.parent.mkdir(parents=True)
+        Image.fromarray(np.zeros((2, 2, 4), np.uint8), "RGBA").save(preview)
+        if exr:
+            (root / "multiview" / "bus_1_renders" / "render_view_0002.exr").write_bytes(EXR_HEADER + bytes(64))
+        return root, images
+    return make
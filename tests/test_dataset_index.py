@@ -0,0 +1,62 @@
+import os
+import shutil
+import sqlite3
+
+import prepare_dataset
+
+
+def indexed(index_path):
+    with sqlite3.connect(index_path) as db:
+        return {path: (cls, instance, view_type, view_index) for path, cls, instance, view_type, view_index
+                in db.execute('SELECT path, class, instance, view_type, view_index FROM files')}
+
+
+def touch_dir(path):
+    # Make sure the directory's mtime moves even on coarse file system clocks
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_index_labels_every_file(tmp_path, make_dataset):
+    root, images = make_dataset()
+    (root / '.cache').mkdir()
+    (root / '.cache' / 'hidden.png').write_bytes(b'')
+    index_path = root / prepare_dataset.INDEX_NAME
+    prepare_dataset.build_index(root, index_path, workers=4)
+    files = indexed(index_path)
+    assert set(files) == set(images) | {'trellis artifacts/bus_1/bus_1.png'}
+    assert files['multiview/van_2_xy_renders/render_view_0001.png'] == ('van', 'van_2', 'xy', 1)
+    assert files['multiview/bus_1_renders/render_view_0000.png'] == ('bus', 'bus_1', 'orbit', 0)
+
+
+def test_rerun_lists_only_changed_directories(tmp_path, make_dataset, capsys):
+    root, images = make_dataset()
+    # Outside the tree, so writing the index does not touch the root's mtime
+    index_path = tmp_path / 'index.sqlite'
+    prepare_dataset.build_index(root, index_path, workers=4)
+    capsys.readouterr()
+    prepare_dataset.build_index(root, index_path, workers=4)
+    assert '0 directories listed' in capsys.readouterr().out
+
+    bus_dir = root / 'multiview' / 'bus_1_renders'
+    shutil.copy(bus_dir / 'render_view_0000.png', bus_dir / 'render_view_0005.png')
+    touch_dir(bus_dir)
+    shutil.rmtree(root / 'multiview' / 'van_2_xy_renders')
+    touch_dir(root / 'multiview')
+    prepare_dataset.build_index(root, index_path, workers=4)
+    out = capsys.readouterr().out
+    assert '2 directories listed' in out and '1 removed' in out
+    files = indexed(index_path)
+    assert 'multiview/bus_1_renders/render_view_0005.png' in files
+    assert not any('van_2' in path for path in files)
+
+
+def test_list_indexed_filters(tmp_path, make_dataset, capsys):
+    root, images = make_dataset()
+    index_path = root / prepare_dataset.INDEX_NAME
+    prepare_dataset.build_index(root, index_path, workers=4)
+    capsys.readouterr()
+    prepare_dataset.list_indexed(index_path, classes=['van'], view_types=['xy'])
+    assert capsys.readouterr().out.split('\n')[:-1] == sorted(path for path in images if 'van_2' in path)
+    prepare_dataset.list_indexed(index_path, instances=['bus_1'], view_types=['xy'])
+    assert capsys.readouterr().out == ''
@@ -0,0 +1,59 @@
+import io
+import types
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import image_decode
+
+
+def png_bytes(pixels):
+    buffer = io.BytesIO()
+    Image.fromarray(pixels, 'RGBA').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def fake_oiio(pixels, alpha_channel=3):
+    # Just enough of OpenImageIO's ImageBuf for read_oiio
+    spec = types.SimpleNamespace(height=pixels.shape[0], width=pixels.shape[1], nchannels=pixels.shape[2],
+                                 alpha_channel=alpha_channel)
+    buf = types.SimpleNamespace(get_pixels=lambda _: pixels, has_error=False, spec=lambda: spec,
+                                geterror=lambda: '')
+    return types.SimpleNamespace(ImageBuf=lambda path: buf, FLOAT='float')
+
+
+def test_png_from_path_and_bytes(tmp_path):
+    pixels = np.random.default_rng(0).integers(0, 256, (5, 7, 4), dtype=np.uint8)
+    (tmp_path / 'view.png').write_bytes(png_bytes(pixels))
+    assert np.array_equal(image_decode.decode_rgba(tmp_path / 'view.png'), pixels)
+    assert np.array_equal(image_decode.decode_rgba(png_bytes(pixels), '.png'), pixels)
+    assert image_decode.decode_rgba(tmp_path / 'view.png', size=4).shape == (4, 4, 4)
+
+
+def test_exr_without_openimageio_is_none(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_decode, 'load_oiio', lambda: None)
+    (tmp_path / 'view.exr').write_bytes(b'\x76\x2f\x31\x01' + bytes(16))
+    assert image_decode.decode_rgba(tmp_path / 'view.exr') is None
+    assert image_decode.decode_rgba(b'\x76\x2f\x31\x01', '.EXR') is None
+
+
+def test_exr_is_unpremultiplied_and_srgb_encoded(monkeypatch):
+    # Linear 0.5 grey at half coverage (premultiplied to 0.25), and a transparent pixel
+    linear = np.array([[[0.25, 0.25, 0.25, 0.5], [0.0, 0.0, 0.0, 0.0]]], dtype=np.float32)
+    monkeypatch.setattr(image_decode, 'load_oiio', lambda: fake_oiio(linear))
+    rgba = image_decode.decode_rgba(b'exr bytes', '.exr')
+    assert rgba.dtype == np.uint8
+    assert rgba[0, 0].tolist() == [188, 188, 188, 128]
+    assert rgba[0, 1].tolist() == [0, 0, 0, 0]
+
+
+def test_exr_without_alpha_is_opaque(monkeypatch):
+    linear = np.full((2, 3, 3), 1.5, dtype=np.float32)
+    monkeypatch.setattr(image_decode, 'load_oiio', lambda: fake_oiio(linear, alpha_channel=-1))
+    assert (image_decode.decode_rgba(b'exr bytes', '.exr') == 255).all()
+
+
+def test_srgb_encode_matches_the_transfer_curve():
+    assert image_decode.srgb_encode(np.array([0.0, 0.002, 0.5, 1.0, 2.0])) == pytest.approx(
+        [0.0, 0.02584, 0.735357, 1.0, 1.0], abs=1e-5)
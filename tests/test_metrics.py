@@ -0,0 +1,30 @@
+import pytest
+
+import metrics
+
+
+@pytest.mark.parametrize("line, phase", [
+    ("Fra:1 Mem:120.50M (Peak 130.00M) | Time:00:00.41 | Mem:0.00M, Peak:0.00M | Scene, View Layer | "
+     "Synchronizing object | body", "sync"),
+    ("Fra:1 Mem:310.00M (Peak 320.00M) | Time:00:01.20 | Mem:15.00M, Peak:15.00M | Scene, View Layer | "
+     "Updating Scene BVH | Building BVH", "bvh"),
+    ("Fra:1 Mem:400.00M (Peak 410.00M) | Time:00:03.02 | Remaining:00:10.11 | Mem:90.00M, Peak:95.00M | "
+     "Scene, View Layer | Sample 12/128", "path_tracing"),
+    ("Fra:1 Mem:400.00M (Peak 410.00M) | Time:00:09.80 | Mem:90.00M, Peak:95.00M | Scene, View Layer | "
+     "Denoising", "denoise"),
+    ("Fra:1 Mem:400.00M (Peak 410.00M) | Time:00:09.90 | Scene, View Layer | Finished", "other"),
+])
+def test_phase(line, phase):
+    assert metrics.parse_render_stats(line)["phase"] == phase
+
+
+def test_memory_units():
+    stats = metrics.parse_render_stats("Fra:1 Mem:512K (Peak 1.5G) | Time:00:01.00 | Mem:10.00M, Peak:20.00M | "
+                                       "Scene | Sample 1/8")
+    assert stats["mem_mb"] == 0.5
+    assert stats["peak_mb"] == 1536.0
+
+
+def test_line_without_memory():
+    assert metrics.parse_render_stats("Rendering | Sample 1/8") == {"mem_mb": None, "peak_mb": None,
+                                                                    "phase": "path_tracing"}
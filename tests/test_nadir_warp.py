@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+import nadir_warp
+
+# An orthographic camera looking straight down with +Y up in the image: world X goes right, world Y goes up
+# the image (down the rows), 10 pixels per metre, pivot at pixel (8, 6)
+MAPPING = (np.array([[10.0, 0.0], [0.0, -10.0]]), np.array([8.0, 6.0]))
+
+
+@pytest.mark.parametrize("angle_deg", [0.0, 37.0, 90.0, 180.0, -45.0])
+def test_warp_is_a_rotation(angle_deg):
+    matrix, shift = nadir_warp.image_warp(MAPPING, angle_deg)
+    assert matrix @ matrix.T == pytest.approx(np.eye(2))
+    assert np.linalg.det(matrix) == pytest.approx(1.0)
+    assert shift == pytest.approx([0.0, 0.0])
+
+
+def test_warp_angles_compose():
+    first, _ = nadir_warp.image_warp(MAPPING, 30.0)
+    second, _ = nadir_warp.image_warp(MAPPING, 50.0)
+    both, _ = nadir_warp.image_warp(MAPPING, 80.0)
+    assert second @ first == pytest.approx(both)
+    assert nadir_warp.image_warp(MAPPING, 360.0)[0] == pytest.approx(np.eye(2))
+
+
+def test_counterclockwise_spin_turns_clockwise_in_rows_down_pixels():
+    # A spin of +90 degrees about Z takes world +X to +Y, which is up the image
+    matrix, _ = nadir_warp.image_warp(MAPPING, 90.0)
+    assert matrix @ np.array([1.0, 0.0]) == pytest.approx([0.0, -1.0])
+
+
+def test_translation_shift():
+    _, shift = nadir_warp.image_warp(MAPPING, 0.0, translation=(0.5, 0.2))
+    assert shift == pytest.approx([5.0, -2.0])
+
+
+def test_quarter_turns_and_integer_shifts_are_exact():
+    image = np.zeros((12, 16, 4), dtype=np.float32)
+    image[3:7, 5:11] = np.random.default_rng(0).random((4, 6, 4)) * 0.5 + 0.5
+    mapping = (MAPPING[0], np.array([8.0, 6.0]))
+    turned = nadir_warp.warp_rgba(image, mapping, *nadir_warp.image_warp(mapping, 180.0))
+    assert turned == pytest.approx(image[::-1, ::-1], abs=1e-6)
+    moved = nadir_warp.warp_rgba(image, mapping, *nadir_warp.image_warp(mapping, 0.0, translation=(0.2, 0.0)))
+    assert moved[:, 2:] == pytest.approx(image[:, :-2], abs=1e-6)
@@ -0,0 +1,43 @@
+import math
+import random
+
+import pose_sampler
+
+CENTER = (0.0, 0.0, 0.0)
+DISTANCES = (4.0, 6.0)
+HEIGHTS = (1.0, 3.0)
+
+
+def ring(azimuths_deg, distance=5.0, z=2.0):
+    return [(distance * math.cos(math.radians(a)), distance * math.sin(math.radians(a)), z) for a in azimuths_deg]
+
+
+def test_farthest_point_order():
+    band = pose_sampler.elevation_band(CENTER, DISTANCES, HEIGHTS)
+    candidates = ring([0, 10, 180, 90])
+    poses, _ = pose_sampler.select_poses(candidates, CENTER, DISTANCES, band, count=3)
+    assert poses == [candidates[0], candidates[2], candidates[3]]
+
+
+def test_count_and_coverage():
+    band = pose_sampler.elevation_band(CENTER, DISTANCES, HEIGHTS)
+    candidates = pose_sampler.candidate_poses(CENTER, DISTANCES, HEIGHTS, 200, random.Random(0))
+    poses, covered = pose_sampler.select_poses(candidates, CENTER, DISTANCES, band, count=12)
+    assert len(poses) == len(set(poses)) == 12
+    assert covered == pose_sampler.coverage(poses, CENTER, band)
+    fewer, covered_fewer = pose_sampler.select_poses(candidates, CENTER, DISTANCES, band, count=4)
+    assert fewer == poses[:4]
+    assert covered_fewer < covered
+
+
+def test_target_stops_at_first_sufficient_pose():
+    band = pose_sampler.elevation_band(CENTER, DISTANCES, HEIGHTS)
+    candidates = pose_sampler.candidate_poses(CENTER, DISTANCES, HEIGHTS, 200, random.Random(0))
+    poses, covered = pose_sampler.select_poses(candidates, CENTER, DISTANCES, band, target=0.8)
+    assert covered >= 0.8
+    assert pose_sampler.coverage(poses[:-1], CENTER, band) < 0.8
+
+
+def test_no_candidates():
+    band = pose_sampler.elevation_band(CENTER, DISTANCES, HEIGHTS)
+    assert pose_sampler.select_poses([], CENTER, DISTANCES, band, count=4) == ([], 0.0)
@@ -0,0 +1,89 @@
+import json
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import image_decode
+import prepare_dataset
+import tensor_cache
+
+
+def test_tensor_cache_skips_exr_without_openimageio(tmp_path, make_dataset, monkeypatch, capsys):
+    monkeypatch.setattr(image_decode, 'load_oiio', lambda: None)
+    root, images = make_dataset(exr=True)
+    prepare_dataset.build_tensor_cache(root, tmp_path / 'cache')
+    cache = tensor_cache.TensorCache(tmp_path / 'cache', 'orbit')
+    assert sorted(cache.paths) == sorted(path for path in images if 'bus_1' in path)
+    assert 'skipped 1 EXR images' in capsys.readouterr().out
+
+
+def test_export_labels_skips_exr_without_openimageio(tmp_path, make_dataset, monkeypatch):
+    monkeypatch.setattr(image_decode, 'load_oiio', lambda: None)
+    root, images = make_dataset(exr=True)
+    prepare_dataset.export_labels(root, tmp_path / 'labels', workers=1)
+    with open(tmp_path / 'labels' / 'coco.json') as f:
+        coco = json.load(f)
+    assert sorted(image['file_name'] for image in coco['images']) == sorted(images)
+    assert not (tmp_path / 'labels' / 'crops' / 'multiview' / 'bus_1_renders' / 'render_view_0002.png').exists()
+
+
+def test_alpha_bbox():
+    alpha = np.zeros((8, 10), np.uint8)
+    assert prepare_dataset.alpha_bbox(alpha) is None
+    alpha[2:5, 3:9] = 255
+    alpha[7, 0] = 5
+    assert prepare_dataset.alpha_bbox(alpha) == (3, 2, 9, 5)
+    assert prepare_dataset.alpha_bbox(alpha, threshold=0) == (0, 2, 9, 8)
+
+
+def test_export_labels(tmp_path, make_dataset):
+    root, images = make_dataset()
+    blank = root / 'multiview' / 'van_2_xy_renders' / 'render_view_0002.png'
+    Image.fromarray(np.zeros((10, 12, 4), np.uint8), 'RGBA').save(blank)
+    out_dir = tmp_path / 'labels'
+    prepare_dataset.export_labels(root, out_dir, pad=1, workers=1)
+
+    with open(out_dir / 'coco.json') as f:
+        coco = json.load(f)
+    assert [category['name'] for category in coco['categories']] == ['bus', 'van']
+    names = {image['id']: image['file_name'] for image in coco['images']}
+    assert sorted(names.values()) == sorted([*images, 'multiview/van_2_xy_renders/render_view_0002.png'])
+    # Every fixture view has its vehicle at columns 3-7, rows 2-5; the blank view gets no box
+    boxes = {names[annotation['image_id']]: annotation for annotation in coco['annotations']}
+    assert sorted(boxes) == sorted(images)
+    for path, annotation in boxes.items():
+        assert annotation['bbox'] == [3, 2, 5, 4]
+        assert annotation['category_id'] == (1 if 'bus' in path else 2)
+
+    assert (out_dir / 'yolo' / 'classes.txt').read_text() == 'bus\nvan\n'
+    label = (out_dir / 'yolo' / 'multiview' / 'van_2_xy_renders' / 'render_view_0000.txt').read_text().split()
+    assert label[0] == '1'
+    assert [float(value) for value in label[1:]] == pytest.approx([5.5 / 12, 4 / 12, 5 / 12, 4 / 12], abs=1e-6)
+    assert (out_dir / 'yolo' / 'multiview' / 'van_2_xy_renders' / 'render_view_0002.txt').read_text() == ''
+
+    # Crops keep the padding and the pixels; the blank view is not cropped
+    crops = out_dir / 'crops' / 'multiview'
+    crop = np.asarray(Image.open(crops / 'bus_1_renders' / 'render_view_0001.png'))
+    assert crop.shape == (6, 7, 4)
+    assert (crop[1:5, 1:6] == images['multiview/bus_1_renders/render_view_0001.png'][2:6, 3:8]).all()
+    assert not (crops / 'van_2_xy_renders' / 'render_view_0002.png').exists()
+
+
+def test_square_crop(tmp_path):
+    rgba = np.zeros((20, 20, 4), np.uint8)
+    rgba[5:9, 2:12] = 255
+    Image.fromarray(rgba, 'RGBA').save(tmp_path / 'view.png')
+    result = prepare_dataset.crop_view(tmp_path / 'view.png', tmp_path / 'crop.png', pad=0, square=True)
+    assert result['bbox'] == (2, 5, 12, 9)
+    crop = np.asarray(Image.open(tmp_path / 'crop.png'))
+    assert crop.shape == (10, 10, 4)
+    assert (crop[3:7, :, 3] == 255).all() and crop[:3, :, 3].sum() == 0 and crop[7:, :, 3].sum() == 0
+
+
+def test_scan_images_skips_texture_cache(make_dataset):
+    root, images = make_dataset()
+    for cache in (root / 'multiview' / '.texture_cache', root / 'multiview' / 'bus_1_renders' / '.texture_cache'):
+        cache.mkdir()
+        Image.fromarray(np.zeros((4, 4, 4), np.uint8), 'RGBA').save(cache / 'render_view_0009.png')
+    assert [sample['path'] for sample in prepare_dataset.scan_images(root)] == sorted(images)
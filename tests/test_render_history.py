@@ -0,0 +1,68 @@
+import pytest
+
+import render_history
+from render_history import RenderHistory
+
+
+def job(root, name, script="render_bus_xy.py"):
+    return {"blend": str(root / "bus" / f"{name}_xy.blend"), "script": f"/scripts/{script}"}
+
+
+def test_seconds_per_view_is_smoothed(tmp_path):
+    history = RenderHistory(str(tmp_path / "history.json"), str(tmp_path))
+    history.record(job(tmp_path, "bus_1"), {"ok": True, "seconds": 100.0, "views": 10})
+    history.record(job(tmp_path, "bus_1"), {"ok": True, "seconds": 20.0, "views": 10})
+    entry = history.entries["bus/bus_1_xy.blend|render_bus_xy.py"]
+    assert entry["seconds_per_view"] == pytest.approx(render_history.SMOOTHING * 2.0
+                                                      + (1 - render_history.SMOOTHING) * 10.0)
+    assert entry["runs"] == 2
+    assert history.estimate(job(tmp_path, "bus_1")) == pytest.approx(entry["seconds_per_view"] * 10)
+
+
+def test_failed_and_empty_runs_are_ignored(tmp_path):
+    history = RenderHistory(str(tmp_path / "history.json"), str(tmp_path))
+    history.record(job(tmp_path, "bus_1"), {"ok": False, "seconds": 5.0, "views": 10})
+    history.record(job(tmp_path, "bus_1"), {"ok": True, "seconds": 5.0, "views": 0})
+    assert history.entries == {}
+
+
+def test_unseen_files_take_their_class_mean(tmp_path):
+    history = RenderHistory(str(tmp_path / "history.json"), str(tmp_path))
+    assert history.estimate(job(tmp_path, "bus_9")) == (render_history.DEFAULT_SECONDS_PER_VIEW
+                                                        * render_history.DEFAULT_VIEWS)
+    history.record(job(tmp_path, "bus_1"), {"ok": True, "seconds": 40.0, "views": 10})
+    history.record(job(tmp_path, "bus_2"), {"ok": True, "seconds": 120.0, "views": 20})
+    history.record(job(tmp_path, "truck_1", "render_truck_xy.py"), {"ok": True, "seconds": 900.0, "views": 30})
+    # Mean seconds per view (4 and 6) times mean views (15) of the bus files only
+    assert history.estimate(job(tmp_path, "bus_9")) == pytest.approx(5.0 * 15)
+    # No history for the class at all: every timed file counts
+    assert history.estimate(job(tmp_path, "van_1", "render_van_xy.py")) == pytest.approx(
+        (4.0 + 6.0 + 30.0) / 3 * (10 + 20 + 30) / 3)
+
+
+def test_history_survives_a_reload(tmp_path):
+    path = str(tmp_path / "history.json")
+    history = RenderHistory(path, str(tmp_path))
+    history.record(job(tmp_path, "bus_1"), {"ok": True, "seconds": 30.0, "views": 10})
+    history.save()
+    assert RenderHistory(path, str(tmp_path)).estimate(job(tmp_path, "bus_1")) == pytest.approx(30.0)
+
+
+def test_memory_estimate(tmp_path):
+    history = RenderHistory(str(tmp_path / "history.json"), str(tmp_path))
+    assert history.memory_estimate(job(tmp_path, "bus_1")) is None
+    history.record_memory(job(tmp_path, "bus_1"), 1000.0, True)
+    history.record_memory(job(tmp_path, "bus_2"), 3000.0, True)
+    assert history.memory_estimate(job(tmp_path, "bus_1")) == pytest.approx(1000.0 * render_history.MEMORY_MARGIN)
+    # An unseen file takes the largest peak of its class script
+    assert history.memory_estimate(job(tmp_path, "bus_3")) == pytest.approx(3000.0 * render_history.MEMORY_MARGIN)
+    assert history.memory_estimate(job(tmp_path, "van_1", "render_van_xy.py")) is None
+
+
+def test_failed_run_only_raises_the_memory_peak(tmp_path):
+    history = RenderHistory(str(tmp_path / "history.json"), str(tmp_path))
+    history.record_memory(job(tmp_path, "bus_1"), 2000.0, True)
+    history.record_memory(job(tmp_path, "bus_1"), 500.0, False)
+    assert history.entries["bus/bus_1_xy.blend|render_bus_xy.py"]["peak_rss_mb"] == 2000.0
+    history.record_memory(job(tmp_path, "bus_1"), 500.0, True)
+    assert history.entries["bus/bus_1_xy.blend|render_bus_xy.py"]["peak_rss_mb"] == 500.0
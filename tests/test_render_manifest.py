@@ -0,0 +1,89 @@
+import os
+
+from render_manifest import RenderManifest
+
+VIEWS = ["render_view_000.png", "render_view_001.png"]
+
+
+def setup_batch(tmp_path):
+    scripts = tmp_path / "scripts"
+    scripts.mkdir()
+    for name in ("render_bus_xy.py", "render_truck_xy.py", "render_common.py"):
+        (scripts / name).write_text(f"# {name}\n")
+    jobs = {}
+    for vehicle in ("bus", "truck"):
+        blend = tmp_path / "root" / vehicle / f"{vehicle}_1_xy.blend"
+        output_dir = blend.parent / f"{vehicle}_1_xy_renders"
+        output_dir.mkdir(parents=True)
+        blend.write_bytes(vehicle.encode())
+        for name in VIEWS:
+            (output_dir / name).write_bytes(b"image")
+        jobs[vehicle] = {"blend": str(blend), "script": str(scripts / f"render_{vehicle}_xy.py"),
+                         "output_dir": str(output_dir), "params": {"num_renders": 2, "seed": 7}}
+    path = str(tmp_path / "root" / "render_manifest.json")
+    manifest = RenderManifest(path, str(tmp_path / "root"))
+    for job in jobs.values():
+        manifest.record(job, VIEWS)
+    manifest.save()
+    return path, jobs, scripts
+
+
+def reload(path):
+    return RenderManifest(path, os.path.dirname(path))
+
+
+def test_unchanged_jobs_are_up_to_date(tmp_path):
+    path, jobs, _ = setup_batch(tmp_path)
+    manifest = reload(path)
+    assert [manifest.stale_reasons(job) for job in jobs.values()] == [[], []]
+
+
+def test_class_script_change_only_affects_its_class(tmp_path):
+    path, jobs, scripts = setup_batch(tmp_path)
+    (scripts / "render_truck_xy.py").write_text("# changed\n")
+    manifest = reload(path)
+    assert manifest.stale_reasons(jobs["bus"]) == []
+    assert manifest.stale_reasons(jobs["truck"]) == ["render script changed"]
+
+
+def test_shared_module_change_affects_every_class(tmp_path):
+    path, jobs, scripts = setup_batch(tmp_path)
+    (scripts / "render_common.py").write_text("# changed\n")
+    manifest = reload(path)
+    assert manifest.stale_reasons(jobs["bus"]) == manifest.stale_reasons(jobs["truck"]) == ["render script changed"]
+
+
+def test_parameter_and_blend_changes(tmp_path):
+    path, jobs, _ = setup_batch(tmp_path)
+    with open(jobs["bus"]["blend"], "ab") as f:
+        f.write(b" edited")
+    jobs["truck"]["params"]["seed"] = 8
+    manifest = reload(path)
+    assert manifest.stale_reasons(jobs["bus"]) == ["blend file changed"]
+    assert manifest.stale_reasons(jobs["truck"])[0].startswith("render parameters changed")
+
+
+def test_missing_planned_view_is_stale_despite_other_files(tmp_path):
+    path, jobs, _ = setup_batch(tmp_path)
+    output_dir = jobs["bus"]["output_dir"]
+    os.remove(os.path.join(output_dir, VIEWS[1]))
+    with open(os.path.join(output_dir, "render_metrics.jsonl"), "w") as f:
+        f.write("{}\n")
+    assert reload(path).stale_reasons(jobs["bus"]) == ["1 output files missing or changed"]
+
+
+def test_view_missing_when_recorded_stays_stale(tmp_path):
+    path, jobs, _ = setup_batch(tmp_path)
+    manifest = reload(path)
+    manifest.record(jobs["bus"], VIEWS + ["render_view_002.png"])
+    assert manifest.stale_reasons(jobs["bus"]) == ["1 output files missing or changed"]
+
+
+def test_redo_keeps_the_other_views(tmp_path):
+    path, jobs, _ = setup_batch(tmp_path)
+    manifest = reload(path)
+    with open(os.path.join(jobs["bus"]["output_dir"], VIEWS[0]), "wb") as f:
+        f.write(b"re-rendered image")
+    manifest.record(jobs["bus"], VIEWS[:1])
+    assert sorted(manifest.entries["bus/bus_1_xy.blend|render_bus_xy.py"]["outputs"]) == VIEWS
+    assert manifest.stale_reasons(jobs["bus"]) == []
@@ -0,0 +1,46 @@
+import pytest
+
+import render_plan
+
+
+def plan(files=3, views=5):
+    return [{"blend": f"bus/bus_{n}_xy.blend", "view": view} for n in range(files) for view in range(views)]
+
+
+@pytest.mark.parametrize("count", [1, 2, 4, 7, 15, 20])
+def test_shards_cover_the_plan_exactly(count):
+    entries = plan()
+    shards = [render_plan.shard_entries(entries, index, count) for index in range(count)]
+    assert [entry for shard in shards for entry in shard] == sorted(entries, key=render_plan.sort_key)
+    assert max(map(len, shards)) - min(map(len, shards)) <= 1
+
+
+def test_shards_ignore_input_order():
+    entries = plan()
+    assert render_plan.shard_entries(entries[::-1], 1, 3) == render_plan.shard_entries(entries, 1, 3)
+
+
+@pytest.mark.parametrize("text", ["3/3", "-1/2", "1/0", "1", "a/b"])
+def test_parse_shard_rejects(text):
+    with pytest.raises(ValueError):
+        render_plan.parse_shard(text)
+
+
+def test_parse_shard():
+    assert render_plan.parse_shard("2/4") == (2, 4)
+
+
+def test_rng_for_depends_on_file_name_and_seed():
+    def draws(path, seed):
+        rng = render_plan.rng_for(path, seed)
+        return [rng.random() for _ in range(3)]
+
+    assert draws("/node1/data/bus_1_xy.blend", 7) == draws("/mnt/other/bus_1_xy.blend", 7)
+    assert draws("bus_1_xy.blend", 7) != draws("bus_2_xy.blend", 7)
+    assert draws("bus_1_xy.blend", 7) != draws("bus_1_xy.blend", 8)
+
+
+def test_renumber_view_name():
+    assert render_plan.renumber_view_name("render_view_0047.png", 3) == "render_view_0003.png"
+    assert render_plan.renumber_view_name("van_3_view_017.exr", 12) == "van_3_view_012.exr"
+    assert render_plan.renumber_view_name("default.png", 3) == "default.png"
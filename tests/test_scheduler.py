@@ -0,0 +1,69 @@
+import time
+
+from batch_render import JobScheduler
+
+
+def make_jobs(seconds, memory=None):
+    jobs = [{"id": name, "blend": f"{name}.blend"} for name in seconds]
+    return jobs, dict(seconds), dict(memory or {})
+
+
+def test_longest_job_first():
+    jobs, estimates, _ = make_jobs({"a": 10.0, "b": 300.0, "c": 60.0})
+    scheduler = JobScheduler(jobs, estimates, slots=2)
+    assert [scheduler.next_job()["id"] for _ in jobs] == ["b", "c", "a"]
+    assert scheduler.next_job() is None
+
+
+def test_eta_replays_pending_jobs_on_free_slots():
+    jobs, estimates, _ = make_jobs({"a": 3.0, "b": 2.0, "c": 1.0})
+    assert JobScheduler(jobs, estimates, slots=2).eta() == 3.0
+    assert JobScheduler(jobs, estimates, slots=1).eta() == 6.0
+
+
+def test_eta_counts_down_running_jobs():
+    jobs, estimates, _ = make_jobs({"a": 100.0, "b": 10.0})
+    scheduler = JobScheduler(jobs, estimates, slots=1)
+    scheduler.next_job()
+    scheduler.running["a"] = time.time() - 40.0
+    assert abs(scheduler.eta() - 70.0) < 1.0
+
+
+def test_admission_within_budget():
+    jobs, estimates, memory = make_jobs({"a": 100.0, "b": 50.0}, {"a": 6.0, "b": 6.0})
+    scheduler = JobScheduler(jobs, estimates, slots=2, memory=memory, budget_mb=10.0)
+    first = scheduler.next_job()
+    assert first["id"] == "a"
+    assert scheduler.in_use() == 6.0
+    # b does not fit next to a, and nothing else could run meanwhile
+    assert scheduler._admit(time.time()) is None
+    scheduler.finish(first)
+    assert scheduler.next_job()["id"] == "b"
+
+
+def test_job_over_budget_runs_alone():
+    jobs, estimates, memory = make_jobs({"a": 100.0}, {"a": 50.0})
+    scheduler = JobScheduler(jobs, estimates, slots=2, memory=memory, budget_mb=10.0)
+    assert scheduler.next_job()["id"] == "a"
+
+
+def test_backfill_around_blocked_head():
+    jobs, estimates, memory = make_jobs({"a": 100.0, "b": 90.0, "c": 80.0}, {"a": 6.0, "b": 8.0, "c": 3.0})
+    scheduler = JobScheduler(jobs, estimates, slots=3, memory=memory, budget_mb=10.0)
+    assert scheduler.next_job()["id"] == "a"
+    # b waits for a; c fits now and should be done before a frees the memory b needs
+    now = time.time()
+    assert scheduler._admit(now)["id"] == "c"
+    # Later on a is nearly done, c would hold memory past that point, and b would not fit next to it
+    assert scheduler._admit(now + 60.0) is None
+
+
+def test_observed_growth_stays_reserved():
+    jobs, estimates, memory = make_jobs({"a": 100.0, "c": 10.0}, {"a": 4.0, "c": 3.0})
+    scheduler = JobScheduler(jobs, estimates, slots=2, memory=memory, budget_mb=10.0)
+    first = scheduler.next_job()
+    scheduler.observe(first["id"], 8.0)
+    assert scheduler.in_use() == 8.0
+    assert scheduler._admit(time.time()) is None
+    scheduler.finish(first)
+    assert scheduler.in_use() == 0.0
@@ -0,0 +1,46 @@
+import numpy as np
+
+import image_decode
+import prepare_dataset
+import shard_loader
+
+
+def test_shard_round_trip(tmp_path, make_dataset):
+    root, images = make_dataset()
+    index = prepare_dataset.pack_shards(root, tmp_path / 'shards', shard_mb=0, shuffle_seed=1)
+    assert index['samples'] == len(images)
+    assert len(index['shards']) == len(images)
+
+    dataset = shard_loader.ShardDataset(tmp_path / 'shards', shuffle_buffer=2, decode_threads=2)
+    seen = {labels['path']: (image, labels) for image, labels in dataset}
+    assert set(seen) == set(images)
+    for path, (image, labels) in seen.items():
+        assert np.array_equal(image, images[path])
+    assert seen['multiview/van_2_xy_renders/render_view_0001.png'][1]['view_type'] == 'xy'
+
+    bus = shard_loader.ShardDataset(tmp_path / 'shards', decode=None, classes=['bus'])
+    assert sorted(labels['path'] for _, labels in bus) == sorted(path for path in images if 'bus' in path)
+
+
+def test_shard_order_is_reproducible(tmp_path, make_dataset):
+    root, _ = make_dataset()
+    prepare_dataset.pack_shards(root, tmp_path / 'shards', shard_mb=0)
+
+    def order(epoch):
+        dataset = shard_loader.ShardDataset(tmp_path / 'shards', shuffle_buffer=2, seed=3, decode=None)
+        dataset.set_epoch(epoch)
+        return [labels['path'] for _, labels in dataset]
+
+    assert order(0) == order(0)
+    assert sorted(order(0)) == sorted(order(1))
+
+
+def test_exr_without_openimageio_is_skipped(tmp_path, make_dataset, monkeypatch):
+    monkeypatch.setattr(image_decode, 'load_oiio', lambda: None)
+    root, images = make_dataset(exr=True)
+    index = prepare_dataset.pack_shards(root, tmp_path / 'shards')
+    assert index['samples'] == len(images) + 1
+    for threads in (1, 3):
+        dataset = shard_loader.ShardDataset(tmp_path / 'shards', shuffle_buffer=0, decode_threads=threads)
+        assert sorted(labels['path'] for _, labels in dataset) == sorted(images)
+        assert dataset.skipped == 1
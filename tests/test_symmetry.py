@@ -0,0 +1,58 @@
+import math
+
+import pytest
+
+import symmetry
+
+CENTER = (1.0, 2.0, 0.0)
+
+
+def normal(angle_deg):
+    # Unit normal of a vertical plane whose long axis points at angle_deg
+    angle = math.radians(angle_deg)
+    return (-math.sin(angle), math.cos(angle), 0.0)
+
+
+@pytest.mark.parametrize("angle_deg", [0.0, 30.0, 90.0, 137.0])
+def test_mirror_location(angle_deg):
+    n = normal(angle_deg)
+    location = (4.0, -1.0, 1.5)
+    mirrored = symmetry.mirror_location(location, CENTER, n)
+    assert symmetry.side(mirrored, CENTER, n) == pytest.approx(-symmetry.side(location, CENTER, n))
+    assert math.dist(mirrored, CENTER) == pytest.approx(math.dist(location, CENTER))
+    assert symmetry.mirror_location(mirrored, CENTER, n) == pytest.approx(location)
+
+
+def test_mirror_across_long_axis():
+    assert symmetry.mirror_location((3.0, 5.0, 1.0), CENTER, normal(0.0)) == pytest.approx([3.0, -1.0, 1.0])
+
+
+def test_pair_views():
+    n = normal(0.0)
+    views = [
+        {"view": -1, "name": "default.png", "location": (1.0, -4.0, 1.0)},
+        {"view": 0, "name": "view_0.png", "location": (5.0, 6.0, 1.0)},
+        {"view": 1, "name": "view_1.png", "location": (5.0, -1.8, 1.0)},
+        {"view": 2, "name": "view_2.png", "location": (-3.0, 6.0, 1.0)},
+        {"view": 3, "name": "view_3.png", "location": (-3.0, -3.0, 1.0)},
+    ]
+    rendered, mirrored = symmetry.pair_views(views, CENTER, n)
+    # The default view is always rendered and never stands in for another one
+    assert [view["name"] for view in rendered] == ["default.png", "view_0.png", "view_2.png"]
+    assert [(view["name"], source) for view, source, _ in mirrored] == [("view_1.png", "view_0.png"),
+                                                                         ("view_3.png", "view_2.png")]
+    for _, source, location in mirrored:
+        source_location = next(view["location"] for view in views if view["name"] == source)
+        assert location == pytest.approx(symmetry.mirror_location(source_location, CENTER, n))
+
+
+def test_unpaired_views_are_rendered():
+    n = normal(0.0)
+    views = [
+        {"view": 0, "name": "view_0.png", "location": (5.0, 6.0, 1.0)},
+        {"view": 1, "name": "view_1.png", "location": (5.0, -2.0, 1.0)},
+        {"view": 2, "name": "view_2.png", "location": (-3.0, -3.0, 1.0)},
+    ]
+    rendered, mirrored = symmetry.pair_views(views, CENTER, n)
+    assert len(mirrored) == 1
+    assert sorted(view["name"] for view in rendered) == ["view_0.png", "view_2.png"]
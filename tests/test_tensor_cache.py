@@ -0,0 +1,56 @@
+import numpy as np
+
+import prepare_dataset
+import tensor_cache
+
+
+def test_round_trip(tmp_path, make_dataset):
+    root, images = make_dataset()
+    prepare_dataset.build_tensor_cache(root, tmp_path / 'cache')
+    for split in ('orbit', 'xy'):
+        cache = tensor_cache.TensorCache(tmp_path / 'cache', split)
+        assert len(cache) == 2
+        for n, path in enumerate(cache.paths):
+            image, label = cache[n]
+            assert np.array_equal(image, images[path])
+            assert cache.classes[label] == path.split('/')[1].split('_')[0]
+
+
+def test_batch_is_a_view_into_the_memory_map(tmp_path, make_dataset):
+    root, _ = make_dataset()
+    prepare_dataset.build_tensor_cache(root, tmp_path / 'cache', size=8)
+    cache = tensor_cache.TensorCache(tmp_path / 'cache', 'orbit')
+    images, labels = cache.batch(0, 2)
+    assert images.shape == (2, 8, 8, 4)
+    assert np.shares_memory(images, cache.data)
+    assert list(labels) == [0, 0]
+
+
+def test_batch_of_mixed_sizes_is_stacked(tmp_path, make_dataset):
+    root, images = make_dataset()
+    prepare_dataset.build_tensor_cache(root, tmp_path / 'cache')
+    cache = tensor_cache.TensorCache(tmp_path / 'cache', 'orbit')
+    # The two views differ in height, so they cannot share one block
+    assert cache[0][0].shape != cache[1][0].shape
+    single, _ = cache.batch(1, 2)
+    assert np.array_equal(single[0], images[cache.paths[1]])
+
+
+def test_rebuild_decodes_only_changed_images(tmp_path, make_dataset, capsys):
+    root, _ = make_dataset()
+    prepare_dataset.build_tensor_cache(root, tmp_path / 'cache', size=8)
+    size = (tmp_path / 'cache' / 'orbit.u8').stat().st_size
+    capsys.readouterr()
+    prepare_dataset.build_tensor_cache(root, tmp_path / 'cache', size=8)
+    assert (tmp_path / 'cache' / 'orbit.u8').stat().st_size == size
+    assert 'orbit: 2 images (0 decoded now' in capsys.readouterr().out
+
+    # A changed image is appended again; its old pixels stay until --rebuild
+    changed = root / 'multiview' / 'bus_1_renders' / 'render_view_0000.png'
+    changed.write_bytes((root / 'multiview' / 'bus_1_renders' / 'render_view_0001.png').read_bytes())
+    prepare_dataset.build_tensor_cache(root, tmp_path / 'cache', size=8)
+    cache = tensor_cache.TensorCache(tmp_path / 'cache', 'orbit')
+    assert (tmp_path / 'cache' / 'orbit.u8').stat().st_size == size * 3 // 2
+    assert np.array_equal(cache[0][0], cache[1][0])
+    prepare_dataset.build_tensor_cache(root, tmp_path / 'cache', size=8, rebuild=True)
+    assert (tmp_path / 'cache' / 'orbit.u8').stat().st_size == size
@@ -0,0 +1,76 @@
+import json
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import render_plan
+import validate_renders
+
+
+def save(path, pixels, mode="RGBA"):
+    Image.fromarray(pixels, mode).save(path)
+    return str(path)
+
+
+def vehicle(box=(4, 4, 12, 12), size=16):
+    pixels = np.zeros((size, size, 4), dtype=np.uint8)
+    left, top, right, bottom = box
+    pixels[top:bottom, left:right] = 255
+    return pixels
+
+
+def test_good_view(tmp_path):
+    path, reasons, stats = validate_renders.check_image(save(tmp_path / "view.png", vehicle()))
+    assert reasons == {}
+    assert stats["coverage"] == pytest.approx(64 / 256)
+    assert stats["bbox"] == [4, 4, 12, 12]
+
+
+@pytest.mark.parametrize("pixels, mode, check", [
+    (vehicle(box=(0, 4, 12, 12)), "RGBA", "framing"),
+    (vehicle(box=(4, 4, 12, 12))[..., :3], "RGB", "coverage"),
+    (np.zeros((16, 16, 4), np.uint8), "RGBA", "coverage"),
+])
+def test_bad_view(tmp_path, pixels, mode, check):
+    _, reasons, _ = validate_renders.check_image(save(tmp_path / "view.png", pixels, mode))
+    assert list(reasons) == [check]
+
+
+def test_truncated_view(tmp_path):
+    path = save(tmp_path / "view.png", vehicle())
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data[:len(data) // 2])
+    assert list(validate_renders.check_image(path)[1]) == ["integrity"]
+
+
+def test_exr_without_openimageio(tmp_path, monkeypatch):
+    monkeypatch.setitem(__import__("sys").modules, "OpenImageIO", None)
+    good = tmp_path / "view.exr"
+    good.write_bytes(validate_renders.EXR_MAGIC + bytes(64))
+    assert validate_renders.check_image(str(good))[1:] == ({}, {"decoded": False})
+    bad = tmp_path / "bad.exr"
+    bad.write_bytes(b"not an exr at all")
+    assert list(validate_renders.check_image(str(bad))[1]) == ["integrity"]
+
+
+def test_redo_matches_an_exr_failure_to_its_planned_view(tmp_path):
+    # A batch tree with one .blend whose views were written as EXR, one of them corrupt
+    blend = tmp_path / "bus" / "bus_1_xy.blend"
+    output_dir = tmp_path / "bus" / "bus_1_xy_renders"
+    output_dir.mkdir(parents=True)
+    blend.write_bytes(b"")
+    for n in range(3):
+        (output_dir / f"render_view_{n:03d}.exr").write_bytes(validate_renders.EXR_MAGIC + bytes(64))
+    (output_dir / "render_view_001.exr").write_bytes(b"truncated")
+    failures_path = str(tmp_path / "render_failures.jsonl")
+    validate_renders.validate(str(tmp_path), failures_path, workers=1)
+    with open(failures_path) as f:
+        assert [json.loads(line)["name"] for line in f] == ["render_view_001.exr"]
+
+    # Plan views are always named .png; the failed one is picked out all the same
+    views = [{"view": n, "name": f"render_view_{n:03d}.png", "location": [0.0, 0.0, 0.0]} for n in range(-1, 3)]
+    failures = render_plan.load_failures(failures_path)["bus/bus_1_xy.blend"]
+    assert render_plan.match_failures(views, failures) == {"render_view_001.png": {"integrity"}}